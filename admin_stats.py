@@ -0,0 +1,238 @@
+"""Periodic job pre-aggregating per-user and global stats for the admin page.
+
+Run it from cron, or keep it running with ``--every``::
+
+    python -m admin_stats
+    python -m admin_stats --every 300
+
+Users, wallets, lots and trades are read in four queries and every held
+ticker is priced once. Each run writes one ``kind: "user"`` document per
+user plus one ``kind: "global"`` document to ``admin_stats`` and then drops
+the previous run, so the page loads everything with a single ``find``.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+from config import get_setting
+from database import fetch_prices_async
+from mongo_connection import get_collection
+
+# Tickers listed in the global "most held" / "most traded" rankings
+TOP_TICKERS = 10
+
+
+def get_admin_usernames() -> set:
+    """Usernames allowed on the admin page (setting admin.USERNAMES, comma-separated)."""
+    names = get_setting("admin", "USERNAMES", "")
+    if isinstance(names, str):
+        names = names.split(",")
+    return {name.strip() for name in names if name.strip()}
+
+
+def is_admin(username: str | None) -> bool:
+    return username is not None and username in get_admin_usernames()
+
+
+def load_stats_inputs() -> tuple[list, pd.DataFrame, pd.DataFrame, dict[str, float]]:
+    """
+    Read every user, lot, trade and wallet in four queries.
+
+    Returns:
+        (usernames, lots, trades, funds): lots has columns username, ticker,
+        quantity and cost; trades has username, side, ticker, quantity, price
+        and pnl (realized, sells with a recorded cost basis only).
+    """
+    users = [u["username"] for u in get_collection("users").find({}, {"username": 1})]
+    funds = {
+        w["username"]: w["current_funds"] for w in get_collection("user_wallets").find()
+    }
+    lots = pd.DataFrame(
+        [
+            {
+                "username": lot["username"],
+                "ticker": lot["stock_ticker"],
+                "quantity": lot["stock_quantity"],
+                "cost": lot["stock_quantity"] * lot["stock_price"],
+            }
+            for lot in get_collection("user_portfolio").find({}, {"_id": 0})
+        ],
+        columns=["username", "ticker", "quantity", "cost"],
+    )
+    trades = pd.DataFrame(
+        [
+            {
+                "username": t["username"],
+                "side": t["side"],
+                "ticker": t["ticker"],
+                "quantity": t["quantity"],
+                "price": t["price"],
+                "pnl": (
+                    t["quantity"] * t["price"] - t["cost_basis"]
+                    if "cost_basis" in t
+                    else 0.0
+                ),
+            }
+            for t in get_collection("trades").find({}, {"_id": 0})
+        ],
+        columns=["username", "side", "ticker", "quantity", "price", "pnl"],
+    )
+    usernames = sorted(set(users) | set(funds) | set(lots["username"]))
+    return usernames, lots, trades, funds
+
+
+def compute_admin_stats(
+    usernames: list,
+    lots: pd.DataFrame,
+    trades: pd.DataFrame,
+    funds: dict[str, float],
+    prices: dict[str, float],
+) -> tuple[list[dict], dict]:
+    """
+    Aggregate holdings, concentration, trading activity and P&L.
+
+    Returns:
+        (per-user stats, global stats)
+    """
+    positions = lots.groupby(["username", "ticker"], as_index=False)[
+        ["quantity", "cost"]
+    ].sum()
+    # Tickers that can't be priced at all are valued at cost, not zero
+    positions["value"] = (
+        positions["quantity"] * positions["ticker"].map(prices)
+    ).fillna(positions["cost"])
+    users = pd.DataFrame(index=pd.Index(usernames, name="username"))
+    users["cash"] = pd.Series(funds, dtype=float).reindex(users.index).fillna(0.0)
+
+    by_user = positions.groupby("username")
+    users["holdings_value"] = by_user["value"].sum()
+    users["cost_basis"] = by_user["cost"].sum()
+    users["positions"] = by_user.size()
+
+    # Concentration: largest position's share and the Herfindahl index
+    # (sum of squared weights; 1 = a single holding)
+    holdings = users["holdings_value"].reindex(positions["username"]).to_numpy(float)
+    weights = np.divide(
+        positions["value"].to_numpy(float),
+        holdings,
+        out=np.zeros(len(positions)),
+        where=holdings > 0,
+    )
+    positions["weight"] = weights
+    positions["weight_sq"] = weights**2
+    users["top_share"] = positions.groupby("username")["weight"].max()
+    users["hhi"] = positions.groupby("username")["weight_sq"].sum()
+    top = positions.sort_values("value", ascending=False).drop_duplicates("username")
+    users["top_ticker"] = top.set_index("username")["ticker"]
+
+    trade_counts = trades.groupby(["username", "side"]).size().unstack(fill_value=0)
+    users["buys"] = trade_counts.get("buy")
+    users["sells"] = trade_counts.get("sell")
+    trades["notional"] = trades["quantity"] * trades["price"]
+    users["volume"] = trades.groupby("username")["notional"].sum()
+    users["realized_pnl"] = trades.groupby("username")["pnl"].sum()
+
+    numeric = users.columns.drop("top_ticker")
+    users[numeric] = users[numeric].fillna(0.0)
+    users["unrealized_pnl"] = users["holdings_value"] - users["cost_basis"]
+    users["net_worth"] = users["cash"] + users["holdings_value"]
+    users = users.astype({"positions": int, "buys": int, "sells": int})
+    users["top_ticker"] = users["top_ticker"].astype(object).where(
+        users["top_ticker"].notna(), None
+    )
+
+    held = positions.groupby("ticker").agg(
+        holders=("username", "nunique"), value=("value", "sum")
+    )
+    traded = trades.groupby("ticker").agg(trades=("side", "size"), volume=("notional", "sum"))
+    invested = users[users["positions"] > 0]
+    global_stats = {
+        "users": len(users),
+        "active_traders": int(((users["buys"] + users["sells"]) > 0).sum()),
+        "total_net_worth": float(users["net_worth"].sum()),
+        "total_cash": float(users["cash"].sum()),
+        "total_holdings": float(users["holdings_value"].sum()),
+        "median_net_worth": float(users["net_worth"].median()) if len(users) else 0.0,
+        "trades": len(trades),
+        "volume": float(trades["notional"].sum()),
+        "realized_pnl": float(users["realized_pnl"].sum()),
+        "unrealized_pnl": float(users["unrealized_pnl"].sum()),
+        "mean_hhi": float(invested["hhi"].mean()) if len(invested) else 0.0,
+        "most_held": [
+            {"ticker": ticker, "holders": int(row["holders"]), "value": float(row["value"])}
+            for ticker, row in held.sort_values(
+                ["holders", "value"], ascending=False
+            ).head(TOP_TICKERS).iterrows()
+        ],
+        "most_traded": [
+            {"ticker": ticker, "trades": int(row["trades"]), "volume": float(row["volume"])}
+            for ticker, row in traded.sort_values(
+                ["trades", "volume"], ascending=False
+            ).head(TOP_TICKERS).iterrows()
+        ],
+    }
+    return users.reset_index().to_dict("records"), global_stats
+
+
+def run_admin_stats_job() -> int:
+    """
+    Recompute and store the admin stats.
+
+    Returns:
+        Number of users written
+    """
+    usernames, lots, trades, funds = load_stats_inputs()
+    prices = asyncio.run(fetch_prices_async(lots["ticker"].unique()))
+    user_stats, global_stats = compute_admin_stats(usernames, lots, trades, funds, prices)
+
+    stats_collection = get_collection("admin_stats")
+    run_id = ObjectId()
+    computed_at = datetime.now()
+    stats_collection.insert_many(
+        [
+            {"kind": "global", "run_id": run_id, "computed_at": computed_at, **global_stats},
+            *(
+                {"kind": "user", "run_id": run_id, **stats}
+                for stats in user_stats
+            ),
+        ]
+    )
+    stats_collection.delete_many({"run_id": {"$ne": run_id}})
+    return len(user_stats)
+
+
+def get_admin_stats() -> tuple[dict | None, list[dict]]:
+    """
+    Latest stored (global stats, per-user stats) in one query.
+
+    Returns (None, []) if the job hasn't run yet.
+    """
+    docs = list(get_collection("admin_stats").find({}, {"_id": 0}))
+    runs = [doc for doc in docs if doc["kind"] == "global"]
+    if not runs:
+        return None, []
+    # A run that is still replacing the previous one may briefly coexist with it
+    latest = max(runs, key=lambda doc: doc["computed_at"])
+    users = [
+        doc for doc in docs if doc["kind"] == "user" and doc["run_id"] == latest["run_id"]
+    ]
+    return latest, users
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--every", type=float, default=None, help="Repeat every N seconds"
+    )
+    args = parser.parse_args()
+    while True:
+        print(f"Computed admin stats for {run_admin_stats_job()} users.")
+        if args.every is None:
+            break
+        time.sleep(args.every)
@@ -0,0 +1,271 @@
+"""Watchlists and price alerts evaluated by a background worker.
+
+Three alert kinds, all reduced to a (lower, upper) price band:
+
+- "above":    fires when price >= threshold          (lower = -inf)
+- "below":    fires when price <= threshold          (upper = +inf)
+- "pct_move": fires when the price moves threshold % away from the price
+              when the alert was created, in either direction
+
+Active alerts are loaded into NumPy arrays grouped by ticker, with each
+ticker's lower and upper bounds sorted. Checking a quote batch is then two
+``searchsorted`` calls per quoted ticker, so the cost grows with the number
+of tickers (and alerts actually firing), not with alerts x users.
+
+Triggered alerts are marked in MongoDB and shown on the owner's next
+dashboard render.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+from loguru import logger
+
+from config import get_bool_setting, get_setting
+from database import fetch_prices_async
+from mongo_connection import get_collection, get_mongo
+from profiler import timed
+from quote_stream import get_quote_streamer
+
+ALERT_KINDS = {
+    "above": "Price rises to",
+    "below": "Price falls to",
+    "pct_move": "Moves by (%)",
+}
+
+
+def alert_band(alert: dict) -> tuple[float, float]:
+    """The (lower, upper) band outside of which ``alert`` fires."""
+    if alert["kind"] == "above":
+        return -np.inf, alert["threshold"]
+    if alert["kind"] == "below":
+        return alert["threshold"], np.inf
+    move = alert["threshold"] / 100
+    return alert["reference_price"] * (1 - move), alert["reference_price"] * (1 + move)
+
+
+class AlertRuleSet:
+    """Immutable, ticker-grouped arrays of active alert bands."""
+
+    def __init__(self, alerts: list[dict]):
+        self.tickers: dict[str, tuple[int, int]] = {}
+        n = len(alerts)
+        tickers = np.array([a["ticker"] for a in alerts], dtype=object)
+        bands = np.array([alert_band(a) for a in alerts], dtype=float).reshape(n, 2)
+        ids = np.array([a["_id"] for a in alerts], dtype=object)
+
+        # Group by ticker; within a group, lower ascending and upper ascending
+        # are kept as two independently sorted views
+        order = np.argsort(tickers, kind="stable") if n else np.array([], dtype=int)
+        tickers, bands, ids = tickers[order], bands[order], ids[order]
+        self.lower = np.empty(n)
+        self.lower_ids = np.empty(n, dtype=object)
+        self.upper = np.empty(n)
+        self.upper_ids = np.empty(n, dtype=object)
+
+        start = 0
+        while start < n:
+            ticker = tickers[start]
+            stop = start + int(np.searchsorted(tickers[start:], ticker, side="right"))
+            rows = slice(start, stop)
+            by_lower = np.argsort(bands[rows, 0], kind="stable")
+            by_upper = np.argsort(bands[rows, 1], kind="stable")
+            self.lower[rows] = bands[rows, 0][by_lower]
+            self.lower_ids[rows] = ids[rows][by_lower]
+            self.upper[rows] = bands[rows, 1][by_upper]
+            self.upper_ids[rows] = ids[rows][by_upper]
+            self.tickers[ticker] = (start, stop)
+            start = stop
+
+    def __len__(self):
+        return len(self.lower)
+
+    def triggered(self, quotes: dict[str, float]) -> dict[str, list]:
+        """Alert IDs fired by ``quotes``, grouped by ticker."""
+        fired = {}
+        for ticker, price in quotes.items():
+            span = self.tickers.get(ticker)
+            if span is None:
+                continue
+            start, stop = span
+            # price <= lower: the suffix of the ascending lower bounds
+            lo = start + int(np.searchsorted(self.lower[start:stop], price, side="left"))
+            # price >= upper: the prefix of the ascending upper bounds
+            hi = start + int(np.searchsorted(self.upper[start:stop], price, side="right"))
+            ids = set(self.lower_ids[lo:stop]) | set(self.upper_ids[start:hi])
+            if ids:
+                fired[ticker] = list(ids)
+        return fired
+
+
+class AlertWorker:
+    """Background thread that checks every active alert against fresh quotes."""
+
+    def __init__(self, db, interval_seconds: float = 15.0, reload_seconds: float = 60.0):
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.reload_seconds = reload_seconds
+        self.rules = AlertRuleSet([])
+        self.loaded_at = 0.0
+        self._dirty = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def mark_dirty(self):
+        """Reload rules before the next check (an alert was added or removed)."""
+        self._dirty.set()
+
+    def load_rules(self):
+        self._dirty.clear()
+        self.loaded_at = time.time()
+        self.rules = AlertRuleSet(list(self.db["alerts"].find({"status": "active"})))
+
+    def fetch_quotes(self, tickers: list) -> dict[str, float]:
+        streamer = get_quote_streamer()
+        if streamer is not None:
+            streamer.watch("alert-worker", tickers)
+        return asyncio.run(fetch_prices_async(tickers))
+
+    def check(self, quotes: dict[str, float]) -> int:
+        """Fire every alert triggered by ``quotes``; returns how many fired."""
+        fired = self.rules.triggered(quotes)
+        now = datetime.now()
+        total = 0
+        for ticker, alert_ids in fired.items():
+            total += self.db["alerts"].update_many(
+                {"_id": {"$in": alert_ids}, "status": "active"},
+                {
+                    "$set": {
+                        "status": "triggered",
+                        "trigger_price": quotes[ticker],
+                        "triggered_at": now,
+                        "seen": False,
+                    }
+                },
+            ).modified_count
+        if fired:
+            self.load_rules()
+        return total
+
+    def run_once(self) -> int:
+        if self._dirty.is_set() or time.time() - self.loaded_at > self.reload_seconds:
+            self.load_rules()
+        if not len(self.rules):
+            return 0
+        return self.check(self.fetch_quotes(list(self.rules.tickers)))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception(f"Alert check failed: {e}")
+            self._stopped.wait(self.interval_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="alert-worker", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+
+@st.cache_resource
+def get_alert_worker() -> AlertWorker:
+    """Return the process-wide alert worker (started unless alerts.WORKER=0)."""
+    worker = AlertWorker(
+        get_mongo().db,
+        interval_seconds=float(get_setting("alerts", "INTERVAL_SECONDS", 15)),
+    )
+    if get_bool_setting("alerts", "WORKER", True):
+        worker.start()
+    return worker
+
+
+# ============================================================================
+# Watchlists & Alerts
+# ============================================================================
+
+
+@timed()
+def get_watchlist(username: str) -> list:
+    doc = get_collection("watchlists").find_one({"username": username})
+    return doc["tickers"] if doc else []
+
+
+@timed()
+def set_watchlist(username: str, tickers: list):
+    get_collection("watchlists").update_one(
+        {"username": username}, {"$set": {"tickers": list(tickers)}}, upsert=True
+    )
+
+
+@timed()
+def create_alert(
+    username: str,
+    ticker: str,
+    kind: str,
+    threshold: float,
+    reference_price: float | None = None,
+) -> dict:
+    """
+    Store an active alert. "pct_move" alerts need the current price as
+    ``reference_price``.
+
+    Returns:
+        The stored alert
+    """
+    if kind not in ALERT_KINDS:
+        raise ValueError(f"Unknown alert kind: {kind}")
+    if threshold <= 0:
+        raise ValueError("Threshold must be positive.")
+    if kind == "pct_move" and not reference_price:
+        raise ValueError("Percent-move alerts need a reference price.")
+
+    alert = {
+        "_id": uuid.uuid4().hex,
+        "username": username,
+        "ticker": ticker,
+        "kind": kind,
+        "threshold": float(threshold),
+        "reference_price": reference_price,
+        "status": "active",
+        "created_at": datetime.now(),
+    }
+    get_collection("alerts").insert_one(alert)
+    get_alert_worker().mark_dirty()
+    return alert
+
+
+@timed()
+def delete_alert(username: str, alert_id: str) -> bool:
+    result = get_collection("alerts").delete_one({"_id": alert_id, "username": username})
+    get_alert_worker().mark_dirty()
+    return result.deleted_count > 0
+
+
+@timed()
+def get_user_alerts(username: str, status: str = "active") -> list:
+    cursor = get_collection("alerts").find({"username": username, "status": status})
+    return list(cursor.sort("created_at", -1))
+
+
+@timed()
+def pop_triggered_alerts(username: str) -> list:
+    """Triggered alerts the user hasn't seen yet, marking them seen."""
+    alerts_collection = get_collection("alerts")
+    alerts = list(alerts_collection.find({"username": username, "seen": False}))
+    if alerts:
+        alerts_collection.update_many(
+            {"_id": {"$in": [a["_id"] for a in alerts]}}, {"$set": {"seen": True}}
+        )
+    return alerts
@@ -0,0 +1,291 @@
+"""Vectorized backtests of simple rule strategies over closing prices.
+
+Prices are a (days, tickers) array of closes with no gaps, e.g.
+``load_stock_data(tickers, period).ffill().dropna()``. Every strategy turns
+a whole parameter grid into equity curves in a few array ops. Signal
+strategies only produce a (params, days, tickers) array of target weights
+and share the accounting:
+
+- the weight decided at day t's close earns day t+1's return (no look-ahead)
+- trading costs ``cost_bps`` basis points of every unit of weight changed
+
+Per-ticker strategies (SMA crossover, momentum) backtest each ticker on its
+own; rebalancing holds one equal-weight portfolio across all tickers.
+
+Large sweeps are split into chunks of parameter sets, optionally spread
+over a process pool, and only summary statistics come back from each chunk.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# Parameter sets evaluated per array op; bounds memory at
+# chunk x days x tickers floats
+CHUNK_SIZE = 32
+
+STAT_LABELS = {
+    "total_return": "Total return",
+    "cagr": "CAGR",
+    "sharpe": "Sharpe",
+    "max_drawdown": "Max drawdown",
+    "turnover": "Turnover",
+}
+
+
+def daily_returns(closes: np.ndarray) -> np.ndarray:
+    """Simple returns with day 0 set to 0, same shape as ``closes``."""
+    returns = np.zeros_like(closes)
+    returns[1:] = closes[1:] / closes[:-1] - 1
+    return returns
+
+
+def rolling_mean(closes: np.ndarray, window: int) -> np.ndarray:
+    """Trailing ``window``-day mean along axis 0; NaN until it's full."""
+    cumsum = np.vstack([np.zeros((1, closes.shape[1])), np.cumsum(closes, axis=0)])
+    means = np.full_like(closes, np.nan)
+    means[window - 1 :] = (cumsum[window:] - cumsum[:-window]) / window
+    return means
+
+
+class Strategy:
+    """Interface every backtest strategy implements."""
+
+    name = "base"
+    label = "Base"
+    description = ""
+    # False if the strategy holds one portfolio across all tickers
+    per_ticker = True
+    # {param: (label, min, max, default (low, high), step)} for grid inputs
+    param_specs: dict[str, tuple] = {}
+
+    def valid(self, params: dict) -> bool:
+        """Whether a parameter combination makes sense (e.g. fast < slow)."""
+        return True
+
+    def equity(
+        self, closes: np.ndarray, grid: list[dict], cost_bps: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Equity curves (params, columns, days) starting at 1, and turnover
+        (params, columns)."""
+        raise NotImplementedError
+
+
+class SignalStrategy(Strategy):
+    """A per-ticker strategy defined by its daily target weights."""
+
+    def weights(self, closes: np.ndarray, grid: list[dict]) -> np.ndarray:
+        """Target weights of shape (len(grid), days, tickers), each in [0, 1]."""
+        raise NotImplementedError
+
+    def equity(self, closes, grid, cost_bps):
+        weights = self.weights(closes, grid)
+        returns = daily_returns(closes)
+        strategy_returns = np.zeros_like(weights)
+        strategy_returns[:, 1:] = weights[:, :-1] * returns[1:]
+        traded = np.abs(np.diff(weights, axis=1, prepend=0.0))
+        strategy_returns -= traded * (cost_bps / 10_000)
+        equity = np.cumprod(1 + strategy_returns, axis=1)
+        return equity.transpose(0, 2, 1), traded.sum(axis=1)
+
+
+class SMACrossover(SignalStrategy):
+    name = "sma_crossover"
+    label = "SMA crossover"
+    description = "Long while the fast moving average is above the slow one."
+    param_specs = {
+        "fast": ("Fast SMA (days)", 2, 100, (5, 50), 5),
+        "slow": ("Slow SMA (days)", 10, 250, (50, 200), 25),
+    }
+
+    def valid(self, params):
+        return params["fast"] < params["slow"]
+
+    def weights(self, closes, grid):
+        # Each distinct window is averaged once and shared by the grid
+        windows = {p["fast"] for p in grid} | {p["slow"] for p in grid}
+        sma = {w: rolling_mean(closes, w) for w in windows}
+        fast = np.stack([sma[p["fast"]] for p in grid])
+        slow = np.stack([sma[p["slow"]] for p in grid])
+        return (fast > slow).astype(float)
+
+
+class Momentum(SignalStrategy):
+    name = "momentum"
+    label = "Momentum"
+    description = "Long while the trailing return beats a threshold."
+    param_specs = {
+        "lookback": ("Lookback (days)", 5, 252, (20, 120), 20),
+        "threshold": ("Threshold (%)", -10, 20, (0, 5), 5),
+    }
+
+    def weights(self, closes, grid):
+        days = len(closes)
+        momentum = {}
+        for lookback in {p["lookback"] for p in grid}:
+            trailing = np.full_like(closes, np.nan)
+            if lookback < days:
+                trailing[lookback:] = closes[lookback:] / closes[:-lookback] - 1
+            momentum[lookback] = trailing
+        trailing = np.stack([momentum[p["lookback"]] for p in grid])
+        thresholds = np.array([p["threshold"] / 100 for p in grid])[:, None, None]
+        return (trailing > thresholds).astype(float)
+
+
+class Rebalance(Strategy):
+    name = "rebalance"
+    label = "Equal-weight rebalancing"
+    description = "Equal weights across all tickers, reset every N trading days."
+    per_ticker = False
+    param_specs = {
+        "every": ("Rebalance every (days)", 1, 252, (5, 125), 20),
+    }
+
+    def equity(self, closes, grid, cost_bps):
+        # Weights drift between rebalances, so the equity is computed
+        # directly from share counts rather than from a weight series
+        days, n_tickers = closes.shape
+        cost = cost_bps / 10_000
+        equity = np.empty((len(grid), 1, days))
+        turnover = np.empty((len(grid), 1))
+        for i, params in enumerate(grid):
+            every = params["every"]
+            # Between rebalances the share counts are fixed, so the portfolio
+            # grows by the mean price relative since the last rebalance
+            base = np.arange(days) // every * every
+            relative = (closes / closes[base]).mean(axis=1)
+
+            # Drift into each rebalance, and the weight traded to undo it
+            starts = np.arange(0, days, every)
+            drifted = closes[starts[1:]] / closes[starts[:-1]]
+            growth = drifted.mean(axis=1)
+            drifted /= drifted.sum(axis=1, keepdims=True)
+            traded = np.abs(drifted - 1 / n_tickers).sum(axis=1)
+
+            # Value right after each rebalance (the first one buys everything)
+            at_rebalance = (1 - cost) * np.cumprod(
+                np.concatenate([[1.0], growth * (1 - cost * traded)])
+            )
+            equity[i, 0] = at_rebalance[np.arange(days) // every] * relative
+            turnover[i, 0] = 1 + traded.sum()
+        return equity, turnover
+
+
+STRATEGIES = {
+    strategy.name: strategy for strategy in (SMACrossover(), Momentum(), Rebalance())
+}
+
+
+def parameter_grid(strategy: str, **values) -> list[dict]:
+    """Every valid combination of the given parameter values."""
+    names = list(values)
+    grid = [dict(zip(names, combo)) for combo in itertools.product(*values.values())]
+    return [params for params in grid if STRATEGIES[strategy].valid(params)]
+
+
+def performance_stats(equity: np.ndarray, turnover: np.ndarray) -> dict:
+    """Summary statistics over the last axis of ``equity`` curves."""
+    years = max(equity.shape[-1] - 1, 1) / TRADING_DAYS
+    returns = equity[..., 1:] / equity[..., :-1] - 1
+    std = returns.std(axis=-1)
+    sharpe = np.divide(
+        returns.mean(axis=-1) * np.sqrt(TRADING_DAYS),
+        std,
+        out=np.zeros_like(std),
+        where=std > 0,
+    )
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+    return {
+        "total_return": equity[..., -1] - 1,
+        "cagr": np.maximum(equity[..., -1], 0) ** (1 / years) - 1,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.min(axis=-1),
+        "turnover": turnover,
+    }
+
+
+def backtest(
+    closes: np.ndarray, strategy: str, params: dict, cost_bps: float = 5.0
+) -> np.ndarray:
+    """Equity curves (columns, days) of one parameter set."""
+    equity, _ = STRATEGIES[strategy].equity(closes, [params], cost_bps)
+    return equity[0]
+
+
+def buy_and_hold(closes: np.ndarray) -> np.ndarray:
+    """Equity curves (tickers, days) of holding each ticker throughout."""
+    return (closes / closes[0]).T
+
+
+def _evaluate(closes: np.ndarray, strategy: str, grid: list[dict], cost_bps: float):
+    equity, turnover = STRATEGIES[strategy].equity(closes, grid, cost_bps)
+    return performance_stats(equity, turnover)
+
+
+# Set once per pool worker so the price array isn't pickled for every chunk
+_worker_closes: np.ndarray | None = None
+
+
+def _init_worker(closes: np.ndarray):
+    global _worker_closes
+    _worker_closes = closes
+
+
+def _evaluate_in_worker(strategy: str, grid: list[dict], cost_bps: float):
+    return _evaluate(_worker_closes, strategy, grid, cost_bps)
+
+
+def run_sweep(
+    closes: np.ndarray,
+    strategy: str,
+    grid: list[dict],
+    cost_bps: float = 5.0,
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    """
+    Evaluate every parameter set in ``grid``.
+
+    Args:
+        closes: (days, tickers) closing prices without gaps
+        workers: Processes to spread chunks over; 1 runs in this process
+
+    Returns:
+        {"params": grid, "stats": {stat: array (len(grid), columns)}}
+    """
+    closes = np.ascontiguousarray(closes, dtype=float)
+    chunks = [grid[i : i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(closes,)
+        ) as pool:
+            parts = list(
+                pool.map(
+                    _evaluate_in_worker,
+                    [strategy] * len(chunks),
+                    chunks,
+                    [cost_bps] * len(chunks),
+                )
+            )
+    else:
+        parts = [_evaluate(closes, strategy, chunk, cost_bps) for chunk in chunks]
+    stats = {
+        stat: np.concatenate([part[stat] for part in parts]) for stat in STAT_LABELS
+    }
+    return {"params": grid, "stats": stats}
+
+
+def results_frame(result: dict, columns: list) -> pd.DataFrame:
+    """One row per (parameter set, column) of a ``run_sweep`` result."""
+    rows = []
+    for i, params in enumerate(result["params"]):
+        for j, column in enumerate(columns):
+            row = {**params, "ticker": column}
+            for stat in STAT_LABELS:
+                row[stat] = float(result["stats"][stat][i, j])
+            rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,77 @@
+"""Evaluation cost of the price-alert rule set.
+
+Builds ``--alerts`` random alerts (all three kinds) over ``--tickers``
+symbols, then times checking a full quote batch against the sorted rule set
+and against a per-alert scan as a baseline, checking both agree::
+
+    python -m benchmarks.bench_alerts --alerts 100000 --tickers 500
+"""
+
+import argparse
+import random
+
+from alerts import ALERT_KINDS, AlertRuleSet, alert_band
+from benchmarks.timing import LatencyRecorder
+
+
+THRESHOLDS = {"above": (101, 150), "below": (50, 99), "pct_move": (1, 30)}
+
+
+def random_alert(rng: random.Random, alert_id: int, ticker: str) -> dict:
+    """An alert on a ticker trading at 100 that has not fired yet."""
+    kind = rng.choice(list(ALERT_KINDS))
+    return {
+        "_id": alert_id,
+        "ticker": ticker,
+        "kind": kind,
+        "threshold": rng.uniform(*THRESHOLDS[kind]),
+        "reference_price": 100.0,
+    }
+
+
+def naive_triggered(alerts: list[dict], quotes: dict[str, float]) -> set:
+    fired = set()
+    for alert in alerts:
+        lower, upper = alert_band(alert)
+        price = quotes[alert["ticker"]]
+        if price <= lower or price >= upper:
+            fired.add(alert["_id"])
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    alerts = [random_alert(rng, i, rng.choice(tickers)) for i in range(args.alerts)]
+
+    recorder = LatencyRecorder()
+    with recorder.time("build_rule_set"):
+        rules = AlertRuleSet(alerts)
+
+    fired_total = 0
+    for _ in range(args.batches):
+        quotes = {t: 100 * (1 + rng.gauss(0, 0.02)) for t in tickers}
+        with recorder.time("rule_set_batch"):
+            fired = rules.triggered(quotes)
+        with recorder.time("naive_scan_batch"):
+            expected = naive_triggered(alerts, quotes)
+        got = {alert_id for ids in fired.values() for alert_id in ids}
+        assert got == expected, "rule set and naive scan disagree"
+        fired_total += len(got)
+
+    print(
+        f"alerts={args.alerts} tickers={args.tickers} batches={args.batches} "
+        f"avg_fired={fired_total / args.batches:.0f}"
+    )
+    print(recorder.report())
+
+
+if __name__ == "__main__":
+    main()
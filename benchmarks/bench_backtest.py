@@ -0,0 +1,81 @@
+"""Throughput of the vectorized backtester in strategies evaluated per second.
+
+One "strategy" is one parameter set on one ticker (or, for rebalancing, on
+the whole basket). Runs an SMA-crossover and a momentum grid over
+``--tickers`` synthetic price series, serially and on a ``--workers``
+process pool, plus a per-strategy pandas loop on a sample as a baseline::
+
+    python -m benchmarks.bench_backtest --tickers 100 --days 1260 --workers 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, parameter_grid, run_sweep
+
+GRIDS = {
+    "sma_crossover": {"fast": range(5, 105, 5), "slow": range(20, 260, 10)},
+    "momentum": {"lookback": range(10, 260, 10), "threshold": range(-5, 11)},
+    "rebalance": {"every": range(1, 253)},
+}
+
+
+def synthetic_closes(n_days: int, n_tickers: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0003, 0.02, (n_days, n_tickers))
+    return 100 * np.exp(np.cumsum(log_returns, axis=0))
+
+
+def naive_sma_crossover(close: pd.Series, fast: int, slow: int, cost_bps: float) -> float:
+    """One SMA-crossover backtest the straightforward pandas way."""
+    position = (close.rolling(fast).mean() > close.rolling(slow).mean()).astype(float)
+    returns = position.shift(1).fillna(0) * close.pct_change().fillna(0)
+    returns -= position.diff().fillna(position).abs() * cost_bps / 10_000
+    return float((1 + returns).prod() - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--naive-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    closes = synthetic_closes(args.days, args.tickers, args.seed)
+    print(f"tickers={args.tickers} days={args.days} workers={args.workers}")
+    print(f"{'strategy':<16}{'mode':<10}{'strategies':>12}{'seconds':>10}{'per sec':>12}")
+
+    for name, values in GRIDS.items():
+        grid = parameter_grid(name, **values)
+        columns = args.tickers if STRATEGIES[name].per_ticker else 1
+        for mode, workers in (("serial", 1), ("pool", args.workers)):
+            start = time.perf_counter()
+            run_sweep(closes, name, grid, workers=workers)
+            elapsed = time.perf_counter() - start
+            n = len(grid) * columns
+            print(f"{name:<16}{mode:<10}{n:>12,}{elapsed:>10.2f}{n / elapsed:>12,.0f}")
+
+    # Baseline: one pandas backtest per (parameter set, ticker)
+    rng = np.random.default_rng(args.seed)
+    frame = pd.DataFrame(closes)
+    grid = parameter_grid("sma_crossover", **GRIDS["sma_crossover"])
+    start = time.perf_counter()
+    for _ in range(args.naive_sample):
+        params = grid[rng.integers(len(grid))]
+        naive_sma_crossover(
+            frame[rng.integers(args.tickers)], params["fast"], params["slow"], 5.0
+        )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'sma_crossover':<16}{'naive':<10}{args.naive_sample:>12,}"
+        f"{elapsed:>10.2f}{args.naive_sample / elapsed:>12,.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
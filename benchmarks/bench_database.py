@@ -0,0 +1,115 @@
+"""End-to-end throughput benchmark for database.py.
+
+Runs against an in-process mongomock and replayed market data by default, so
+results are repeatable on any machine::
+
+    python -m benchmarks.bench_database --users 200 --lots 20
+
+Point ``MOCKMARKET_MONGODB_URI`` at ``mongodb://localhost:27017`` to measure a
+real mongod instead. The benchmark only ever uses (and drops) its own
+``mockmarket_bench`` database and a throwaway shared-state file, never the
+app's data.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.timing import LatencyRecorder
+
+BENCH_TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA", "AMZN", "TSLA", "META", "NFLX"]
+BENCH_DATABASE = "mockmarket_bench"
+
+
+def configure_environment(replay_dir: str):
+    """Use mongomock unless a URI is given; always replay synthetic prices.
+
+    Mongo writes go to ``BENCH_DATABASE`` and the shared store to a SQLite
+    file next to the replay data, so a benchmark pointed at a local mongod
+    can't touch the app's own database or state file.
+    """
+    os.makedirs(replay_dir, exist_ok=True)
+    os.environ.setdefault("MOCKMARKET_MONGODB_URI", "mongomock://")
+    os.environ["MOCKMARKET_MONGODB_DATABASE"] = BENCH_DATABASE
+    os.environ["MOCKMARKET_MARKET_DATA_PROVIDER"] = "replay"
+    os.environ["MOCKMARKET_MARKET_DATA_REPLAY_DIR"] = replay_dir
+    os.environ["MOCKMARKET_SHARED_STATE_BACKEND"] = "sqlite"
+    os.environ["MOCKMARKET_SHARED_STATE_SQLITE_PATH"] = os.path.join(
+        replay_dir, "state.db"
+    )
+
+
+def run(n_users: int, n_lots: int, seed: int) -> LatencyRecorder:
+    import database
+    from ticker import get_current_stock_price
+    from market_data import generate_replay_data
+    from mongo_connection import get_mongo, get_mongodb_uri
+
+    if get_mongodb_uri().startswith("mongodb+srv://"):
+        raise SystemExit("Refusing to benchmark (and wipe) a remote Atlas cluster.")
+
+    generate_replay_data(
+        BENCH_TICKERS, os.environ["MOCKMARKET_MARKET_DATA_REPLAY_DIR"], seed=seed
+    )
+    mongo = get_mongo()
+    assert mongo.db.name == BENCH_DATABASE, "call configure_environment() first"
+    # Start from an empty benchmark database (a previous run's leftovers)
+    mongo.client.drop_database(BENCH_DATABASE)
+
+    rng = random.Random(seed)
+    recorder = LatencyRecorder()
+    usernames = [f"bench_user_{i}" for i in range(n_users)]
+
+    for username in usernames:
+        with recorder.time("create_user"):
+            database.create_user(username, "password")
+        database.create_wallet(username, initial_funds=1_000_000)
+
+    for username in usernames:
+        with recorder.time("verify_user"):
+            database.verify_user(username, "password")
+
+    for username in usernames:
+        for _ in range(n_lots):
+            ticker = rng.choice(BENCH_TICKERS)
+            with recorder.time("buy"):
+                price = get_current_stock_price(ticker)
+                database.adjust_wallet_balance(username, -price * 5, min_balance=0)
+                database.add_stock_to_portfolio(username, ticker, price, 5)
+
+    for username in usernames:
+        ticker = rng.choice(database.get_user_portfolio(username))["stock_ticker"]
+        with recorder.time("sell"):
+            price = get_current_stock_price(ticker)
+            if database.remove_from_portfolio(username, ticker, 3):
+                database.adjust_wallet_balance(username, price * 3)
+
+    for username in usernames:
+        with recorder.time("calculate_net_worth"):
+            database.calculate_net_worth(username)
+
+    for _ in range(5):
+        with recorder.time("get_all_users_net_worth"):
+            database.get_all_users_net_worth()
+
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--lots", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as replay_dir:
+        configure_environment(replay_dir)
+        recorder = run(args.users, args.lots, args.seed)
+
+    print(f"users={args.users} lots/user={args.lots}")
+    print(recorder.report())
+
+
+if __name__ == "__main__":
+    main()
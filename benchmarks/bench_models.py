@@ -0,0 +1,57 @@
+"""Per-model throughput benchmark for the simulation engine.
+
+Fits every model to the same synthetic fat-tailed history and times path
+generation at the Monte Carlo page's largest settings, flagging any model
+that exceeds the latency budget::
+
+    python -m benchmarks.bench_models --sims 10000 --days 252 --budget-ms 500
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.timing import LatencyRecorder
+from simulation import MODELS, fit_model, simulate_paths
+
+
+def synthetic_prices(n_bars: int = 1260, seed: int = 0) -> np.ndarray:
+    """Student-t daily returns, so jump and GARCH fits have something to find."""
+    rng = np.random.default_rng(seed)
+    returns = 0.0003 + 0.012 * rng.standard_t(4, n_bars) / np.sqrt(2)
+    return 100 * np.exp(np.concatenate(([0.0], np.cumsum(returns))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sims", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--method", default="plain")
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    prices = synthetic_prices()
+    recorder = LatencyRecorder()
+    for model in MODELS:
+        with recorder.time(f"{model}.fit"):
+            params = fit_model(model, prices)
+        for seed in range(args.repeats):
+            with recorder.time(f"{model}.simulate"):
+                simulate_paths(
+                    model, params, prices[-1], args.days, args.sims, seed, args.method
+                )
+
+    print(f"sims={args.sims} days={args.days} method={args.method}")
+    print(recorder.report())
+    print()
+    print(f"{'model':<12}{'paths/s':>14}{'budget':>10}")
+    for row in recorder.summary():
+        if row["operation"].endswith(".simulate"):
+            model = row["operation"].split(".")[0]
+            verdict = "ok" if row["p99_ms"] <= args.budget_ms else "OVER"
+            print(f"{model:<12}{row['ops_per_sec'] * args.sims:>14,.0f}{verdict:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Matching throughput of the limit/stop order engine.
+
+Loads ``--orders`` resting orders spread over ``--tickers`` symbols into an
+in-memory engine, then replays random-walk ticks and times matching alone,
+against a naive scan of every open order as a baseline. A second phase
+executes ``--fills`` triggered orders through the wallet/portfolio functions
+(mongomock by default, whose unindexed scans dominate that number)::
+
+    python -m benchmarks.bench_orders --orders 100000 --ticks 2000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import uuid
+
+from benchmarks.timing import LatencyRecorder
+from order_engine import triggers_below
+
+
+def random_order(rng: random.Random, ticker: str, last: float, username: str) -> dict:
+    """A resting order that is not triggered at ``last``."""
+    side = rng.choice(["buy", "sell"])
+    order_type = rng.choice(["limit", "stop"])
+    below = triggers_below(side, order_type)
+    return {
+        "_id": uuid.uuid4().hex,
+        "username": username,
+        "ticker": ticker,
+        "side": side,
+        "type": order_type,
+        "quantity": rng.randint(1, 5),
+        "price": round(last * rng.uniform(*(0.8, 0.999) if below else (1.001, 1.2)), 2),
+        "status": "open",
+    }
+
+
+def bench_matching(n_orders, n_tickers, n_ticks, seed, recorder) -> tuple[int, int]:
+    from order_engine import OrderEngine, is_triggered
+
+    rng = random.Random(seed)
+    prices = {f"T{i:03d}": 100.0 for i in range(n_tickers)}
+    tickers = list(prices)
+    orders = [
+        random_order(rng, t, prices[t], f"user_{rng.randrange(1000)}")
+        for t in (rng.choice(tickers) for _ in range(n_orders))
+    ]
+
+    engine = OrderEngine()
+    with recorder.time("load_orders"):
+        for order in orders:
+            engine.add(order)
+
+    # Orders that start out triggered would all fire on the first tick
+    triggered = engine.match(prices)
+    naive_open = {o["_id"]: o for o in orders}
+    for order, _ in triggered:
+        naive_open.pop(order["_id"])
+
+    matched = 0
+    for _ in range(n_ticks):
+        ticker = rng.choice(tickers)
+        prices[ticker] *= 1 + rng.gauss(0, 0.005)
+        tick = {ticker: prices[ticker]}
+        with recorder.time("match_tick"):
+            matched += len(engine.match(tick))
+        with recorder.time("naive_scan_tick"):
+            hits = [
+                o for o in naive_open.values()
+                if o["ticker"] == ticker and is_triggered(o, prices[ticker])
+            ]
+            for o in hits:
+                del naive_open[o["_id"]]
+    return len(triggered), matched
+
+
+def bench_fills(n_fills, seed, recorder):
+    os.environ.setdefault("MOCKMARKET_MONGODB_URI", "mongomock://")
+    from database import add_stock_to_portfolio, create_wallet
+    from mongo_connection import get_mongo
+    from order_engine import OrderEngine
+
+    rng = random.Random(seed)
+    db = get_mongo().db
+    users = [f"fill_user_{i}" for i in range(max(1, n_fills // 10))]
+    for username in users:
+        create_wallet(username, initial_funds=1_000_000)
+        add_stock_to_portfolio(username, "T000", 100.0, 1000)
+
+    orders = [random_order(rng, "T000", 100.0, rng.choice(users)) for _ in range(n_fills)]
+    db["orders"].insert_many(orders)
+    engine = OrderEngine(db)
+    with recorder.time(f"execute_fills[{n_fills}]"):
+        results = engine.execute_fills([(order, 100.0) for order in orders])
+    return sum(r["status"] == "filled" for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--fills", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    recorder = LatencyRecorder()
+    initial, matched = bench_matching(
+        args.orders, args.tickers, args.ticks, args.seed, recorder
+    )
+    with tempfile.TemporaryDirectory() as state_dir:
+        os.environ.setdefault(
+            "MOCKMARKET_SHARED_STATE_SQLITE_PATH", os.path.join(state_dir, "state.db")
+        )
+        filled = bench_fills(args.fills, args.seed, recorder)
+
+    print(
+        f"orders={args.orders} tickers={args.tickers} ticks={args.ticks} "
+        f"initially_triggered={initial} matched={matched} filled={filled}/{args.fills}"
+    )
+    print(recorder.report())
+
+
+if __name__ == "__main__":
+    main()
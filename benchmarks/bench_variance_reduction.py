@@ -0,0 +1,96 @@
+"""Precision-per-path benchmark for the Monte Carlo sampling methods.
+
+For each method, the single-ticker estimators are recomputed over many
+independent seeds. The spread of those estimates is the true standard error,
+and the number of plain paths needed to match it is::
+
+    n_plain_equivalent = n_sims * (se_plain / se_method) ** 2
+
+Antithetic pairs make the terminal distribution symmetric by construction,
+so their median (and, with little drift, P(profit)) barely moves between
+seeds. That is an artifact of the pairing rather than extra precision, and
+for antithetic variates the equivalence is only reported for the mean.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_variance_reduction --sims 2000 --replicates 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from simulation import SAMPLING_METHODS, simulate_gbm_paths, summarize_terminal
+
+# A typical large-cap: ~8% annual drift, ~30% annual volatility
+LAST_PRICE = 100.0
+MU = 0.0003
+SIGMA = 0.019
+
+# Statistics each method's pairing makes (nearly) constant across seeds
+SYMMETRIC_ONLY = {"antithetic": {"p50", "prob_profit"}}
+
+
+def replicate_estimates(
+    method: str, n_sims: int, n_days: int, replicates: int
+) -> tuple[dict[str, np.ndarray], float]:
+    """Median, mean and P(profit) estimates for ``replicates`` seeds, plus
+    ms/run."""
+    estimates = {"p50": [], "mean": [], "prob_profit": []}
+    start = time.perf_counter()
+    for seed in range(replicates):
+        paths = simulate_gbm_paths(
+            LAST_PRICE, MU, SIGMA, n_days, n_sims, seed=1000 + seed, method=method
+        )
+        summary = summarize_terminal(
+            paths, LAST_PRICE, method, LAST_PRICE * np.exp(MU * n_days)
+        )
+        for key in estimates:
+            estimates[key].append(summary[key][0])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / replicates
+    return {k: np.asarray(v) for k, v in estimates.items()}, elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sims", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=126)
+    parser.add_argument("--replicates", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {
+        method: replicate_estimates(method, args.sims, args.days, args.replicates)
+        for method in SAMPLING_METHODS
+    }
+    baseline = {k: v.std(ddof=1) for k, v in results["plain"][0].items()}
+
+    print(f"sims={args.sims} days={args.days} replicates={args.replicates}")
+    print(
+        f"{'method':<22}{'ms/run':>10}{'SE median':>12}{'plain-eq':>10}"
+        f"{'SE mean':>10}{'plain-eq':>10}{'SE P(profit)':>14}{'plain-eq':>10}"
+    )
+    for method, (estimates, ms) in results.items():
+        se = {k: v.std(ddof=1) for k, v in estimates.items()}
+        equivalent = {}
+        for k in se:
+            if k in SYMMETRIC_ONLY.get(method, ()):
+                equivalent[k] = "n/a*"
+            elif se[k] > 0:
+                equivalent[k] = f"{args.sims * (baseline[k] / se[k]) ** 2:.3g}"
+            else:
+                equivalent[k] = "inf"
+        print(
+            f"{method:<22}{ms:>10.1f}"
+            f"{se['p50']:>12.4f}{equivalent['p50']:>10}"
+            f"{se['mean']:>10.4f}{equivalent['mean']:>10}"
+            f"{se['prob_profit']:>14.5f}{equivalent['prob_profit']:>10}"
+        )
+    print(
+        "* antithetic pairs are symmetric by construction, so their median and "
+        "P(profit) spreads say nothing about precision"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Load test driving the real Streamlit pages with concurrent virtual users.
+
+Each virtual user is a headless Streamlit session (``AppTest``) that logs in
+through the login form, lands on the dashboard, buys and sells through the
+confirmation dialogs and opens the leaderboard, ``--iterations`` times.
+``--processes`` worker processes make the concurrent load, each serving
+its share of ``--users`` by interleaving their sessions (AppTest sessions
+are not thread-safe, so one process drives one rerun at a time)::
+
+    python -m benchmarks.load_test --users 20 --processes 4
+    python -m benchmarks.load_test --users 20 --json before.json
+
+Market data is replayed from synthetic series and sessions go through a
+temporary SQLite shared store. Mongo is mongomock, private to each process,
+unless ``MOCKMARKET_MONGODB_URI`` points at a local mongod (then all
+processes share its ``mockmarket_bench`` database). Everything random is derived from ``--seed``, so two
+runs with the same arguments do the same work; compare them with ``--json``.
+
+Reported: throughput (flows and page renders per second of wall time),
+p50/p95/p99 latency per page action, and CPU seconds and RSS per process.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from multiprocessing import get_context
+
+from benchmarks.bench_database import BENCH_TICKERS, configure_environment
+from benchmarks.timing import LatencyRecorder
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "load-test-password"
+# Generous: the first render in a process also imports and warms caches
+RUN_TIMEOUT = 120
+
+
+def app_router(repo_root: str):
+    """Script each virtual user runs: login until logged in, then the page
+    named in session state (what main.py's navigation does)."""
+    import os
+    import runpy
+    import sys
+
+    import streamlit as st
+
+    sys.path.insert(0, repo_root)
+    if st.session_state.get("logged_in"):
+        page = st.session_state.get("load_test_page", "pages/dashboard.py")
+    else:
+        page = "pages/login.py"
+    runpy.run_path(os.path.join(repo_root, page), run_name="__main__")
+
+
+def _widget(elements, label: str):
+    return next(element for element in elements if element.label == label)
+
+
+class VirtualUser:
+    """One scripted browser session."""
+
+    def __init__(self, username: str, seed: int, recorder: LatencyRecorder):
+        from streamlit.testing.v1 import AppTest
+
+        self.username = username
+        self.rng = random.Random(seed)
+        self.recorder = recorder
+        self.errors = 0
+        self.renders = 0
+        self.app = AppTest.from_function(
+            app_router, args=(REPO_ROOT,), default_timeout=RUN_TIMEOUT
+        )
+
+    def _run(self, action: str, *clicks):
+        """Click ``clicks`` (all in the same rerun) and time the rerun."""
+        for button in clicks:
+            button.click()
+        with self.recorder.time(action):
+            self.app.run()
+        self.renders += 1
+        if self.app.exception:
+            self.errors += 1
+
+    def _open(self, page: str, action: str):
+        self.app.session_state["load_test_page"] = page
+        self._run(action)
+
+    def login(self):
+        self._run("login_page")
+        _widget(self.app.text_input, "Username").input(self.username)
+        _widget(self.app.text_input, "Password").input(PASSWORD)
+        # Submitting reruns straight into the dashboard
+        self._run("login_submit", _widget(self.app.button, "Log In"))
+
+    def buy(self):
+        ticker = _widget(self.app.selectbox, "Select Stock to Buy")
+        ticker.select(self.rng.choice(ticker.options))
+        _widget(self.app.number_input, "Enter Quantity to Buy").set_value(
+            self.rng.randint(1, 5)
+        )
+        self._run("buy_dialog", _widget(self.app.button, "Buy"))
+        # A dialog only exists while its opener is pressed, so confirming
+        # re-presses Buy in the same rerun, as the browser's dialog state does
+        self._run(
+            "buy_confirm",
+            _widget(self.app.button, "Buy"),
+            _widget(self.app.button, "✅ Confirm Purchase"),
+        )
+
+    def sell(self):
+        sells = [b for b in self.app.button if b.label == "Sell"]
+        if not sells:
+            return
+        self._run("sell_dialog", sells[0])
+        self._run(
+            "sell_confirm",
+            _widget(self.app.button, "Sell"),
+            _widget(self.app.button, "✅ Confirm Sale"),
+        )
+
+    def flow(self):
+        """dashboard → buy → sell → leaderboard"""
+        self._open("pages/dashboard.py", "dashboard")
+        self.buy()
+        self.sell()
+        self._open("pages/leaderboard.py", "leaderboard")
+
+
+def _usage() -> dict:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    with open("/proc/self/statm") as f:
+        rss_pages = int(f.read().split()[1])
+    return {
+        "cpu_s": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "rss_mb": rss_pages * os.sysconf("SC_PAGE_SIZE") / 2**20,
+    }
+
+
+def run_worker(
+    worker: int, usernames: list, iterations: int, seed: int, barrier
+) -> dict:
+    """Serve ``usernames`` from one process; returns samples and resource use."""
+    import database
+
+    for username in usernames:
+        database.create_user(username, PASSWORD)
+        database.create_wallet(username, initial_funds=100_000)
+
+    # Untimed warm-up session: imports, caches and the first data loads
+    warmup = f"load_warmup_{worker}"
+    database.create_user(warmup, PASSWORD)
+    database.create_wallet(warmup, initial_funds=100_000)
+    user = VirtualUser(warmup, seed, LatencyRecorder())
+    user.login()
+    user.flow()
+
+    recorder = LatencyRecorder()
+    users = [
+        VirtualUser(username, seed * 100_003 + index, recorder)
+        for index, username in enumerate(usernames)
+    ]
+
+    barrier.wait()
+    before = _usage()
+    start = time.perf_counter()
+    for user in users:
+        user.login()
+    # Round-robin, so every session stays open for the whole run
+    for _ in range(iterations):
+        for user in users:
+            user.flow()
+    elapsed = time.perf_counter() - start
+    after = _usage()
+
+    return {
+        "worker": worker,
+        "pid": os.getpid(),
+        "users": len(usernames),
+        "seconds": elapsed,
+        "cpu_s": after["cpu_s"] - before["cpu_s"],
+        "peak_rss_mb": after["peak_rss_mb"],
+        "rss_mb": after["rss_mb"],
+        "samples": recorder.samples,
+        "flows": iterations * len(users),
+        "renders": sum(user.renders for user in users),
+        "errors": sum(user.errors for user in users),
+    }
+
+
+def _worker_entry(args):
+    return run_worker(*args)
+
+
+def run(n_users: int, n_processes: int, iterations: int, seed: int) -> dict:
+    from market_data import generate_replay_data
+    from mongo_connection import get_mongodb_uri
+
+    if get_mongodb_uri().startswith("mongodb+srv://"):
+        raise SystemExit("Refusing to load-test (and write to) a remote Atlas cluster.")
+    generate_replay_data(
+        BENCH_TICKERS, os.environ["MOCKMARKET_MARKET_DATA_REPLAY_DIR"], seed=seed
+    )
+
+    usernames = [f"load_user_{seed}_{i}" for i in range(n_users)]
+    shards = [usernames[i::n_processes] for i in range(n_processes)]
+    context = get_context("spawn")
+    manager = context.Manager()
+    barrier = manager.Barrier(n_processes + 1)
+    with context.Pool(n_processes) as pool:
+        pending = pool.map_async(
+            _worker_entry,
+            [
+                (worker, shard, iterations, seed, barrier)
+                for worker, shard in enumerate(shards)
+            ],
+        )
+        # Wall time starts once every process has logged in its warm-up user
+        barrier.wait()
+        start = time.perf_counter()
+        workers = pending.get()
+        wall = time.perf_counter() - start
+    manager.shutdown()
+
+    recorder = LatencyRecorder()
+    for result in workers:
+        for action, values in result.pop("samples").items():
+            recorder.samples.setdefault(action, []).extend(values)
+    flows = sum(w["flows"] for w in workers)
+    renders = sum(w["renders"] for w in workers)
+    return {
+        "config": {
+            "users": n_users,
+            "processes": n_processes,
+            "iterations": iterations,
+            "seed": seed,
+            "mongodb": get_mongodb_uri().split("://")[0],
+        },
+        "wall_seconds": wall,
+        "flows": flows,
+        "renders": renders,
+        "errors": sum(w["errors"] for w in workers),
+        "flows_per_sec": flows / wall,
+        "renders_per_sec": renders / wall,
+        "latency": recorder.summary(),
+        "processes": workers,
+    }
+
+
+def format_report(result: dict) -> str:
+    config = result["config"]
+    lines = [
+        " ".join(f"{key}={value}" for key, value in config.items()),
+        f"wall={result['wall_seconds']:.1f}s flows={result['flows']} "
+        f"renders={result['renders']} errors={result['errors']}",
+        f"throughput: {result['flows_per_sec']:.2f} flows/s, "
+        f"{result['renders_per_sec']:.2f} renders/s",
+        "",
+        f"{'action':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for row in result["latency"]:
+        lines.append(
+            f"{row['operation']:<16}{row['count']:>8}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+    lines += [
+        "",
+        f"{'process':<10}{'users':>8}{'cpu s':>10}{'cpu %':>8}{'rss MB':>10}{'peak MB':>10}",
+    ]
+    for w in result["processes"]:
+        lines.append(
+            f"{w['pid']:<10}{w['users']:>8}{w['cpu_s']:>10.1f}"
+            f"{100 * w['cpu_s'] / w['seconds']:>8.0f}"
+            f"{w['rss_mb']:>10.0f}{w['peak_rss_mb']:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=3, help="Flows per user after login")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the full result to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(os.path.join(workdir, "replay"))
+        # Background workers would compete with the sessions being measured
+        os.environ["MOCKMARKET_ALERTS_WORKER"] = "0"
+        result = run(args.users, args.processes, args.iterations, args.seed)
+
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
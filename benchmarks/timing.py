@@ -0,0 +1,53 @@
+"""Shared latency bookkeeping for the benchmark scripts."""
+
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class LatencyRecorder:
+    """Collect wall-clock samples per operation and summarise them."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    @contextmanager
+    def time(self, operation: str):
+        """Time the enclosed block and store the sample under ``operation``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.samples.setdefault(operation, []).append(elapsed_ms)
+
+    def summary(self) -> list[dict]:
+        """Return one row per operation with count, p50, p95, p99 and ops/sec."""
+        rows = []
+        for operation, values in self.samples.items():
+            arr = np.asarray(values)
+            rows.append(
+                {
+                    "operation": operation,
+                    "count": len(arr),
+                    "p50_ms": float(np.percentile(arr, 50)),
+                    "p95_ms": float(np.percentile(arr, 95)),
+                    "p99_ms": float(np.percentile(arr, 99)),
+                    "ops_per_sec": len(arr) / (arr.sum() / 1000) if arr.sum() else 0.0,
+                }
+            )
+        return rows
+
+    def report(self) -> str:
+        """Format ``summary()`` as a fixed-width table."""
+        lines = [
+            f"{'operation':<28}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>12}"
+        ]
+        for row in self.summary():
+            lines.append(
+                f"{row['operation']:<28}{row['count']:>8}"
+                f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+                f"{row['ops_per_sec']:>12.1f}"
+            )
+        return "\n".join(lines)
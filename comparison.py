@@ -0,0 +1,139 @@
+"""Rebased price comparisons for any ticker subset and horizon.
+
+Each ticker's full ("max") close history is fetched once and stored as a
+cumulative log-return series. Any horizon is then a binary search for the
+window start plus ``exp(cumlog - cumlog[start])``, so switching tickers or
+horizons never refetches or renormalizes a whole frame.
+"""
+
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from downsample import downsample_frame
+from market_data import PERIOD_OFFSETS
+from ticker import load_stock_data
+
+
+def _cumulative_log_returns(closes: pd.DataFrame, ticker: str) -> tuple:
+    """Return (dates, cumulative log return) arrays for one close column."""
+    if ticker not in closes:
+        return np.array([], dtype="datetime64[ns]"), np.array([], dtype=float)
+    series = closes[ticker].dropna()
+    series = series[series > 0]
+    index = pd.DatetimeIndex(series.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    cumlog = np.log(series.to_numpy(dtype=float))
+    if len(cumlog):
+        cumlog -= cumlog[0]
+    return index.to_numpy("datetime64[ns]"), cumlog
+
+
+class ComparisonEngine:
+    """Per-process store of cumulative log-return series keyed by ticker."""
+
+    def __init__(
+        self,
+        fetch_closes: Callable[[list], pd.DataFrame],
+        ttl_seconds: float = 3600,
+    ):
+        self.fetch_closes = fetch_closes
+        self.ttl_seconds = ttl_seconds
+        # ticker -> (fetched_at, dates as datetime64[ns], cumulative log return)
+        self._series: dict[str, tuple[float, np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, ticker: str, now: float) -> bool:
+        entry = self._series.get(ticker)
+        return entry is not None and now - entry[0] < self.ttl_seconds
+
+    def ensure(self, tickers: list):
+        """Fetch, in one batch, every ticker that is missing or stale."""
+        now = time.time()
+        missing = [t for t in tickers if not self._is_fresh(t, now)]
+        if not missing:
+            return
+
+        closes = self.fetch_closes(missing)
+        with self._lock:
+            for ticker in missing:
+                self._series[ticker] = (now, *_cumulative_log_returns(closes, ticker))
+
+    def invalid_tickers(self, tickers: list) -> list:
+        """Tickers with no price history at all."""
+        return [t for t in tickers if len(self._series[t][2]) == 0]
+
+    def window_start(self, tickers: list, period: str) -> np.datetime64 | None:
+        """First date inside ``period``, measured back from the latest bar."""
+        if period not in PERIOD_OFFSETS and period != "ytd":
+            return None
+        last = max(self._series[t][1][-1] for t in tickers)
+        last = pd.Timestamp(last)
+        if period == "ytd":
+            return np.datetime64(pd.Timestamp(year=last.year, month=1, day=1), "ns")
+        return np.datetime64(last - PERIOD_OFFSETS[period], "ns")
+
+    def history(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        """(dates, price relative to the first bar) over the full history."""
+        _, dates, cumlog = self._series[ticker]
+        return dates, np.exp(cumlog)
+
+    def _window(self, ticker: str, start: np.datetime64 | None):
+        _, dates, cumlog = self._series[ticker]
+        i = 0 if start is None else int(np.searchsorted(dates, start, side="right"))
+        return dates[i:], cumlog[i:]
+
+    def rebased(self, tickers: list, period: str) -> pd.DataFrame:
+        """Prices rebased to 1 at each ticker's first bar inside the horizon.
+
+        Returns a wide frame indexed by Date with one column per ticker.
+        """
+        start = self.window_start(tickers, period)
+        columns = {}
+        for ticker in tickers:
+            dates, cumlog = self._window(ticker, start)
+            values = np.exp(cumlog - cumlog[0]) if len(cumlog) else cumlog
+            columns[ticker] = pd.Series(values, index=pd.DatetimeIndex(dates))
+        frame = pd.DataFrame(columns)
+        frame.index.name = "Date"
+        return frame
+
+    def performance(self, tickers: list, period: str) -> tuple:
+        """Return ((value, ticker) best, (value, ticker) worst) over the horizon."""
+        start = self.window_start(tickers, period)
+        latest = []
+        for ticker in tickers:
+            _, cumlog = self._window(ticker, start)
+            if len(cumlog):
+                latest.append((float(np.exp(cumlog[-1] - cumlog[0])), ticker))
+        return max(latest), min(latest)
+
+
+@st.cache_resource
+def get_comparison_engine() -> ComparisonEngine:
+    """Return the process-wide comparison engine."""
+    return ComparisonEngine(lambda tickers: load_stock_data(tickers, "max"))
+
+
+@st.cache_data(show_spinner=False, ttl="1h")
+def get_chart_frame(tickers: tuple, period: str, raw: bool = False) -> pd.DataFrame:
+    """Long-form (Date, Stock, Normalized price) frame for the comparison chart.
+
+    Each line is LTTB-downsampled to about the chart width unless ``raw``.
+    """
+    engine = get_comparison_engine()
+    engine.ensure(list(tickers))
+    chart_data = (
+        engine.rebased(list(tickers), period)
+        .reset_index()
+        .melt(id_vars=["Date"], var_name="Stock", value_name="Normalized price")
+        .dropna()
+    )
+    if raw:
+        return chart_data
+    return downsample_frame(chart_data, "Date", "Normalized price", by="Stock")
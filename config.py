@@ -0,0 +1,37 @@
+"""Runtime settings shared by the app, benchmarks and offline tooling."""
+
+import os
+
+import streamlit as st
+
+
+def get_setting(section: str, key: str, default=None):
+    """Look up a setting by section and key.
+
+    Environment variables named ``MOCKMARKET_<SECTION>_<KEY>`` win over
+    ``st.secrets[section][key]`` so scripts running outside Streamlit (and
+    load tests) can override anything without touching secrets.toml.
+
+    Args:
+        section: Secrets section, e.g. "market_data"
+        key: Key inside the section, e.g. "PROVIDER"
+        default: Value returned when the setting is not configured
+
+    Returns:
+        The configured value (strings when read from the environment)
+    """
+    env_name = f"MOCKMARKET_{section}_{key}".upper()
+    if env_name in os.environ:
+        return os.environ[env_name]
+    try:
+        return st.secrets[section][key]
+    except (KeyError, FileNotFoundError):
+        return default
+
+
+def get_bool_setting(section: str, key: str, default: bool = False) -> bool:
+    """Like ``get_setting`` but coerces "1"/"true"/"yes"/"on" to True."""
+    value = get_setting(section, key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
@@ -0,0 +1,104 @@
+"""Server-side downsampling for line charts.
+
+Charts can't show more points than they have pixels, so long price histories
+are thinned to roughly the chart width before being serialised to the
+browser. Two strategies are available:
+
+- "lttb": Largest-Triangle-Three-Buckets, keeps the visual shape of the line
+- "minmax": keeps each bucket's extremes, so no spike is ever dropped
+"""
+
+import numpy as np
+import pandas as pd
+
+# About the pixel width of a full-width chart
+DEFAULT_TARGET_POINTS = 800
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        # Average of the next bucket is the third triangle vertex
+        avg_start = int(np.floor((i + 1) * bucket_size)) + 1
+        avg_end = min(int(np.floor((i + 2) * bucket_size)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        range_start = int(np.floor(i * bucket_size)) + 1
+        range_end = int(np.floor((i + 1) * bucket_size)) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of each bucket's minimum and maximum (plus both endpoints)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    n_buckets = (n_out - 2) // 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    picked = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            bucket = y[lo:hi]
+            picked.append(lo + int(np.argmin(bucket)))
+            picked.append(lo + int(np.argmax(bucket)))
+    return np.unique(picked)
+
+
+def downsample_indices(
+    x, y, n_out: int = DEFAULT_TARGET_POINTS, method: str = "lttb"
+) -> np.ndarray:
+    """Dispatch to ``lttb_indices`` or ``minmax_indices``.
+
+    ``x`` may be datetimes; they are compared as int64 nanoseconds.
+    """
+    y = np.asarray(y, dtype=float)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    if method == "lttb":
+        x = np.asarray(x)
+        if np.issubdtype(x.dtype, np.datetime64):
+            x = x.astype("datetime64[ns]").astype(np.int64)
+        return lttb_indices(x.astype(float), y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def downsample_frame(
+    frame: pd.DataFrame,
+    x: str,
+    y: str,
+    by: str | None = None,
+    n_out: int = DEFAULT_TARGET_POINTS,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """Downsample a long-form frame, one line per ``by`` group.
+
+    Rows must already be sorted by ``x`` within each group; NaN ``y`` values
+    are dropped first.
+    """
+    frame = frame.dropna(subset=[y])
+    if by is None:
+        keep = downsample_indices(frame[x].to_numpy(), frame[y].to_numpy(), n_out, method)
+        return frame.iloc[keep]
+
+    parts = []
+    for _, group in frame.groupby(by, sort=False):
+        keep = downsample_indices(group[x].to_numpy(), group[y].to_numpy(), n_out, method)
+        parts.append(group.iloc[keep])
+    return pd.concat(parts) if parts else frame
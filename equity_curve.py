@@ -0,0 +1,262 @@
+"""Daily job computing every user's historical net worth in bulk.
+
+Run it once a day (e.g. from cron)::
+
+    python -m equity_curve
+
+Holdings are rebuilt from the trade ledger (plus any lots bought before the
+ledger existed), laid out as a users x days x tickers tensor, and valued
+against cached close prices with a single ``einsum``. Cash is anchored to the
+current wallet balance and walked back through each trade's cash flow.
+
+Results are stored compactly: one calendar per run in ``equity_curve_runs``
+and one float32 blob per user in ``equity_curves``.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bson.binary import Binary
+
+from market_data import PERIOD_OFFSETS
+from mongo_connection import get_collection
+from ticker import load_stock_data
+
+# Upper bound on the size of one users x days x tickers holdings block
+HOLDINGS_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _period_covering(start: pd.Timestamp) -> str:
+    """Smallest yfinance period reaching back to ``start``."""
+    today = pd.Timestamp.today().normalize()
+    for period, offset in PERIOD_OFFSETS.items():
+        if today - offset <= start:
+            return period
+    return "max"
+
+
+def load_equity_inputs() -> tuple[pd.DataFrame, dict[str, float]]:
+    """
+    Read every trade, lot, wallet and ledger seed snapshot in four queries.
+
+    Returns:
+        (trades, funds): trades has columns username, ticker, quantity
+        (signed, sells negative), price and executed_at; funds maps username
+        to current wallet balance.
+    """
+    trades = sorted(
+        get_collection("trades").find({}, {"_id": 0}),
+        key=lambda t: (t["username"], t["seq"]),
+    )
+    lots = list(get_collection("user_portfolio").find({}, {"_id": 0}))
+    funds = {
+        w["username"]: w["current_funds"] for w in get_collection("user_wallets").find()
+    }
+    # The snapshot written with each user's first ledger trade
+    seeds = {
+        snapshot["username"]: snapshot["state"]
+        for snapshot in get_collection("ledger_snapshots").find({"seq": 1})
+    }
+
+    rows = [
+        {
+            "username": t["username"],
+            "ticker": t["ticker"],
+            "quantity": t["quantity"] if t["side"] == "buy" else -t["quantity"],
+            "price": t["price"],
+            "executed_at": t["executed_at"],
+        }
+        for t in trades
+    ]
+    rows.extend(_pre_ledger_rows(trades, rows, lots, seeds))
+
+    columns = ["username", "ticker", "quantity", "price", "executed_at"]
+    return pd.DataFrame(rows, columns=columns), funds
+
+
+def _pre_ledger_rows(
+    trades: list[dict], rows: list[dict], lots: list[dict], seeds: dict[str, dict]
+) -> list[dict]:
+    """
+    Synthetic buys for shares held before the trade ledger existed.
+
+    A user's opening holding of a ticker comes from their ledger seed
+    snapshot when there is one, else from what the ledger can't explain of
+    their current lots. It is never less than the ledger needs to stay
+    non-negative, so pre-ledger shares that were later sold in full are
+    still accounted for. Each buy is dated at the oldest remaining lot, or
+    at the user's first ledger trade when none remain.
+    """
+    first_trade: dict[str, dict] = {}
+    ledger_net: dict[tuple, int] = {}
+    lowest: dict[tuple, int] = {}
+    first_sell: dict[tuple, dict] = {}
+    for trade, row in zip(trades, rows):
+        key = (row["username"], row["ticker"])
+        first_trade.setdefault(row["username"], trade)
+        ledger_net[key] = ledger_net.get(key, 0) + row["quantity"]
+        lowest[key] = min(lowest.get(key, 0), ledger_net[key])
+        if trade["side"] == "sell":
+            first_sell.setdefault(key, trade)
+
+    held: dict[tuple, list] = {}
+    for lot in lots:
+        held.setdefault((lot["username"], lot["stock_ticker"]), []).append(lot)
+
+    opening_from_seed: dict[tuple, int] = {}
+    for username, state in seeds.items():
+        trade = first_trade.get(username)
+        if trade is None:
+            continue
+        for position in state["lots"]:
+            key = (username, position["ticker"])
+            opening_from_seed[key] = sum(quantity for quantity, _ in position["lots"])
+        # The seed is taken after the first trade; undo it
+        key = (username, trade["ticker"])
+        signed = trade["quantity"] if trade["side"] == "buy" else -trade["quantity"]
+        opening_from_seed[key] = opening_from_seed.get(key, 0) - signed
+
+    extra = []
+    for key in set(held) | set(ledger_net):
+        username, ticker = key
+        user_lots = held.get(key, [])
+        if username in seeds and username in first_trade:
+            opening = opening_from_seed.get(key, 0)
+        else:
+            opening = sum(l["stock_quantity"] for l in user_lots) - ledger_net.get(key, 0)
+        opening = max(opening, -lowest.get(key, 0))
+        if opening <= 0:
+            continue
+        if user_lots:
+            oldest = min(user_lots, key=lambda l: l["bought_at"])
+            price, executed_at = oldest["stock_price"], oldest["bought_at"]
+        else:
+            trade = first_sell.get(key) or first_trade[username]
+            # A sell's stored cost basis is what the pre-ledger shares cost
+            if trade["side"] == "sell" and "cost_basis" in trade:
+                price = trade["cost_basis"] / trade["quantity"]
+            else:
+                price = trade["price"]
+            executed_at = first_trade[username]["executed_at"]
+        extra.append(
+            {
+                "username": username,
+                "ticker": ticker,
+                "quantity": opening,
+                "price": price,
+                "executed_at": executed_at,
+            }
+        )
+    return extra
+
+
+def compute_equity_curves(
+    trades: pd.DataFrame,
+    closes: pd.DataFrame,
+    funds: dict[str, float],
+) -> tuple[pd.DatetimeIndex, list, np.ndarray]:
+    """
+    Value every user's holdings and cash on every day of ``closes``.
+
+    Returns:
+        (dates, usernames, values) with values shaped (users, days)
+    """
+    dates = pd.DatetimeIndex(closes.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    usernames = sorted(set(funds) | set(trades["username"]))
+    tickers = list(closes.columns)
+    n_users, n_days, n_tickers = len(usernames), len(dates), len(tickers)
+
+    prices = closes.ffill().bfill().fillna(0.0).to_numpy(dtype=float)
+
+    user_idx = pd.Index(usernames).get_indexer(trades["username"])
+    ticker_idx = pd.Index(tickers).get_indexer(trades["ticker"])
+    # First trading day on/after the trade; n_days means "after the window"
+    day_idx = dates.searchsorted(
+        pd.to_datetime(trades["executed_at"]).dt.normalize(), side="left"
+    )
+    quantity = trades["quantity"].to_numpy(dtype=float)
+    cash_flow = -quantity * trades["price"].to_numpy(dtype=float)
+
+    # cash(d) = current funds - cash flows of every trade after day d
+    flows = np.zeros((n_users, n_days + 1))
+    np.add.at(flows, (user_idx, day_idx), cash_flow)
+    flows_after = flows.sum(axis=1, keepdims=True) - np.cumsum(flows, axis=1)
+    current = np.array([funds.get(u, 0.0) for u in usernames])[:, None]
+    values = current - flows_after[:, :n_days]
+
+    valid = ticker_idx >= 0
+    block = max(1, HOLDINGS_BLOCK_BYTES // max(1, (n_days + 1) * n_tickers * 8))
+    for lo in range(0, n_users, block):
+        hi = min(lo + block, n_users)
+        in_block = valid & (user_idx >= lo) & (user_idx < hi)
+        deltas = np.zeros((hi - lo, n_days + 1, n_tickers))
+        np.add.at(
+            deltas,
+            (user_idx[in_block] - lo, day_idx[in_block], ticker_idx[in_block]),
+            quantity[in_block],
+        )
+        holdings = np.cumsum(deltas, axis=1)[:, :n_days]
+        values[lo:hi] += np.einsum("udt,dt->ud", holdings, prices)
+
+    return dates, usernames, values
+
+
+def run_equity_curve_job() -> int:
+    """
+    Recompute and store every user's equity curve.
+
+    Returns:
+        Number of users written
+    """
+    trades, funds = load_equity_inputs()
+    if trades.empty and not funds:
+        return 0
+
+    tickers = sorted(trades["ticker"].unique())
+    if tickers:
+        start = pd.to_datetime(trades["executed_at"]).min().normalize()
+        closes = load_stock_data(tickers, _period_covering(start))
+    else:
+        closes = pd.DataFrame(index=pd.DatetimeIndex([pd.Timestamp.today().normalize()]))
+
+    dates, usernames, values = compute_equity_curves(trades, closes, funds)
+
+    runs = get_collection("equity_curve_runs")
+    curves = get_collection("equity_curves")
+    run_id = runs.insert_one(
+        {"computed_at": datetime.now(), "dates": list(dates.to_pydatetime())}
+    ).inserted_id
+    curves.insert_many(
+        [
+            {
+                "username": username,
+                "run_id": run_id,
+                "values": Binary(values[i].astype(np.float32).tobytes()),
+            }
+            for i, username in enumerate(usernames)
+        ]
+    )
+    curves.delete_many({"run_id": {"$ne": run_id}})
+    runs.delete_many({"_id": {"$ne": run_id}})
+    return len(usernames)
+
+
+def get_equity_curve(username: str) -> pd.Series | None:
+    """Latest stored net-worth series for a user, or None if not computed."""
+    curve = get_collection("equity_curves").find_one(
+        {"username": username}, sort=[("_id", -1)]
+    )
+    if curve is None:
+        return None
+    run = get_collection("equity_curve_runs").find_one({"_id": curve["run_id"]})
+    if run is None:
+        return None
+    values = np.frombuffer(curve["values"], dtype=np.float32)
+    return pd.Series(values, index=pd.DatetimeIndex(run["dates"]), name="Net worth")
+
+
+if __name__ == "__main__":
+    print(f"Computed equity curves for {run_equity_curve_job()} users.")
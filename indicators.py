@@ -0,0 +1,311 @@
+"""Technical indicators computed incrementally over cached price histories.
+
+Results are stored per (ticker, indicator, params). When a ticker's history
+grows (the comparison engine refetches it after its TTL), only the new bars
+are fed through the indicator together with a small carried state:
+
+- windowed indicators (SMA, Bollinger bands, volatility) keep the last
+  ``window`` inputs and recompute just the new tail from them
+- recursive ones (EMA, RSI, drawdown) keep their last smoothed value(s)
+
+A history that changed anywhere but the tail (e.g. a split adjustment) is
+recomputed from scratch.
+
+Inputs are prices relative to each ticker's first bar, as stored by the
+comparison engine. Price-like outputs are rescaled to the chart's rebased
+prices; the rest (RSI, volatility, drawdown) are scale-free and drawn in
+their own panels.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from comparison import get_comparison_engine
+from downsample import downsample_frame
+from profiler import count
+
+TRADING_DAYS = 252
+
+
+def _rolling(values: np.ndarray, window: int, func) -> np.ndarray:
+    """``func`` over each trailing window (axis=1 of the window view); NaN
+    until the first full window."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1 :] = func(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def _ewm(values: np.ndarray, alpha: float, previous: float | None) -> np.ndarray:
+    """y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with the first input
+    (pandas ``ewm(adjust=False)``) unless continuing from ``previous``."""
+    if previous is None:
+        previous = values[0]
+    return lfilter([alpha], [1, alpha - 1], values, zi=[(1 - alpha) * previous])[0]
+
+
+class Indicator:
+    """Interface every indicator implements.
+
+    ``update`` consumes only bars it hasn't seen, given the state returned by
+    the previous call (None on the first), and returns one array per output
+    line, each as long as ``values``.
+    """
+
+    name = "base"
+    label = "Base"
+    # True if outputs are prices (drawn over the price lines)
+    overlay = True
+    params: dict = {}
+
+    def outputs(self, params: dict) -> list[str]:
+        raise NotImplementedError
+
+    def update(
+        self, values: np.ndarray, params: dict, state
+    ) -> tuple[dict[str, np.ndarray], object]:
+        raise NotImplementedError
+
+
+class WindowedIndicator(Indicator):
+    """Indicator of the trailing ``window`` inputs only; the state is the last
+    ``window - 1`` inputs (``window`` for return-based ones)."""
+
+    def carry(self, params: dict) -> int:
+        return params["window"] - 1
+
+    def compute(self, values: np.ndarray, params: dict) -> dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def update(self, values, params, state):
+        tail = state if state is not None else values[:0]
+        full = np.concatenate([tail, values])
+        outputs = {
+            name: line[len(tail) :] for name, line in self.compute(full, params).items()
+        }
+        return outputs, full[max(len(full) - self.carry(params), 0) :]
+
+
+class SMA(WindowedIndicator):
+    name = "sma"
+    label = "SMA"
+    params = {"window": 50}
+
+    def outputs(self, params):
+        return [f"SMA {params['window']}"]
+
+    def compute(self, values, params):
+        return {self.outputs(params)[0]: _rolling(values, params["window"], np.mean)}
+
+
+class Bollinger(WindowedIndicator):
+    name = "bollinger"
+    label = "Bollinger bands"
+    params = {"window": 20, "k": 2.0}
+
+    def outputs(self, params):
+        return [f"BB {params['window']} upper", f"BB {params['window']} lower"]
+
+    def compute(self, values, params):
+        mean = _rolling(values, params["window"], np.mean)
+        std = _rolling(values, params["window"], np.std)
+        upper, lower = self.outputs(params)
+        return {upper: mean + params["k"] * std, lower: mean - params["k"] * std}
+
+
+class Volatility(WindowedIndicator):
+    name = "volatility"
+    label = "Volatility"
+    overlay = False
+    params = {"window": 21}
+
+    def outputs(self, params):
+        return [f"Volatility {params['window']}d (%)"]
+
+    def carry(self, params):
+        # window returns need window + 1 prices
+        return params["window"]
+
+    def compute(self, values, params):
+        returns = np.full(len(values), np.nan)
+        returns[1:] = np.diff(np.log(values))
+        vol = _rolling(returns, params["window"], lambda w, axis: w.std(axis=axis, ddof=1))
+        return {self.outputs(params)[0]: vol * np.sqrt(TRADING_DAYS) * 100}
+
+
+class EMA(Indicator):
+    name = "ema"
+    label = "EMA"
+    params = {"span": 20}
+
+    def outputs(self, params):
+        return [f"EMA {params['span']}"]
+
+    def update(self, values, params, state):
+        ema = _ewm(values, 2 / (params["span"] + 1), state)
+        return {self.outputs(params)[0]: ema}, float(ema[-1])
+
+
+class RSI(Indicator):
+    """Wilder's RSI; the state is (last price, avg gain, avg loss, bars seen)."""
+
+    name = "rsi"
+    label = "RSI"
+    overlay = False
+    params = {"period": 14}
+
+    def outputs(self, params):
+        return [f"RSI {params['period']}"]
+
+    def update(self, values, params, state):
+        period = params["period"]
+        if state is None:
+            previous, avg_gain, avg_loss, seen = values[0], None, None, 0
+        else:
+            previous, avg_gain, avg_loss, seen = state
+        change = np.diff(np.concatenate([[previous], values]))
+        gains = _ewm(np.maximum(change, 0), 1 / period, avg_gain)
+        losses = _ewm(np.maximum(-change, 0), 1 / period, avg_loss)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + gains / losses)
+        rsi[losses == 0] = 100.0
+        # Not meaningful until a full period of changes has been smoothed
+        rsi[: max(period - seen, 0)] = np.nan
+        state = (float(values[-1]), float(gains[-1]), float(losses[-1]), seen + len(values))
+        return {self.outputs(params)[0]: rsi}, state
+
+
+class Drawdown(Indicator):
+    name = "drawdown"
+    label = "Drawdown"
+    overlay = False
+    params = {}
+
+    def outputs(self, params):
+        return ["Drawdown (%)"]
+
+    def update(self, values, params, state):
+        peak = np.maximum.accumulate(values)
+        if state is not None:
+            peak = np.maximum(peak, state)
+        return {self.outputs(params)[0]: (values / peak - 1) * 100}, float(peak[-1])
+
+
+INDICATORS = {
+    indicator.name: indicator
+    for indicator in (SMA(), EMA(), Bollinger(), RSI(), Volatility(), Drawdown())
+}
+
+
+class IndicatorEngine:
+    """Per-process store of indicator lines keyed by (ticker, indicator, params)."""
+
+    def __init__(self):
+        # key -> (dates, last input, {output: values}, state)
+        self._entries: dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def compute(
+        self,
+        ticker: str,
+        dates: np.ndarray,
+        values: np.ndarray,
+        indicator: str,
+        params: dict | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Indicator lines aligned with ``dates``, updating only new bars."""
+        kernel = INDICATORS[indicator]
+        params = {**kernel.params, **(params or {})}
+        key = (ticker, indicator, tuple(sorted(params.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            old_dates, last_value, lines, state = entry
+            n = len(old_dates)
+            if n == len(dates) and dates[-1] == old_dates[-1]:
+                return lines
+            # Same bars so far, plus new ones: only the tail is computed
+            if (
+                0 < n < len(dates)
+                and dates[n - 1] == old_dates[-1]
+                and np.isclose(values[n - 1], last_value)
+            ):
+                count("indicator_tail_updates")
+                new_lines, state = kernel.update(values[n:], params, state)
+                lines = {
+                    name: np.concatenate([line, new_lines[name]])
+                    for name, line in lines.items()
+                }
+                with self._lock:
+                    self._entries[key] = (dates, values[-1], lines, state)
+                return lines
+
+        count("indicator_full_computes")
+        lines, state = kernel.update(values, params, None)
+        with self._lock:
+            self._entries[key] = (dates, values[-1], lines, state)
+        return lines
+
+
+@st.cache_resource
+def get_indicator_engine() -> IndicatorEngine:
+    """Return the process-wide indicator store."""
+    return IndicatorEngine()
+
+
+@st.cache_data(show_spinner=False, ttl="1h")
+def get_indicator_frame(
+    tickers: tuple, period: str, indicators: tuple, raw: bool = False
+) -> pd.DataFrame:
+    """Long-form (Date, Stock, Indicator, Panel, Value) frame for the comparison
+    chart's indicator layers.
+
+    ``Panel`` is "price" for lines drawn over the rebased prices and the
+    indicator's label otherwise. Each line is downsampled unless ``raw``.
+    """
+    comparison = get_comparison_engine()
+    comparison.ensure(list(tickers))
+    start = comparison.window_start(list(tickers), period)
+    engine = get_indicator_engine()
+
+    frames = []
+    for ticker in tickers:
+        dates, values = comparison.history(ticker)
+        if not len(values):
+            continue
+        i = 0 if start is None else int(np.searchsorted(dates, start, side="right"))
+        if i >= len(values):
+            continue
+        for name in indicators:
+            kernel = INDICATORS[name]
+            lines = engine.compute(ticker, dates, values, name)
+            for output, line in lines.items():
+                line = line[i:]
+                if kernel.overlay:
+                    # Match the chart, which rebases prices to 1 at the window start
+                    line = line / values[i]
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "Date": pd.DatetimeIndex(dates[i:]),
+                            "Stock": ticker,
+                            "Indicator": output,
+                            "Panel": "price" if kernel.overlay else kernel.label,
+                            "Value": line,
+                        }
+                    )
+                )
+
+    if not frames:
+        return pd.DataFrame(columns=["Date", "Stock", "Indicator", "Panel", "Value"])
+    frame = pd.concat(frames, ignore_index=True).dropna(subset=["Value"])
+    if raw:
+        return frame
+    frame["Line"] = frame["Stock"] + " " + frame["Indicator"]
+    return downsample_frame(frame, "Date", "Value", by="Line").drop(columns="Line")
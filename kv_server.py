@@ -0,0 +1,116 @@
+"""Minimal Redis-compatible key-value server for local multi-node testing.
+
+Speaks just enough RESP for ``shared_state.RedisStore`` (PING, GET, SET with
+EX/PX, DEL, EXISTS, FLUSHDB and the HELLO/CLIENT/SELECT handshake), so
+several Streamlit replicas can share state without a real Redis::
+
+    python -m kv_server --port 6390
+    MOCKMARKET_SHARED_STATE_BACKEND=redis \\
+    MOCKMARKET_SHARED_STATE_URL=redis://localhost:6390/0 streamlit run main.py
+
+Everything lives in memory and is lost when the server stops.
+"""
+
+import argparse
+import asyncio
+import time
+
+
+class KeyValueServer:
+    """In-memory key -> (value, expires_at) map served over RESP."""
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: list[bytes], protocol: int = 2) -> bytes:
+        """Run one command and return its reply encoded for ``protocol``."""
+        command = args[0].upper()
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command == b"GET":
+            return _bulk(self._get(args[1]), protocol)
+        if command == b"SET":
+            expires_at = None
+            options = [a.upper() for a in args[3:]]
+            if b"PX" in options:
+                expires_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                expires_at = time.time() + int(args[3 + options.index(b"EX") + 1])
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        if command == b"EXISTS":
+            return b":%d\r\n" % sum(self._get(key) is not None for key in args[1:])
+        if command == b"FLUSHDB":
+            self.data.clear()
+            return b"+OK\r\n"
+        if command == b"HELLO":
+            # handle() switches the connection to the requested protocol
+            proto = int(args[1]) if len(args) > 1 else 2
+            return b"%%1\r\n$5\r\nproto\r\n:%d\r\n" % proto
+        if command in (b"CLIENT", b"SELECT"):
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        protocol = 2
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if args[0].upper() == b"HELLO" and len(args) > 1:
+                    protocol = int(args[1])
+                writer.write(self.execute(args, protocol))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _bulk(value: bytes | None, protocol: int = 2) -> bytes:
+    if value is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> list[bytes] | None:
+    """Read one RESP array of bulk strings (or an inline command)."""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host: str, port: int):
+    server = await asyncio.start_server(KeyValueServer().handle, host, port)
+    print(f"kv_server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
@@ -1,6 +1,14 @@
 import streamlit as st
 from session_manager import validate_session
 from database import get_wallet_balance
+from admin_stats import is_admin
+from metrics import get_metrics_exporter
+from mongo_connection import get_mongo
+
+# Once per process: connect to MongoDB in the background, and serve /metrics
+# (or start dumping) when metrics are enabled
+get_mongo()
+get_metrics_exporter()
 
 # Initialize session state for authentication
 if "logged_in" not in st.session_state:
@@ -35,7 +43,10 @@ if st.session_state.logged_in:
         st.Page("pages/leaderboard.py", title="Leaderboard"),
         st.Page("pages/predict.py", title="Make a Prediction"),
         st.Page("pages/monte_carlo.py", title="Monte Carlo Simulation"),
+        st.Page("pages/backtester.py", title="Backtest"),
     ]
+    if is_admin(st.session_state.username):
+        pages.append(st.Page("pages/admin.py", title="Admin"))
 else:
     pages = [
         st.Page("pages/login.py", title="Login"),
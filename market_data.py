@@ -0,0 +1,251 @@
+"""Pluggable market-data providers.
+
+Every price the app shows comes from a ``MarketDataProvider``. The default
+provider talks to Yahoo Finance; the replay provider serves OHLCV recorded to
+disk so benchmarks and load tests run offline and repeatably.
+
+Select the provider through settings (see ``config.get_setting``)::
+
+    [market_data]
+    PROVIDER = "replay"          # or "yfinance" (default)
+    REPLAY_DIR = "replay_data"   # one <TICKER>.csv per symbol
+    LATENCY_MS = 25              # artificial delay per upstream call
+"""
+
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+from config import get_setting
+from profiler import timed
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+class MarketDataProvider:
+    """Interface every market-data source implements."""
+
+    name = "base"
+
+    def history(
+        self,
+        tickers: list,
+        period: str | None = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """Return daily OHLCV bars.
+
+        Columns are a (field, ticker) MultiIndex, matching
+        ``yf.Tickers(...).history``. Pass either a yfinance-style ``period``
+        ("6mo", "max", ...) or a ``start``/``end`` date range.
+        """
+        raise NotImplementedError
+
+    def current_price(self, ticker: str) -> float:
+        """Return the latest traded price for a ticker."""
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance."""
+
+    name = "yfinance"
+
+    @timed("yfinance.history", counter="upstream_fetches")
+    def history(self, tickers, period=None, start=None, end=None):
+        tickers_obj = yf.Tickers(list(tickers))
+        if period is not None:
+            data = tickers_obj.history(period=period)
+        else:
+            data = tickers_obj.history(start=start, end=end)
+        if data is None:
+            raise RuntimeError("YFinance returned no data.")
+        return data
+
+    @timed("yfinance.current_price", counter="upstream_fetches")
+    def current_price(self, ticker):
+        stock_data = yf.Ticker(ticker)
+        return float(stock_data.history(period="1d")["Close"].iloc[-1])
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serve recorded OHLCV from ``<data_dir>/<TICKER>.csv`` files.
+
+    Quotes are synthetic: each call to ``current_price`` takes one step of a
+    seeded random walk starting at the last recorded close, so a given
+    sequence of calls always produces the same prices.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        data_dir: str | Path,
+        latency_ms: float = 0.0,
+        quote_volatility: float = 0.002,
+    ):
+        self.data_dir = Path(data_dir)
+        self.latency_ms = latency_ms
+        self.quote_volatility = quote_volatility
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._quote_state: dict[str, tuple[np.random.Generator, float]] = {}
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def _load(self, ticker: str) -> pd.DataFrame | None:
+        """Read and memoize one ticker's recording, or None if missing."""
+        if ticker not in self._frames:
+            path = self.data_dir / f"{ticker}.csv"
+            if not path.exists():
+                return None
+            frame = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+            self._frames[ticker] = frame[OHLCV_FIELDS].sort_index()
+        return self._frames[ticker]
+
+    @timed("replay.history", counter="upstream_fetches")
+    def history(self, tickers, period=None, start=None, end=None):
+        if period is not None and period not in (*PERIOD_OFFSETS, "ytd", "max"):
+            # yfinance rejects these too, so fail here rather than only live
+            raise ValueError(f"Unsupported history period: {period}")
+        self._sleep()
+        frames = {}
+        for ticker in tickers:
+            frame = self._load(ticker)
+            if frame is None:
+                # yfinance yields an all-NaN column for unknown symbols
+                frame = pd.DataFrame(
+                    columns=OHLCV_FIELDS, index=pd.DatetimeIndex([]), dtype=float
+                )
+            frames[ticker] = frame
+
+        data = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        data.index.name = "Date"
+
+        if period is not None and period in PERIOD_OFFSETS and len(data):
+            data = data[data.index > data.index.max() - PERIOD_OFFSETS[period]]
+        elif period == "ytd" and len(data):
+            data = data[data.index.year == data.index.max().year]
+        else:
+            if start is not None:
+                data = data[data.index >= pd.Timestamp(start)]
+            if end is not None:
+                data = data[data.index < pd.Timestamp(end)]
+        return data
+
+    @timed("replay.current_price", counter="upstream_fetches")
+    def current_price(self, ticker):
+        self._sleep()
+        with self._lock:
+            if ticker not in self._quote_state:
+                frame = self._load(ticker)
+                if frame is None or frame.empty:
+                    raise ValueError(f"No recorded data for {ticker}.")
+                rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+                self._quote_state[ticker] = (rng, float(frame["Close"].iloc[-1]))
+
+            rng, price = self._quote_state[ticker]
+            price *= float(np.exp(self.quote_volatility * rng.standard_normal()))
+            self._quote_state[ticker] = (rng, price)
+        return price
+
+
+def record_history(tickers: list, period: str, data_dir: str | Path) -> list:
+    """Download OHLCV from Yahoo Finance into replay files.
+
+    Returns:
+        List of tickers that were written
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    data = YFinanceProvider().history(tickers, period=period)
+
+    written = []
+    for ticker in tickers:
+        frame = data.xs(ticker, axis=1, level=1)[OHLCV_FIELDS].dropna(how="all")
+        if frame.empty:
+            continue
+        frame.index = frame.index.tz_localize(None)
+        frame.to_csv(data_dir / f"{ticker}.csv", index_label="Date")
+        written.append(ticker)
+    return written
+
+
+def generate_replay_data(
+    tickers: list,
+    data_dir: str | Path,
+    n_bars: int = 2520,
+    end: str | None = None,
+    seed: int = 0,
+) -> list:
+    """Write synthetic GBM-shaped OHLCV replay files (no network needed).
+
+    Returns:
+        List of tickers that were written
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    dates = pd.bdate_range(end=end or pd.Timestamp.today().normalize(), periods=n_bars)
+    rng = np.random.default_rng(seed)
+
+    for ticker in tickers:
+        start_price = rng.uniform(10, 500)
+        log_ret = rng.normal(0.0003, 0.02, n_bars)
+        close = start_price * np.exp(np.cumsum(log_ret))
+        open_ = close * np.exp(rng.normal(0, 0.005, n_bars))
+        spread = np.abs(rng.normal(0, 0.01, n_bars))
+        frame = pd.DataFrame(
+            {
+                "Open": open_,
+                "High": np.maximum(open_, close) * (1 + spread),
+                "Low": np.minimum(open_, close) * (1 - spread),
+                "Close": close,
+                "Volume": rng.integers(100_000, 10_000_000, n_bars),
+            },
+            index=dates,
+        )
+        frame.to_csv(data_dir / f"{ticker}.csv", index_label="Date")
+    return list(tickers)
+
+
+def create_provider(name: str, **options) -> MarketDataProvider:
+    """Build a provider by name ("yfinance" or "replay")."""
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "replay":
+        return ReplayProvider(
+            options.get("replay_dir", "replay_data"),
+            latency_ms=float(options.get("latency_ms", 0)),
+        )
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+@st.cache_resource
+def get_market_data_provider() -> MarketDataProvider:
+    """Return the process-wide provider selected in settings."""
+    return create_provider(
+        get_setting("market_data", "PROVIDER", "yfinance"),
+        replay_dir=get_setting("market_data", "REPLAY_DIR", "replay_data"),
+        latency_ms=get_setting("market_data", "LATENCY_MS", 0),
+    )
@@ -0,0 +1,380 @@
+"""Process-wide operational metrics: counters and histograms.
+
+Enable with ``ENABLED = true`` under ``[metrics]`` in secrets.toml (or
+``MOCKMARKET_METRICS_ENABLED=1``). Metrics are exported in the Prometheus
+text format:
+
+- over HTTP at ``http://HOST:PORT/metrics`` (default port 9464; 0 turns the
+  endpoint off; a replica that finds the port taken only dumps). ``HOST``
+  defaults to 127.0.0.1, so only the same machine can scrape; set it to
+  ``0.0.0.0`` (or an interface address) to expose the endpoint to a
+  Prometheus elsewhere, behind a firewall: it is unauthenticated
+- and/or written to ``DUMP_PATH`` every ``DUMP_SECONDS`` (``{pid}`` in the
+  path is replaced, so replicas on one host don't overwrite each other)
+
+Unlike the profiler, which reports one rerun, these accumulate for the
+lifetime of the process. Per-rerun counters bumped through
+``profiler.count`` (Mongo round-trips, upstream fetches, read-cache hits)
+are mirrored into ``mockmarket_events_total``, and pages wrapped in the
+profiler's rerun hooks get render-time and round-trips-per-render
+histograms.
+
+When disabled, instrumented call sites cost one boolean check and
+``instrument_cache`` leaves the cached function untouched.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from loguru import logger
+from pymongo import monitoring
+
+from config import get_bool_setting, get_setting
+
+ENABLED = get_bool_setting("metrics", "ENABLED")
+
+# Seconds; spans a cached lookup through a Prophet fit
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_NULL = nullcontext()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in values.items()]
+
+
+class Histogram:
+    """Bucketed distribution (plus sum and count) per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count per bucket..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        # First bucket whose upper bound holds the value; the rest are
+        # made cumulative on export
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the enclosed block's wall time in seconds."""
+        if not ENABLED:
+            return _NULL
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        lines = []
+        for key, counts in values.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts[:-1]):
+                cumulative += n
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use (page scripts re-declare theirs on
+    every rerun and get the same object back)."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+
+EVENTS = counter("mockmarket_events_total", "Events counted via profiler.count")
+CACHE_REQUESTS = counter("mockmarket_cache_requests_total", "Cache lookups by cache")
+CACHE_MISSES = counter(
+    "mockmarket_cache_misses_total", "Cache lookups that had to compute or fetch"
+)
+PAGE_SECONDS = histogram("mockmarket_page_render_seconds", "Wall time of a page rerun")
+PAGE_ROUND_TRIPS = histogram(
+    "mockmarket_page_mongo_round_trips", "Mongo commands sent by one page rerun", COUNT_BUCKETS
+)
+MONGO_COMMAND_SECONDS = histogram(
+    "mockmarket_mongo_command_seconds", "Mongo command latency by command and outcome"
+)
+
+
+# ============================================================================
+# Instrumentation helpers
+# ============================================================================
+
+# Tally of the page rerun in progress (Streamlit runs each session's script
+# in its own thread); a context variable, so work the rerun hands to
+# asyncio.to_thread is still attributed to it
+_page: ContextVar[dict | None] = ContextVar("metrics_page", default=None)
+
+
+def count(event: str, amount: int = 1):
+    """Count a process-wide event, also attributing it to the current page rerun."""
+    if not ENABLED:
+        return
+    EVENTS.inc(amount, event=event)
+    run = _page.get()
+    if run is not None:
+        run["events"][event] = run["events"].get(event, 0) + amount
+
+
+def begin_page(page: str):
+    if ENABLED:
+        _page.set({"page": page, "started": time.perf_counter(), "events": {}})
+
+
+def end_page():
+    run = _page.get()
+    if run is None:
+        return
+    _page.set(None)
+    PAGE_SECONDS.observe(time.perf_counter() - run["started"], page=run["page"])
+    PAGE_ROUND_TRIPS.observe(run["events"].get("mongo_round_trips", 0), page=run["page"])
+
+
+@contextmanager
+def page_run(page: str):
+    """Record a page rerun, unless one is already in progress (a fragment
+    rendered as part of its page's full rerun)."""
+    if not ENABLED or _page.get() is not None:
+        yield
+        return
+    begin_page(page)
+    try:
+        yield
+    finally:
+        end_page()
+
+
+def instrument_cache(cache_decorator, name: str | None = None):
+    """Apply a Streamlit cache decorator, counting lookups and misses.
+
+    The hit rate is ``1 - misses / requests`` per ``cache`` label (the
+    function name unless ``name`` is given)::
+
+        @instrument_cache(st.cache_data(ttl=300))
+        def get_price(ticker): ...
+    """
+
+    def decorator(func):
+        if not ENABLED:
+            return cache_decorator(func)
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def miss(*args, **kwargs):
+            CACHE_MISSES.inc(cache=label)
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(miss)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            CACHE_REQUESTS.inc(cache=label)
+            return cached(*args, **kwargs)
+
+        lookup.clear = cached.clear
+        return lookup
+
+    return decorator
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Observe every pymongo command's server round-trip latency."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(
+            event.duration_micros / 1e6, command=event.command_name, outcome="ok"
+        )
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(
+            event.duration_micros / 1e6, command=event.command_name, outcome="error"
+        )
+
+
+# ============================================================================
+# Export
+# ============================================================================
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """Serves ``/metrics`` and/or dumps the registry to a file periodically."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        dump_path: str | None = None,
+        dump_seconds: float = 15.0,
+    ):
+        self.host = host
+        self.port = port
+        self.dump_path = dump_path.format(pid=os.getpid()) if dump_path else None
+        self.dump_seconds = dump_seconds
+        self.server: ThreadingHTTPServer | None = None
+        self._stopped = threading.Event()
+
+    def dump(self):
+        """Atomically replace the dump file with the current metrics."""
+        tmp = f"{self.dump_path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(REGISTRY.render())
+        os.replace(tmp, self.dump_path)
+
+    def _dump_loop(self):
+        while not self._stopped.wait(self.dump_seconds):
+            try:
+                self.dump()
+            except OSError as e:
+                logger.warning(f"Metrics dump to {self.dump_path} failed: {e}")
+
+    def start(self):
+        if self.port:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"Metrics endpoint not started on port {self.port}: {e}")
+            else:
+                self.server.daemon_threads = True
+                threading.Thread(
+                    target=self.server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+        if self.dump_path:
+            threading.Thread(target=self._dump_loop, name="metrics-dump", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+
+
+@st.cache_resource
+def get_metrics_exporter() -> MetricsExporter | None:
+    """Return the process-wide exporter, or None when metrics are disabled."""
+    if not ENABLED:
+        return None
+    return MetricsExporter(
+        host=get_setting("metrics", "HOST", "127.0.0.1"),
+        port=int(get_setting("metrics", "PORT", 9464)),
+        dump_path=get_setting("metrics", "DUMP_PATH") or None,
+        dump_seconds=float(get_setting("metrics", "DUMP_SECONDS", 15)),
+    ).start()
@@ -0,0 +1,402 @@
+"""Resting limit and stop orders matched against price ticks.
+
+Order semantics (every fill happens at the tick price):
+
+- buy limit L:  fills when price <= L
+- sell limit L: fills when price >= L
+- buy stop S:   becomes a market buy when price >= S
+- sell stop S:  becomes a market sell when price <= S
+
+So every order triggers either "at or below" or "at or above" its level.
+Each ticker keeps one sorted level index per direction, and a tick only
+slices off the levels it crosses, so the work per tick is proportional to
+the orders that trigger, not to the number of open orders.
+
+Orders live in the ``orders`` collection; the in-memory index is rebuilt
+from it at startup. Fills are claimed in bulk (so two processes never fill
+the same order) and applied through the normal wallet/portfolio functions,
+with each fill's cash change applied atomically so fills and dashboard
+trades never overwrite each other's balance. A batch that fails releases
+its unprocessed claims, and claims left behind by a process that died
+mid-batch are reopened by ``load`` once they are ``CLAIM_TIMEOUT_SECONDS`` old.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import streamlit as st
+from loguru import logger
+
+from database import (
+    add_stock_to_portfolio,
+    adjust_wallet_balance,
+    get_user_portfolio,
+    remove_from_portfolio,
+)
+from mongo_connection import get_mongo
+from profiler import timed
+from quote_stream import get_quote_streamer
+
+ORDER_SIDES = ("buy", "sell")
+ORDER_TYPES = ("limit", "stop")
+
+# Orders placed by other processes are picked up by reloading this often
+RELOAD_SECONDS = 60
+# A "filling" claim this old belongs to a process that died mid-batch
+CLAIM_TIMEOUT_SECONDS = 300
+
+
+def triggers_below(side: str, order_type: str) -> bool:
+    """True if the order fires when price falls to its level or below."""
+    return (side == "buy") == (order_type == "limit")
+
+
+def is_triggered(order: dict, price: float) -> bool:
+    if triggers_below(order["side"], order["type"]):
+        return price <= order["price"]
+    return price >= order["price"]
+
+
+class PriceLevelIndex:
+    """Orders sorted by trigger level as parallel (level, order_id) lists."""
+
+    def __init__(self):
+        self.levels: list[float] = []
+        self.order_ids: list[str] = []
+
+    def add(self, level: float, order_id: str):
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.order_ids.insert(i, order_id)
+
+    def pop_at_or_above(self, price: float) -> list[str]:
+        """Remove and return orders whose level >= price."""
+        i = bisect_left(self.levels, price)
+        popped = self.order_ids[i:]
+        del self.levels[i:], self.order_ids[i:]
+        return popped
+
+    def pop_at_or_below(self, price: float) -> list[str]:
+        """Remove and return orders whose level <= price."""
+        i = bisect_right(self.levels, price)
+        popped = self.order_ids[:i]
+        del self.levels[:i], self.order_ids[:i]
+        return popped
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class OrderBook:
+    """Both level indexes for one ticker."""
+
+    def __init__(self):
+        # Fires when price <= level (buy limits, sell stops)
+        self.below = PriceLevelIndex()
+        # Fires when price >= level (sell limits, buy stops)
+        self.above = PriceLevelIndex()
+
+    def add(self, order: dict):
+        book = self.below if triggers_below(order["side"], order["type"]) else self.above
+        book.add(order["price"], order["_id"])
+
+    def triggered(self, price: float) -> list[str]:
+        return self.below.pop_at_or_above(price) + self.above.pop_at_or_below(price)
+
+
+class OrderEngine:
+    """Process-wide index of open orders plus bulk fill execution."""
+
+    def __init__(self, db=None):
+        self.db = db
+        self.orders: dict[str, dict] = {}
+        self.books: dict[str, OrderBook] = {}
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, order: dict):
+        with self._lock:
+            self.orders[order["_id"]] = order
+            self.books.setdefault(order["ticker"], OrderBook()).add(order)
+
+    def discard(self, order_id: str):
+        """Forget an order; its stale index entry is skipped when popped."""
+        with self._lock:
+            self.orders.pop(order_id, None)
+
+    def tickers(self) -> list:
+        with self._lock:
+            return sorted({order["ticker"] for order in self.orders.values()})
+
+    def match(self, quotes: dict[str, float]) -> list[tuple[dict, float]]:
+        """Pop every order the quotes trigger, as (order, fill price) pairs."""
+        fills = []
+        with self._lock:
+            for ticker, price in quotes.items():
+                book = self.books.get(ticker)
+                if book is None:
+                    continue
+                for order_id in book.triggered(price):
+                    order = self.orders.pop(order_id, None)
+                    if order is not None:
+                        fills.append((order, price))
+        return fills
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """Rebuild the index from every open order in MongoDB, reopening
+        stale claims first."""
+        with self._lock:
+            self.orders.clear()
+            self.books.clear()
+        self.loaded_at = time.time()
+        self.release_claims(
+            {
+                "status": "filling",
+                "claimed_at": {
+                    "$lt": datetime.now() - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+                },
+            }
+        )
+        open_orders = list(self.db["orders"].find({"status": "open"}))
+        for order in open_orders:
+            self.add(order)
+        return len(open_orders)
+
+    def release_claims(self, query: dict) -> int:
+        """Put claimed orders matching ``query`` back to open."""
+        return self.db["orders"].update_many(
+            query,
+            {"$set": {"status": "open"}, "$unset": {"claim": "", "claimed_at": ""}},
+        ).modified_count
+
+    def process_ticks(self, quotes: dict[str, float]) -> list[dict]:
+        """Match ``quotes`` and execute the resulting fills."""
+        fills = self.match(quotes)
+        return self.execute_fills(fills) if fills else []
+
+    @timed("orders.execute_fills")
+    def execute_fills(self, fills: list[tuple[dict, float]]) -> list[dict]:
+        """
+        Claim, apply and record a batch of triggered orders.
+
+        Returns:
+            The orders that were filled or rejected, with their final status
+        """
+        orders = self.db["orders"]
+        claim = uuid.uuid4().hex
+        orders.update_many(
+            {"_id": {"$in": [order["_id"] for order, _ in fills]}, "status": "open"},
+            {"$set": {"status": "filling", "claim": claim, "claimed_at": datetime.now()}},
+        )
+        claimed = {order["_id"] for order in orders.find({"claim": claim}, {"_id": 1})}
+
+        by_user: dict[str, list[tuple[dict, float]]] = {}
+        for order, price in fills:
+            if order["_id"] in claimed:
+                by_user.setdefault(order["username"], []).append((order, price))
+
+        filled: dict[float, list[str]] = {}
+        rejected: list[str] = []
+        results = []
+        try:
+            self._apply_fills(by_user, filled, rejected, results)
+        finally:
+            now = datetime.now()
+            # Every order filled by one tick of one ticker shares a fill price
+            for price, order_ids in filled.items():
+                orders.update_many(
+                    {"_id": {"$in": order_ids}},
+                    {"$set": {"status": "filled", "fill_price": price, "filled_at": now}},
+                )
+            if rejected:
+                orders.update_many(
+                    {"_id": {"$in": rejected}},
+                    {"$set": {"status": "rejected", "filled_at": now}},
+                )
+            # Anything still claimed was not reached because of an error:
+            # reopen it, and index it again for the next tick
+            if self.release_claims({"claim": claim, "status": "filling"}):
+                processed = {order["_id"] for order in results}
+                for order, _ in fills:
+                    if order["_id"] in claimed and order["_id"] not in processed:
+                        self.add(order)
+        return results
+
+    def _apply_fills(
+        self,
+        by_user: dict[str, list[tuple[dict, float]]],
+        filled: dict[float, list[str]],
+        rejected: list[str],
+        results: list[dict],
+    ):
+        """Apply each user's fills to their wallet and portfolio, recording
+        the outcome in ``filled``/``rejected``/``results`` as it goes."""
+        for username, user_fills in by_user.items():
+            held: dict[str, int] = {}
+            for lot in get_user_portfolio(username):
+                ticker = lot["stock_ticker"]
+                held[ticker] = held.get(ticker, 0) + lot["stock_quantity"]
+
+            for order, price in user_fills:
+                quantity, ticker = order["quantity"], order["ticker"]
+                if order["side"] == "buy":
+                    # Debited only if the funds are there at this instant
+                    ok = (
+                        adjust_wallet_balance(username, -price * quantity, min_balance=0)
+                        is not None
+                    )
+                    if ok:
+                        try:
+                            add_stock_to_portfolio(username, ticker, price, quantity)
+                        except Exception:
+                            # Refund, so reopening the order can't charge twice
+                            adjust_wallet_balance(username, price * quantity)
+                            raise
+                        held[ticker] = held.get(ticker, 0) + quantity
+                else:
+                    # The lots may have been sold from the dashboard since
+                    # they were read, so only pay out what was removed
+                    ok = held.get(ticker, 0) >= quantity and remove_from_portfolio(
+                        username, ticker, quantity, sale_price=price
+                    )
+                    if ok:
+                        adjust_wallet_balance(username, price * quantity)
+                        held[ticker] -= quantity
+
+                if ok:
+                    filled.setdefault(price, []).append(order["_id"])
+                    results.append({**order, "status": "filled", "fill_price": price})
+                else:
+                    rejected.append(order["_id"])
+                    results.append({**order, "status": "rejected"})
+
+
+@st.cache_resource
+def get_order_engine() -> OrderEngine:
+    """Return the process-wide engine, loaded and fed by the quote streamer.
+
+    Ticks are queued to a worker thread, so reloads and fills (blocking
+    Mongo calls) never hold up the streamer's event loop.
+    """
+    engine = OrderEngine(get_mongo().db)
+    engine.load()
+    streamer = get_quote_streamer()
+    if streamer is not None:
+        ticks: queue.Queue = queue.Queue()
+
+        def process_queued_ticks():
+            while True:
+                quotes = ticks.get()
+                try:
+                    if time.time() - engine.loaded_at > RELOAD_SECONDS:
+                        engine.load()
+                    # Keep every ticker with open orders streaming
+                    streamer.watch("order-engine", engine.tickers())
+                    engine.process_ticks(quotes)
+                except Exception as e:
+                    logger.exception(f"Order fill failed: {e}")
+
+        threading.Thread(target=process_queued_ticks, name="order-engine", daemon=True).start()
+        streamer.subscribe(ticks.put)
+        streamer.watch("order-engine", engine.tickers())
+    return engine
+
+
+# ============================================================================
+# Order Management
+# ============================================================================
+
+
+@timed()
+def place_order(
+    username: str,
+    ticker: str,
+    side: str,
+    order_type: str,
+    quantity: int,
+    price: float,
+) -> dict:
+    """
+    Store a resting limit or stop order and add it to the engine.
+
+    Returns:
+        The stored order
+    """
+    if side not in ORDER_SIDES or order_type not in ORDER_TYPES:
+        raise ValueError(f"Unsupported order: {side} {order_type}")
+    if quantity <= 0 or price <= 0:
+        raise ValueError("Quantity and price must be positive.")
+
+    order = {
+        "_id": uuid.uuid4().hex,
+        "username": username,
+        "ticker": ticker,
+        "side": side,
+        "type": order_type,
+        "quantity": int(quantity),
+        "price": float(price),
+        "status": "open",
+        "created_at": datetime.now(),
+    }
+    engine = get_order_engine()
+    engine.db["orders"].insert_one(order)
+    engine.add(order)
+
+    streamer = get_quote_streamer()
+    if streamer is not None:
+        streamer.watch("order-engine", engine.tickers())
+    return order
+
+
+@timed()
+def cancel_order(username: str, order_id: str) -> bool:
+    """Cancel one of the user's open orders; False if it is no longer open."""
+    engine = get_order_engine()
+    result = engine.db["orders"].update_one(
+        {"_id": order_id, "username": username, "status": "open"},
+        {"$set": {"status": "cancelled"}},
+    )
+    engine.discard(order_id)
+    return result.modified_count > 0
+
+
+@timed()
+def get_user_orders(username: str, status: str | None = "open", limit: int = 50) -> list:
+    """The user's orders with ``status`` (all statuses if None), newest first."""
+    query = {"username": username}
+    if status is not None:
+        query["status"] = status
+    cursor = get_order_engine().db["orders"].find(query).sort("created_at", -1)
+    return list(cursor.limit(limit))
+
+
+def check_user_orders(username: str, get_price) -> list[dict]:
+    """Match the user's open orders against fresh prices.
+
+    Used when quote streaming is off, so orders still fill whenever their
+    owner has the dashboard open. Orders are read from MongoDB rather than
+    the index, so this also covers orders placed on other replicas.
+    """
+    open_orders = get_user_orders(username, limit=0)
+    prices = {}
+    fills = []
+    for order in open_orders:
+        ticker = order["ticker"]
+        if ticker not in prices:
+            prices[ticker] = get_price(ticker)
+        if is_triggered(order, prices[ticker]):
+            fills.append((order, prices[ticker]))
+    if not fills:
+        return []
+    engine = get_order_engine()
+    for order, _ in fills:
+        engine.discard(order["_id"])
+    return engine.execute_fills(fills)
@@ -0,0 +1,151 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+
+from admin_stats import get_admin_stats, is_admin, run_admin_stats_job
+from profiler import profiled_run
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+st.set_page_config(page_title="Admin · Stock Simulator", page_icon="🛠", layout="wide")
+
+USER_COLUMNS = {
+    "username": "User",
+    "net_worth": "Net worth",
+    "cash": "Cash",
+    "holdings_value": "Holdings",
+    "positions": "Positions",
+    "top_ticker": "Top holding",
+    "top_share": "Top share",
+    "hhi": "HHI",
+    "buys": "Buys",
+    "sells": "Sells",
+    "volume": "Volume",
+    "realized_pnl": "Realized P&L",
+    "unrealized_pnl": "Unrealized P&L",
+}
+
+
+# ============================================================================
+# Helper Functions
+# ============================================================================
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def load_admin_stats() -> tuple[dict | None, list[dict]]:
+    """Latest pre-aggregated stats (one query), cached briefly."""
+    return get_admin_stats()
+
+
+def build_ticker_chart(rows: list[dict], x: str, title: str) -> alt.Chart:
+    """Horizontal bar chart of a ranked ticker list."""
+    return (
+        alt.Chart(pd.DataFrame(rows))
+        .mark_bar()
+        .encode(
+            x=alt.X(f"{x}:Q", title=x.title()),
+            y=alt.Y("ticker:N", sort="-x", title=None),
+            tooltip=list(rows[0]),
+        )
+        .properties(title=title, height=300)
+    )
+
+
+def build_concentration_chart(users: pd.DataFrame) -> alt.Chart:
+    """Histogram of the Herfindahl index over users holding any stock."""
+    return (
+        alt.Chart(users[users["positions"] > 0])
+        .mark_bar()
+        .encode(
+            x=alt.X("hhi:Q", bin=alt.Bin(maxbins=20), title="HHI (1 = single holding)"),
+            y=alt.Y("count():Q", title="Users"),
+        )
+        .properties(title="Holdings concentration", height=300)
+    )
+
+
+# ============================================================================
+# Main Content
+# ============================================================================
+
+
+def main():
+    if not is_admin(st.session_state.get("username")):
+        st.error("This page is only available to admins.")
+        return
+
+    st.title("Admin")
+
+    stats, users = load_admin_stats()
+    col1, col2 = st.columns([5, 1], vertical_alignment="bottom")
+    if col2.button("Recompute now", use_container_width=True):
+        with st.spinner("Aggregating…"):
+            run_admin_stats_job()
+        load_admin_stats.clear()
+        st.rerun()
+    if stats is None:
+        st.info(
+            "No stats yet. Run `python -m admin_stats` (e.g. from cron) or press "
+            "**Recompute now**."
+        )
+        return
+    col1.caption(f"Stats computed {stats['computed_at']:%Y-%m-%d %H:%M}")
+
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("Users", f"{stats['users']:,}", f"{stats['active_traders']:,} traded")
+    m2.metric("Total net worth", f"${stats['total_net_worth']:,.0f}")
+    m3.metric("Invested", f"${stats['total_holdings']:,.0f}")
+    m4.metric("Trades", f"{stats['trades']:,}", f"${stats['volume']:,.0f} volume")
+    m5.metric(
+        "P&L (realized / unrealized)",
+        f"${stats['realized_pnl']:,.0f} / ${stats['unrealized_pnl']:,.0f}",
+    )
+    m6.metric(
+        "Mean HHI",
+        f"{stats['mean_hhi']:.2f}",
+        help="Average Herfindahl index of users' holdings (sum of squared weights)",
+    )
+
+    st.divider()
+
+    frame = pd.DataFrame(users, columns=["username", *list(USER_COLUMNS)[1:]])
+    c1, c2, c3 = st.columns(3)
+    if stats["most_held"]:
+        c1.altair_chart(
+            build_ticker_chart(stats["most_held"], "holders", "Most held tickers"),
+            width="stretch",
+        )
+    if stats["most_traded"]:
+        c2.altair_chart(
+            build_ticker_chart(stats["most_traded"], "trades", "Most traded tickers"),
+            width="stretch",
+        )
+    if (frame["positions"] > 0).any():
+        c3.altair_chart(build_concentration_chart(frame), width="stretch")
+
+    st.markdown("### Users")
+    st.dataframe(
+        frame.sort_values("net_worth", ascending=False)
+        .rename(columns=USER_COLUMNS)
+        .style.format(
+            {
+                "Net worth": "${:,.2f}",
+                "Cash": "${:,.2f}",
+                "Holdings": "${:,.2f}",
+                "Top share": "{:.0%}",
+                "HHI": "{:.2f}",
+                "Volume": "${:,.0f}",
+                "Realized P&L": "${:,.2f}",
+                "Unrealized P&L": "${:,.2f}",
+            }
+        ),
+        width="stretch",
+        hide_index=True,
+    )
+
+
+with profiled_run("admin"):
+    main()
@@ -0,0 +1,292 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import altair as alt
+
+from backtest import (
+    STAT_LABELS,
+    STRATEGIES,
+    backtest,
+    buy_and_hold,
+    parameter_grid,
+    performance_stats,
+    results_frame,
+    run_sweep,
+)
+from config import get_setting
+from downsample import downsample_frame
+from ticker import load_stock_data
+from ticker_universe import load_ticker_universe
+
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+st.set_page_config(
+    page_title="Backtest · Stock Simulator",
+    page_icon="📈",
+    layout="wide",
+)
+
+DEFAULT_TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA", "AMZN", "TSLA"]
+
+# Sweeps with at least this many parameter sets use the process pool
+POOL_MIN_PARAMS = 256
+
+PARAM_LABELS = {
+    param: spec[0]
+    for strategy in STRATEGIES.values()
+    for param, spec in strategy.param_specs.items()
+}
+
+DISCLAIMER = (
+    "⚠ Backtests replay past prices with hindsight-free rules but ignore "
+    "slippage, dividends, taxes and survivorship bias. Past performance does "
+    "not predict future results. Not financial advice."
+)
+
+
+# ============================================================================
+# Helper Functions
+# ============================================================================
+
+
+@st.cache_data(show_spinner=False, ttl="1h")
+def load_closes(tickers: tuple, years: int) -> pd.DataFrame:
+    """Closes for ``tickers``; a column is all-NaN if its ticker has no data."""
+    return load_stock_data(list(tickers), f"{years}y").reindex(columns=list(tickers))
+
+
+@st.cache_data(show_spinner=False, ttl="1h")
+def run_backtest_sweep(
+    tickers: tuple, years: int, strategy: str, grid: tuple, cost_bps: float
+) -> dict:
+    """Sweep a parameter grid; cached per inputs."""
+    closes = load_closes(tickers, years).ffill().dropna().to_numpy()
+    params = [dict(combo) for combo in grid]
+    workers = int(get_setting("backtest", "WORKERS", 1))
+    if len(params) < POOL_MIN_PARAMS:
+        workers = 1
+    return run_sweep(closes, strategy, params, cost_bps, workers=workers)
+
+
+def grid_inputs(strategy: str) -> tuple:
+    """Range sliders for each strategy parameter, as a hashable grid."""
+    values = {}
+    specs = STRATEGIES[strategy].param_specs
+    for col, (param, (label, low, high, default, step)) in zip(
+        st.columns(len(specs)), specs.items()
+    ):
+        with col:
+            start, stop = st.slider(label, low, high, default, key=f"{strategy}_{param}")
+            step = st.number_input(
+                f"{label} step", 1, high - low or 1, step, key=f"{strategy}_{param}_step"
+            )
+        values[param] = list(range(start, stop + 1, step))
+    return tuple(tuple(combo.items()) for combo in parameter_grid(strategy, **values))
+
+
+def build_equity_chart(
+    dates: pd.DatetimeIndex, curves: dict[str, np.ndarray], title: str
+) -> alt.Chart:
+    """Line chart of named equity curves (growth of $1), downsampled."""
+    frames = []
+    for name, curve in curves.items():
+        frame = downsample_frame(
+            pd.DataFrame({"Date": dates, "Equity": curve}), "Date", "Equity"
+        )
+        frame["Series"] = name
+        frames.append(frame)
+
+    return (
+        alt.Chart(pd.concat(frames))
+        .mark_line()
+        .encode(
+            x=alt.X("Date:T", axis=alt.Axis(format="%b %Y")),
+            y=alt.Y("Equity:Q", axis=alt.Axis(format="$,.2f"), title="Growth of $1"),
+            color=alt.Color("Series:N", legend=alt.Legend(orient="bottom")),
+            tooltip=["Series:N", "Date:T", alt.Tooltip("Equity:Q", format="$.2f")],
+        )
+        .properties(title=title, height=400)
+        .interactive()
+    )
+
+
+def build_heatmap(frame: pd.DataFrame, x: str, y: str, stat: str) -> alt.Chart:
+    """Mean ``stat`` across tickers for every (x, y) parameter pair."""
+    grid = frame.groupby([x, y], as_index=False)[stat].mean()
+    return (
+        alt.Chart(grid)
+        .mark_rect()
+        .encode(
+            x=alt.X(f"{x}:O", title=PARAM_LABELS.get(x, x)),
+            y=alt.Y(f"{y}:O", title=PARAM_LABELS.get(y, y), sort="descending"),
+            color=alt.Color(f"{stat}:Q", scale=alt.Scale(scheme="redyellowgreen")),
+            tooltip=[f"{x}:O", f"{y}:O", alt.Tooltip(f"{stat}:Q", format=".2f")],
+        )
+        .properties(title=f"Mean {STAT_LABELS[stat]} across tickers", height=350)
+    )
+
+
+# ============================================================================
+# Main Content
+# ============================================================================
+
+st.title("Strategy Backtester")
+st.caption("Rule strategies replayed over historical closes")
+
+st.divider()
+
+st.markdown("## Parameters")
+
+c1, c2, c3, c4 = st.columns([3, 1, 1, 1])
+
+with c1:
+    tickers = st.multiselect(
+        "Tickers",
+        options=load_ticker_universe().options_with(DEFAULT_TICKERS),
+        default=DEFAULT_TICKERS,
+        accept_new_options=True,
+    )
+    tickers = [t.upper() for t in tickers]
+
+with c2:
+    history_years = st.select_slider("History (years)", options=[1, 2, 5, 10], value=5)
+
+with c3:
+    strategy = st.selectbox(
+        "Strategy",
+        options=list(STRATEGIES),
+        format_func=lambda name: STRATEGIES[name].label,
+    )
+
+with c4:
+    cost_bps = st.number_input(
+        "Trading cost (bps)",
+        min_value=0.0,
+        max_value=100.0,
+        value=5.0,
+        step=1.0,
+        help="Charged on every unit of portfolio weight bought or sold",
+    )
+
+st.caption(STRATEGIES[strategy].description)
+grid = grid_inputs(strategy)
+run_btn = st.button("RUN BACKTEST", disabled=not tickers or not grid)
+if not grid:
+    st.warning("No valid parameter combinations in these ranges.")
+
+st.divider()
+
+if not run_btn and st.session_state.get("backtest_inputs") is None:
+    st.info(
+        "Pick tickers, a strategy and parameter ranges, then press "
+        "**RUN BACKTEST**. Every combination is tested on every ticker."
+    )
+    st.stop()
+
+if run_btn:
+    st.session_state.backtest_inputs = (
+        tuple(tickers), history_years, strategy, grid, cost_bps
+    )
+tickers, history_years, strategy, grid, cost_bps = st.session_state.backtest_inputs
+
+# ── Load & validate ──────────────────────────────────────────────────────────
+with st.spinner(f"Fetching {', '.join(tickers)}…"):
+    closes = load_closes(tickers, history_years)
+
+missing = closes.columns[closes.isna().all()].tolist()
+if missing:
+    st.error(f"Could not retrieve data for: {', '.join(missing)}.")
+    st.stop()
+
+# Common trading days only, so every ticker is tested over the same window
+closes = closes.ffill().dropna()
+if len(closes) < 2:
+    st.error("Not enough overlapping price history for these tickers.")
+    st.stop()
+
+# ── Sweep ────────────────────────────────────────────────────────────────────
+with st.spinner(f"Backtesting {len(grid):,} parameter sets…"):
+    result = run_backtest_sweep(tickers, history_years, strategy, grid, cost_bps)
+
+columns = list(tickers) if STRATEGIES[strategy].per_ticker else ["Portfolio"]
+frame = results_frame(result, columns)
+best = frame.loc[frame["sharpe"].idxmax()]
+params = {name: int(best[name]) for name, _ in grid[0]}
+
+benchmark = buy_and_hold(closes.to_numpy())
+if not STRATEGIES[strategy].per_ticker:
+    benchmark = benchmark.mean(axis=0, keepdims=True)
+benchmark_stats = performance_stats(benchmark, np.ones(len(benchmark)))
+column = columns.index(best["ticker"])
+
+m1, m2, m3, m4, m5 = st.columns(5)
+m1.metric("Strategies tested", f"{len(frame):,}")
+m2.metric(
+    "Best Sharpe",
+    f"{best['sharpe']:.2f}",
+    f"{best['sharpe'] - benchmark_stats['sharpe'][column]:+.2f} vs hold",
+)
+m3.metric(
+    "Its total return",
+    f"{best['total_return'] * 100:.1f}%",
+    f"{(best['total_return'] - benchmark_stats['total_return'][column]) * 100:+.1f} pts vs hold",
+)
+m4.metric("Its max drawdown", f"{best['max_drawdown'] * 100:.1f}%")
+beat_hold = result["stats"]["total_return"] > benchmark_stats["total_return"]
+m5.metric(
+    "Share beating hold",
+    f"{beat_hold.mean() * 100:.0f}%",
+    help="Strategies whose total return beat buying and holding the same ticker",
+)
+
+# ── Best equity curve ────────────────────────────────────────────────────────
+label = ", ".join(f"{PARAM_LABELS[k]} {v}" for k, v in params.items())
+equity = backtest(closes.to_numpy(), strategy, params, cost_bps)
+st.altair_chart(
+    build_equity_chart(
+        closes.index,
+        {
+            f"{STRATEGIES[strategy].label} ({label})": equity[column],
+            "Buy & hold": benchmark[column],
+        },
+        f"Best strategy · {best['ticker']}",
+    ),
+    width="stretch",
+)
+
+# ── Parameter heatmap & results table ────────────────────────────────────────
+param_names = [name for name, _ in grid[0]]
+if len(param_names) == 2:
+    stat = st.segmented_control(
+        "Heatmap statistic",
+        ["sharpe", "total_return", "max_drawdown"],
+        default="sharpe",
+        format_func=STAT_LABELS.get,
+    )
+    st.altair_chart(
+        build_heatmap(frame, param_names[0], param_names[1], stat or "sharpe"),
+        width="stretch",
+    )
+
+st.markdown("### Results")
+st.dataframe(
+    frame.sort_values("sharpe", ascending=False)
+    .head(500)
+    .rename(columns={**STAT_LABELS, **PARAM_LABELS, "ticker": "Ticker"})
+    .style.format(
+        {
+            STAT_LABELS["total_return"]: "{:.1%}",
+            STAT_LABELS["cagr"]: "{:.1%}",
+            STAT_LABELS["sharpe"]: "{:.2f}",
+            STAT_LABELS["max_drawdown"]: "{:.1%}",
+            STAT_LABELS["turnover"]: "{:.1f}",
+        }
+    ),
+    width="stretch",
+    hide_index=True,
+)
+
+st.warning(DISCLAIMER)
@@ -1,18 +1,39 @@
-import json
-
 import streamlit as st
 import yfinance as yf
 import pandas as pd
 import altair as alt
 from session_manager import logout_session
+from alerts import (
+    ALERT_KINDS,
+    create_alert,
+    delete_alert,
+    get_alert_worker,
+    get_user_alerts,
+    get_watchlist,
+    pop_triggered_alerts,
+    set_watchlist,
+)
+from comparison import get_chart_frame, get_comparison_engine
+from config import get_setting
 from database import (
-    update_wallet_balance,
+    adjust_wallet_balance,
     add_stock_to_portfolio,
+    get_trade_history,
     get_user_portfolio,
+    get_wallet_balance,
     remove_from_portfolio,
     calculate_net_worth,
+    replay_ledger,
 )
-from ticker import get_current_stock_price, load_stock_data
+from downsample import downsample_frame
+from equity_curve import get_equity_curve
+from indicators import INDICATORS, get_indicator_frame
+from market_data import PERIOD_OFFSETS
+from order_engine import cancel_order, check_user_orders, get_user_orders, place_order
+from profiler import profiled_run, section, timed
+from quote_stream import get_quote_streamer
+from ticker import get_live_stock_price, load_stock_data
+from ticker_universe import TickerUniverse, load_ticker_universe
 
 # ============================================================================
 # Configuration
@@ -25,6 +46,7 @@ st.set_page_config(
 )
 
 DEFAULT_STOCKS = ["AAPL", "MSFT", "GOOGL", "NVDA", "AMZN", "TSLA"]
+ORDER_TYPES = ["Market", "Limit", "Stop"]
 HORIZON_MAP = {
     "1 Month": "1mo",
     "3 Months": "3mo",
@@ -35,6 +57,9 @@ HORIZON_MAP = {
     "10 Years": "10y",
     "Max": "max",
 }
+# A confirmed trade is refused if the live price has moved more than this
+# fraction away from the price shown in the confirmation dialog
+PRICE_TOLERANCE = float(get_setting("trading", "PRICE_TOLERANCE", 0.01))
 
 
 # ============================================================================
@@ -42,14 +67,6 @@ HORIZON_MAP = {
 # ============================================================================
 
 
-def get_ticker_list() -> list:
-    """Load all available tickers from stocks.json"""
-    with open("stocks.json", "r") as f:
-        data = json.load(f)
-    tickers = [item["symbol"] for item in data["data"]["rows"]]
-    return sorted(tickers)
-
-
 def tickers_to_str(tickers: list) -> str:
     """Convert ticker list to comma-separated string"""
     return ",".join(tickers)
@@ -68,11 +85,48 @@ def initialize_session_state():
         st.session_state.session_token = None
 
 
-def save_wallet_balance():
-    """Save wallet balance to database"""
+def sync_wallet_balance():
+    """Reload the wallet balance, which resting orders may have changed"""
     username = st.session_state.get("username")
     if username:
-        update_wallet_balance(username, st.session_state.wallet_balance)
+        balance = get_wallet_balance(username)
+        if balance is not None:
+            st.session_state.wallet_balance = balance
+
+
+def dialog_quote(side: str, ticker: str, quantity: int) -> float:
+    """Price to show in a buy/sell confirmation dialog.
+
+    A fresh quote is taken when the dialog opens and kept in session state,
+    so the rerun triggered by its Confirm button shows and trades at the
+    same price instead of fetching a new one.
+    """
+    key = f"{side}_quote"
+    quote = st.session_state.get(key)
+    if (
+        st.session_state.get(f"confirm_{side}")
+        and quote is not None
+        and (quote["ticker"], quote["quantity"]) == (ticker, quantity)
+    ):
+        return quote["price"]
+    price = get_live_stock_price(ticker)
+    st.session_state[key] = {"ticker": ticker, "quantity": quantity, "price": price}
+    return price
+
+
+def price_moved(side: str, ticker: str, quoted_price: float) -> bool:
+    """True (after asking the user to confirm again) if the live price is
+    no longer within PRICE_TOLERANCE of the quoted one"""
+    live_price = get_live_stock_price(ticker)
+    if abs(live_price - quoted_price) <= PRICE_TOLERANCE * quoted_price:
+        return False
+    # The next Confirm trades at the new price, which the warning shows
+    st.session_state[f"{side}_quote"]["price"] = live_price
+    st.warning(
+        f"The price of {ticker} moved from ${quoted_price:.2f} to "
+        f"${live_price:.2f}. Confirm again to trade at the new price."
+    )
+    return True
 
 
 def initialize_tickers_input():
@@ -92,31 +146,17 @@ def update_query_params(tickers: list):
 
 
 # ============================================================================
-# Data Processing
+# UI Components - Header & Selection
 # ============================================================================
 
 
-def validate_stock_data(data: pd.DataFrame) -> list:
-    """Validate data and return list of invalid tickers"""
-    return data.columns[data.isna().all()].tolist()
-
-
-def normalize_prices(data: pd.DataFrame) -> pd.DataFrame:
-    """Normalize prices so they start at 1 for comparison"""
-    return data.div(data.iloc[0])
-
-
-def calculate_performance(normalized: pd.DataFrame, tickers: list) -> tuple:
-    """Calculate best and worst performing stocks"""
-    latest_norm_values = {normalized[ticker].iat[-1]: ticker for ticker in tickers}
-    return max(latest_norm_values.items()), min(latest_norm_values.items())
-
-
-# ============================================================================
-# UI Components - Header & Selection
-# ============================================================================
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cached_net_worth(username: str, wallet_balance: float) -> float:
+    """Net worth keyed on the wallet balance, so every trade invalidates it"""
+    return calculate_net_worth(username=username)
 
 
+@timed("dashboard.display_header")
 def display_header():
     """Display dashboard header with welcome message and wallet balance"""
     username = st.session_state.get("username", "User")
@@ -135,6 +175,9 @@ Welcome, **{username}**! Compare stocks and manage your trading portfolio."""
     with col2:
         if st.button("Logout", use_container_width=True):
             logout_session(st.session_state.session_token)
+            streamer = get_quote_streamer()
+            if streamer is not None:
+                streamer.unwatch(username)
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.session_token = None
@@ -144,12 +187,51 @@ Welcome, **{username}**! Compare stocks and manage your trading portfolio."""
     st.write(f"**Wallet Balance:** ${balance:,.2f}")
 
     username = st.session_state.get("username")
-    net_worth = calculate_net_worth(username=username)
+    net_worth = get_cached_net_worth(username, balance)
     st.write(f"**Net Worth:** ${net_worth:,.2f}")
+    display_equity_curve(username)
     ""  # Add spacing
 
 
-def create_stock_selector(all_tickers: list) -> tuple:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_cached_equity_curve(username: str) -> pd.Series | None:
+    """Stored net-worth history; the equity-curve job refreshes it daily"""
+    return get_equity_curve(username)
+
+
+def display_equity_curve(username: str):
+    """Chart the user's net worth over a selectable horizon"""
+    curve = get_cached_equity_curve(username)
+    if curve is None or len(curve) < 2:
+        return
+
+    with st.expander(":material/show_chart: Portfolio value history"):
+        horizon = st.pills(
+            "Portfolio horizon",
+            options=list(HORIZON_MAP.keys()),
+            default="6 Months",
+            key="equity_horizon",
+        )
+        period = HORIZON_MAP[horizon or "6 Months"]
+        if period in PERIOD_OFFSETS:
+            curve = curve[curve.index > curve.index[-1] - PERIOD_OFFSETS[period]]
+
+        chart_data = downsample_frame(
+            curve.rename_axis("Date").reset_index(), "Date", "Net worth"
+        )
+        st.altair_chart(
+            alt.Chart(chart_data)
+            .mark_line()
+            .encode(
+                alt.X("Date:T"),
+                alt.Y("Net worth:Q", axis=alt.Axis(format="$,.0f")).scale(zero=False),
+            )
+            .properties(height=250)
+        )
+
+
+@timed("dashboard.create_stock_selector")
+def create_stock_selector(universe: TickerUniverse) -> tuple:
     """Create and return stock ticker and time horizon selections"""
     cols = st.columns([1, 3])
 
@@ -160,7 +242,7 @@ def create_stock_selector(all_tickers: list) -> tuple:
     with top_left_cell:
         tickers = st.multiselect(
             "Stock tickers",
-            options=set(all_tickers) | set(st.session_state.tickers_input),
+            options=universe.options_with(st.session_state.tickers_input),
             default=st.session_state.tickers_input,
             placeholder="Choose stocks to compare",
             accept_new_options=True,
@@ -172,11 +254,24 @@ def create_stock_selector(all_tickers: list) -> tuple:
             default="6 Months",
         )
 
+        indicators = st.pills(
+            "Indicators",
+            options=list(INDICATORS),
+            format_func=lambda name: INDICATORS[name].label,
+            selection_mode="multi",
+            key="indicators",
+        )
+
+        raw_data = st.toggle(
+            "Show raw data",
+            help="Plot every daily bar instead of a downsampled line",
+        )
+
     right_cell = cols[1].container(
         border=True, height="stretch", vertical_alignment="center"
     )
 
-    return (tickers, horizon, cols, top_left_cell, right_cell)
+    return (tickers, horizon, indicators, raw_data, cols, top_left_cell, right_cell)
 
 
 # ============================================================================
@@ -184,6 +279,7 @@ def create_stock_selector(all_tickers: list) -> tuple:
 # ============================================================================
 
 
+@timed("dashboard.display_performance_metrics")
 def display_performance_metrics(cols: list, max_stock: tuple, min_stock: tuple):
     """Display best and worst performing stock metrics"""
     bottom_left_cell = cols[0].container(
@@ -209,13 +305,15 @@ def display_performance_metrics(cols: list, max_stock: tuple, min_stock: tuple):
         )
 
 
-def create_price_chart(normalized: pd.DataFrame) -> alt.Chart:
-    """Create an Altair line chart for normalized stock prices"""
-    chart_data = normalized.reset_index().melt(
-        id_vars=["Date"], var_name="Stock", value_name="Normalized price"
-    )
+def create_price_chart(
+    chart_data: pd.DataFrame, overlays: pd.DataFrame | None = None
+) -> alt.Chart:
+    """Create an Altair line chart from long-form normalized stock prices
 
-    return (
+    ``overlays`` is a ``get_indicator_frame`` result: price-like indicators
+    are drawn dashed over the prices, the rest in small panels below.
+    """
+    chart = (
         alt.Chart(chart_data)
         .mark_line()
         .encode(
@@ -225,12 +323,58 @@ def create_price_chart(normalized: pd.DataFrame) -> alt.Chart:
         )
         .properties(height=400)
     )
+    if overlays is None or overlays.empty:
+        return chart
+
+    on_price = overlays[overlays["Panel"] == "price"]
+    if not on_price.empty:
+        chart += (
+            alt.Chart(on_price)
+            .mark_line(strokeDash=[4, 3], strokeWidth=1)
+            .encode(
+                alt.X("Date:T"),
+                alt.Y("Value:Q"),
+                alt.Color("Stock:N"),
+                alt.Detail("Indicator:N"),
+                tooltip=[
+                    "Stock:N",
+                    "Indicator:N",
+                    "Date:T",
+                    alt.Tooltip("Value:Q", format=".3f"),
+                ],
+            )
+        )
 
-
-def display_comparison_chart(right_cell, normalized: pd.DataFrame):
+    panels = [
+        alt.Chart(overlays[overlays["Panel"] == panel])
+        .mark_line(strokeWidth=1)
+        .encode(
+            alt.X("Date:T"),
+            alt.Y("Value:Q", title=panel).scale(zero=False),
+            alt.Color("Stock:N"),
+            tooltip=[
+                "Stock:N",
+                "Indicator:N",
+                "Date:T",
+                alt.Tooltip("Value:Q", format=".1f"),
+            ],
+        )
+        .properties(height=120)
+        for panel in overlays["Panel"].unique()
+        if panel != "price"
+    ]
+    if panels:
+        chart = alt.vconcat(chart, *panels).resolve_scale(x="shared")
+    return chart
+
+
+@timed("dashboard.display_comparison_chart")
+def display_comparison_chart(
+    right_cell, chart_data: pd.DataFrame, overlays: pd.DataFrame | None = None
+):
     """Display the stock price comparison chart"""
     with right_cell:
-        chart = create_price_chart(normalized)
+        chart = create_price_chart(chart_data, overlays)
         st.altair_chart(chart)
 
 
@@ -242,7 +386,7 @@ def display_comparison_chart(right_cell, normalized: pd.DataFrame):
 def confirm_purchase_modal(ticker: str, quantity: int):
     """Modal dialog to confirm stock purchase before executing"""
     try:
-        current_price = get_current_stock_price(ticker)
+        current_price = dialog_quote("buy", ticker, quantity)
         total_cost = current_price * quantity
 
         # Display purchase details
@@ -268,44 +412,60 @@ def confirm_purchase_modal(ticker: str, quantity: int):
         # Action buttons
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("✅ Confirm Purchase", use_container_width=True):
-                execute_stock_purchase(ticker, quantity)
+            if st.button(
+                "✅ Confirm Purchase", key="confirm_buy", use_container_width=True
+            ):
+                if not price_moved("buy", ticker, current_price):
+                    execute_stock_purchase(ticker, quantity, current_price)
         with col2:
             if st.button("❌ Cancel", use_container_width=True):
+                st.session_state.pop("buy_quote", None)
                 st.rerun()
     except Exception as e:
         st.error(f"Error loading price: {str(e)}")
 
 
-def execute_stock_purchase(ticker: str, quantity: int) -> bool:
-    """Execute stock purchase and update wallet balance and portfolio"""
-    stock_data = yf.Ticker(ticker)
-    current_price = stock_data.history(period="1d")["Close"].iloc[-1]
+def execute_stock_purchase(
+    ticker: str, quantity: int, current_price: float | None = None
+) -> bool:
+    """Execute stock purchase and update wallet balance and portfolio
+
+    ``current_price`` is the price the user confirmed; without it the live
+    quote is used, as for the rest of the dashboard.
+    """
+    if current_price is None:
+        current_price = get_live_stock_price(ticker)
     total_cost = current_price * quantity
+    username = st.session_state.get("username")
 
-    if total_cost > st.session_state.wallet_balance:
+    # Debit atomically: a resting order may have spent the funds since the
+    # session balance was read
+    new_balance = adjust_wallet_balance(username, -total_cost, min_balance=0)
+    if new_balance is None:
+        sync_wallet_balance()
         st.error("Insufficient funds to complete the purchase.")
         return False
-    else:
-        # Update wallet balance
-        st.session_state.wallet_balance -= total_cost
-        save_wallet_balance()
+    st.session_state.wallet_balance = new_balance
 
-        # Add stock to portfolio
-        username = st.session_state.get("username")
-        add_stock_to_portfolio(username, ticker, current_price, quantity)
+    # Add stock to portfolio
+    add_stock_to_portfolio(username, ticker, current_price, quantity)
 
-        st.success(f"Purchased {quantity} shares of {ticker} for ${total_cost:,.2f}.")
-        st.rerun()
-        return True
+    st.session_state.pop("buy_quote", None)
+    st.success(f"Purchased {quantity} shares of {ticker} for ${total_cost:,.2f}.")
+    st.rerun()
+    return True
 
 
-def execute_stock_sale(ticker: str, quantity: int) -> bool:
+def execute_stock_sale(
+    ticker: str, quantity: int, current_price: float | None = None
+) -> bool:
+    """Execute a stock sale at ``current_price`` (the price the user
+    confirmed; the live quote without it)"""
     try:
         username = st.session_state.get("username")
 
-        # Get current market price
-        current_price = get_current_stock_price(ticker)
+        if current_price is None:
+            current_price = get_live_stock_price(ticker)
 
         # Get user portfolio
         user_portfolio = get_user_portfolio(username)
@@ -325,12 +485,18 @@ def execute_stock_sale(ticker: str, quantity: int) -> bool:
         cost_basis = avg_cost * quantity
         profit_loss = sale_value - cost_basis
 
-        # Add money to wallet
-        st.session_state.wallet_balance += sale_value
-        save_wallet_balance()
+        # Remove shares first, and only pay out if they were still there
+        if not remove_from_portfolio(
+            username, ticker, quantity, sale_price=current_price
+        ):
+            st.error(f"You no longer hold {quantity} shares of {ticker}.")
+            return False
+        st.session_state.pop("sell_quote", None)
 
-        # Remove shares
-        remove_from_portfolio(username, ticker, quantity)
+        # Add money to wallet
+        new_balance = adjust_wallet_balance(username, sale_value)
+        if new_balance is not None:
+            st.session_state.wallet_balance = new_balance
 
         if profit_loss >= 0:
             st.success(
@@ -351,12 +517,15 @@ def execute_stock_sale(ticker: str, quantity: int) -> bool:
         return False
 
 
-def calculate_fifo_sale_preview(username: str, ticker: str, quantity: int):
+def calculate_fifo_sale_preview(
+    username: str, ticker: str, quantity: int, current_price: float | None = None
+):
     """
     Simulate FIFO sale and return:
     (current_price, total_sale_value, total_cost_basis, profit_loss)
     """
-    current_price = get_current_stock_price(ticker)
+    if current_price is None:
+        current_price = get_live_stock_price(ticker)
     user_portfolio = get_user_portfolio(username)
 
     # Filter ticker
@@ -394,7 +563,9 @@ def confirm_sale_modal(ticker: str, quantity: int):
 
     try:
         current_price, sale_value, cost_basis, profit_loss = (
-            calculate_fifo_sale_preview(username, ticker, quantity)
+            calculate_fifo_sale_preview(
+                username, ticker, quantity, dialog_quote("sell", ticker, quantity)
+            )
         )
 
         st.markdown(f"### Sale Details for **{ticker}**")
@@ -429,22 +600,190 @@ def confirm_sale_modal(ticker: str, quantity: int):
         col1, col2 = st.columns(2)
 
         with col1:
-            if st.button("✅ Confirm Sale", use_container_width=True):
-                execute_stock_sale(ticker, quantity)
+            if st.button("✅ Confirm Sale", key="confirm_sell", use_container_width=True):
+                if not price_moved("sell", ticker, current_price):
+                    execute_stock_sale(ticker, quantity, current_price)
 
         with col2:
             if st.button("❌ Cancel", use_container_width=True):
+                st.session_state.pop("sell_quote", None)
                 st.rerun()
 
     except Exception as e:
         st.error(f"Error calculating sale preview: {str(e)}")
 
 
+def order_type_inputs(side: str) -> tuple[str, float | None]:
+    """Order type picker plus a trigger price input for limit/stop orders"""
+    order_type = st.segmented_control(
+        "Order type", ORDER_TYPES, default="Market", key=f"{side}_order_type"
+    )
+    if order_type in (None, "Market"):
+        return "Market", None
+    price = st.number_input(
+        f"{order_type} price",
+        min_value=0.01,
+        value=None,
+        step=0.01,
+        format="%.2f",
+        key=f"{side}_order_price",
+        help=(
+            f"{side.title()} when the price reaches this level"
+            if order_type == "Stop"
+            else f"{side.title()} at this price or better"
+        ),
+    )
+    return order_type, price
+
+
+def submit_resting_order(
+    side: str, ticker: str, quantity: int, order_type: str, price: float | None
+):
+    """Place a limit or stop order for the current user"""
+    if price is None:
+        st.error(f"Enter a {order_type.lower()} price.")
+        return
+    place_order(
+        st.session_state.username, ticker, side, order_type.lower(), quantity, price
+    )
+    st.success(
+        f"{order_type} order placed: {side} {quantity} {ticker} at ${price:,.2f}."
+    )
+
+
+def display_open_orders(username: str):
+    """List the user's resting orders with a cancel button each"""
+    orders = get_user_orders(username)
+    if not orders:
+        return
+    with st.container(border=True):
+        st.subheader("Open Orders")
+        for order in orders:
+            col1, col2 = st.columns([5, 1])
+            col1.markdown(
+                f"- {order['type'].title()} {order['side']} **{order['quantity']}** "
+                f"**{order['ticker']}** at **${order['price']:,.2f}**"
+            )
+            if col2.button("Cancel", key=f"cancel_{order['_id']}"):
+                cancel_order(username, order["_id"])
+                st.rerun(scope="fragment")
+
+
+def report_order_fills(fills: list[dict]):
+    """Toast the outcome of resting orders that just triggered"""
+    for order in fills:
+        if order["status"] == "filled":
+            st.toast(
+                f"{order['type'].title()} {order['side']} filled: {order['quantity']} "
+                f"{order['ticker']} at ${order['fill_price']:,.2f}"
+            )
+        else:
+            st.toast(
+                f"{order['type'].title()} {order['side']} of {order['ticker']} "
+                "rejected (insufficient funds or shares)"
+            )
+    if fills:
+        sync_wallet_balance()
+
+
+def report_triggered_alerts(username: str):
+    """Show alerts the background worker fired since the last render"""
+    get_alert_worker()
+    if not username:
+        return
+    for alert in pop_triggered_alerts(username):
+        st.toast(
+            f"{alert['ticker']} alert: {ALERT_KINDS[alert['kind']].lower()} "
+            f"{describe_threshold(alert)} (now ${alert['trigger_price']:,.2f})",
+            icon=":material/notifications_active:",
+        )
+
+
+def describe_threshold(alert: dict) -> str:
+    if alert["kind"] == "pct_move":
+        return f"{alert['threshold']:g}% from ${alert['reference_price']:,.2f}"
+    return f"${alert['threshold']:,.2f}"
+
+
+def display_alerts_section(username: str, tickers: list):
+    """Watchlist editor, new-alert form and the user's active alerts"""
+    with st.expander(":material/notifications: Alerts & Watchlist"):
+        watchlist = get_watchlist(username)
+        universe = load_ticker_universe()
+        new_watchlist = st.multiselect(
+            "Watchlist",
+            options=universe.options_with(watchlist + tickers),
+            default=watchlist,
+            accept_new_options=True,
+            key="watchlist",
+        )
+        new_watchlist = [t.upper() for t in new_watchlist]
+        if new_watchlist != watchlist:
+            set_watchlist(username, new_watchlist)
+
+        alert_tickers = list(dict.fromkeys(new_watchlist + tickers))
+        if alert_tickers:
+            col1, col2, col3, col4 = st.columns([2, 2, 2, 1], vertical_alignment="bottom")
+            ticker = col1.selectbox("Ticker", alert_tickers, key="alert_ticker")
+            kind = col2.selectbox(
+                "Condition",
+                list(ALERT_KINDS),
+                format_func=ALERT_KINDS.get,
+                key="alert_kind",
+            )
+            threshold = col3.number_input(
+                "Percent" if kind == "pct_move" else "Price",
+                min_value=0.01,
+                value=None,
+                step=0.01,
+                format="%.2f",
+                key="alert_threshold",
+            )
+            if col4.button("Add alert", use_container_width=True):
+                if threshold is None:
+                    st.error("Enter a threshold.")
+                else:
+                    reference = (
+                        get_live_stock_price(ticker) if kind == "pct_move" else None
+                    )
+                    create_alert(username, ticker, kind, threshold, reference)
+                    st.rerun(scope="fragment")
+        else:
+            st.info("Add stocks to your watchlist to set alerts on them.")
+
+        for alert in get_user_alerts(username):
+            col1, col2 = st.columns([5, 1])
+            col1.markdown(
+                f"- **{alert['ticker']}**: {ALERT_KINDS[alert['kind']].lower()} "
+                f"{describe_threshold(alert)}"
+            )
+            if col2.button("Delete", key=f"delete_alert_{alert['_id']}"):
+                delete_alert(username, alert["_id"])
+                st.rerun(scope="fragment")
+
+
+def watch_quotes(tickers: list, user_portfolio: list[dict]):
+    """Ask the quote streamer (if enabled) to keep these tickers up to date"""
+    streamer = get_quote_streamer()
+    if streamer is not None and st.session_state.get("username"):
+        held = {stock["stock_ticker"] for stock in user_portfolio}
+        watched = set(get_watchlist(st.session_state.username))
+        streamer.watch(st.session_state.username, held | watched | set(tickers))
+
+
+@timed("dashboard.display_trading_section")
 def display_trading_section(tickers: list):
     """Display stock trading interface"""
     st.markdown(
         "## :material/trending_up: Trading\n\nBuy and manage your stock portfolio."
     )
+    if get_quote_streamer() is None:
+        # No background matching without streaming; check on each render
+        report_order_fills(
+            check_user_orders(st.session_state.username, get_live_stock_price)
+        )
+    user_portfolio = get_user_portfolio(username=st.session_state.username)
+    watch_quotes(tickers, user_portfolio)
 
     trading_col1, trading_col2, trading_col3, trading_col4 = st.columns([1, 1, 1, 1])
 
@@ -456,14 +795,19 @@ def display_trading_section(tickers: list):
                 quantity_to_buy = st.number_input(
                     "Enter Quantity to Buy", min_value=1, step=1, value=1
                 )
+                order_type, order_price = order_type_inputs("buy")
                 if st.button("Buy", use_container_width=True):
-                    confirm_purchase_modal(stock_to_buy, quantity_to_buy)
+                    if order_type == "Market":
+                        confirm_purchase_modal(stock_to_buy, quantity_to_buy)
+                    else:
+                        submit_resting_order(
+                            "buy", stock_to_buy, quantity_to_buy, order_type, order_price
+                        )
             else:
                 st.info("Select stocks above to buy")
     with trading_col2:
         with st.container(border=True):
             st.subheader("Sell Stocks")
-            user_portfolio = get_user_portfolio(username=st.session_state.username)
             if user_portfolio:
                 # Create a list of owned stocks for selling
                 owned_stocks = {}
@@ -487,15 +831,24 @@ def display_trading_section(tickers: list):
                     value=1,
                 )
 
+                order_type, order_price = order_type_inputs("sell")
                 if st.button("Sell", use_container_width=True):
-                    confirm_sale_modal(stock_to_sell, quantity_to_sell)
+                    if order_type == "Market":
+                        confirm_sale_modal(stock_to_sell, quantity_to_sell)
+                    else:
+                        submit_resting_order(
+                            "sell", stock_to_sell, quantity_to_sell, order_type, order_price
+                        )
             else:
                 st.info("You don't own any stocks to sell yet.")
 
     with trading_col3:
         with st.container(border=True):
             st.subheader("Your Portfolio")
-            user_portfolio = get_user_portfolio(username=st.session_state.username)
+            realized_pnl = replay_ledger(st.session_state.username)["realized_pnl"]
+            st.caption(
+                f"Realized P&L: {'+' if realized_pnl >= 0 else '-'}${abs(realized_pnl):,.2f}"
+            )
             if user_portfolio:
                 # condense multiple stocks into one row with quantity and the ticker, no timestamps needed
                 condensed_portfolio = {}
@@ -526,9 +879,20 @@ def display_trading_section(tickers: list):
     with trading_col4:
         with st.container(border=True):
             st.subheader("Recent Transactions")
-            user_portfolio = get_user_portfolio(username=st.session_state.username)
-            if user_portfolio:
-                # don't show as table, just rows with the ticker, quantity, price, and timestamp
+            trades = get_trade_history(st.session_state.username, limit=20)
+            if trades:
+                for trade in trades:
+                    line = (
+                        f"- {'Bought' if trade['side'] == 'buy' else 'Sold'} "
+                        f"**{trade['quantity']}** shares "
+                        f"of **{trade['ticker']}** at **${trade['price']:.2f}**"
+                    )
+                    if "cost_basis" in trade:
+                        pnl = trade["quantity"] * trade["price"] - trade["cost_basis"]
+                        line += f" ({'+' if pnl >= 0 else '-'}${abs(pnl):,.2f})"
+                    st.markdown(line)
+            elif user_portfolio:
+                # Lots bought before the trade ledger existed
                 for stock in user_portfolio:
                     st.markdown(
                         f"- Bought **{stock['stock_quantity']}** shares of **{stock['stock_ticker']}** at **${stock['stock_price']:.2f}**"
@@ -536,6 +900,9 @@ def display_trading_section(tickers: list):
             else:
                 st.info("No transactions yet. Buy some stocks to see them here!")
 
+    display_open_orders(st.session_state.username)
+    display_alerts_section(st.session_state.username, tickers)
+
 
 # ============================================================================
 # Main Application
@@ -543,53 +910,96 @@ def display_trading_section(tickers: list):
 
 
 def main():
-    """Main application flow"""
-    # Initialize
-    initialize_session_state()
-    initialize_tickers_input()
-
-    # Display header
-    display_header()
-
-    # Get stock selections
-    all_tickers = get_ticker_list()
-    tickers, horizon, cols, top_left_cell, right_cell = create_stock_selector(
-        all_tickers
-    )
+    """Main application flow, profiled per rerun when profiling is enabled"""
+    with profiled_run("dashboard"):
+        # Initialize
+        initialize_session_state()
+        sync_wallet_balance()
+        report_triggered_alerts(st.session_state.get("username"))
+        initialize_tickers_input()
+
+        header_fragment()
+        comparison_fragment()
+        trading_fragment()
+
+
+# Each fragment reruns on its own when one of its widgets changes, so e.g.
+# editing the buy quantity doesn't recompute net worth or rebuild the chart.
+
+
+@st.fragment
+def header_fragment():
+    """Header with wallet balance and (cached) net worth"""
+    with profiled_run("dashboard.header"):
+        display_header()
+
+
+@st.fragment
+def comparison_fragment():
+    """Stock selector, performance metrics and comparison chart"""
+    with profiled_run("dashboard.comparison"):
+        # Get stock selections
+        with section("dashboard.load_ticker_universe"):
+            universe = load_ticker_universe()
+        tickers, horizon, indicators, raw_data, cols, top_left_cell, right_cell = (
+            create_stock_selector(universe)
+        )
+
+        # Normalize tickers
+        tickers = [t.upper() for t in tickers]
+        update_query_params(tickers)
+
+        # The trading fragment offers the selected tickers, so a selection
+        # change made in a fragment-only rerun has to refresh the whole page
+        previous = st.session_state.get("selected_tickers")
+        st.session_state.selected_tickers = tickers
+        if previous is not None and previous != tickers:
+            st.rerun(scope="app")
+
+        # Validate selection
+        if not tickers:
+            top_left_cell.info("Pick some stocks to compare", icon=":material/info:")
+            return
+
+        # Load and validate data (only tickers not seen before are fetched)
+        engine = get_comparison_engine()
+        try:
+            with section("dashboard.load_stock_data"):
+                engine.ensure(tickers)
+        except yf.exceptions.YFRateLimitError as e:
+            st.warning("YFinance is rate-limiting us :(\nTry again later.")
+            load_stock_data.clear()
+            return
+
+        # Check for errors
+        empty_columns = engine.invalid_tickers(tickers)
+        if empty_columns:
+            st.error(f"Error loading data for the tickers: {', '.join(empty_columns)}.")
+            return
+
+        # Process data
+        period = HORIZON_MAP[horizon]
+        with section("dashboard.process_data"):
+            max_stock, min_stock = engine.performance(tickers, period)
+            chart_data = get_chart_frame(tuple(tickers), period, raw=raw_data)
+            overlays = (
+                get_indicator_frame(
+                    tuple(tickers), period, tuple(indicators), raw=raw_data
+                )
+                if indicators
+                else None
+            )
 
-    # Normalize tickers
-    tickers = [t.upper() for t in tickers]
-    update_query_params(tickers)
+        # Display comparison section
+        display_performance_metrics(cols, max_stock, min_stock)
+        display_comparison_chart(right_cell, chart_data, overlays)
 
-    # Validate selection
-    if not tickers:
-        top_left_cell.info("Pick some stocks to compare", icon=":material/info:")
-        st.stop()
 
-    # Load and validate data
-    try:
-        data = load_stock_data(tickers, HORIZON_MAP[horizon])
-    except yf.exceptions.YFRateLimitError as e:
-        st.warning("YFinance is rate-limiting us :(\nTry again later.")
-        load_stock_data.clear()
-        st.stop()
-
-    # Check for errors
-    empty_columns = validate_stock_data(data)
-    if empty_columns:
-        st.error(f"Error loading data for the tickers: {', '.join(empty_columns)}.")
-        st.stop()
-
-    # Process data
-    normalized = normalize_prices(data)
-    max_stock, min_stock = calculate_performance(normalized, tickers)
-
-    # Display comparison section
-    display_performance_metrics(cols, max_stock, min_stock)
-    display_comparison_chart(right_cell, normalized)
-
-    # Display trading section
-    display_trading_section(tickers)
+@st.fragment
+def trading_fragment():
+    """Buy/sell forms, portfolio and recent transactions"""
+    with profiled_run("dashboard.trading"):
+        display_trading_section(st.session_state.get("selected_tickers", []))
 
 
 if __name__ == "__main__":
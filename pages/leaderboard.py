@@ -1,5 +1,6 @@
 import streamlit as st
 from database import get_all_users_net_worth
+from profiler import profiled_run
 
 # ── Page config ──────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Leaderboard", page_icon="🏆", layout="centered")
@@ -254,4 +255,5 @@ def display_leaderboard():
         """, unsafe_allow_html=True)
 
 
-display_leaderboard()
\ No newline at end of file
+with profiled_run("leaderboard"):
+    display_leaderboard()
\ No newline at end of file
@@ -1,11 +1,29 @@
 from datetime import datetime, timedelta
 
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import altair as alt
 
+from database import get_user_portfolio
+from downsample import downsample_frame
+from market_data import get_market_data_provider
+from portfolio_risk import (
+    estimate_return_moments,
+    simulate_portfolio_paths,
+    value_at_risk,
+)
+from simulation import (
+    MODELS,
+    SAMPLING_METHODS,
+    fit_model,
+    simulate_paths,
+    summarize_run,
+)
+from simulation_cache import get_result_cache
+from ticker import load_stock_data
+from ticker_universe import load_ticker_universe
+
 
 # ============================================================================
 # Configuration
@@ -17,6 +35,19 @@ st.set_page_config(
     layout="wide",
 )
 
+SEED = 42
+
+SINGLE_MODE = "Single ticker"
+PORTFOLIO_MODE = "My portfolio"
+
+DISCLAIMER = (
+    "⚠ This tool is for educational and research purposes only. "
+    "Every model is calibrated to past prices and assumes the future looks "
+    "like that history; GBM in particular assumes constant drift and "
+    "volatility and ignores jumps, fat tails, and regime changes. "
+    "Not financial advice."
+)
+
 
 # ============================================================================
 # Helper Functions
@@ -25,58 +56,36 @@ st.set_page_config(
 
 @st.cache_data(show_spinner=False)
 def fetch_data(ticker: str, years: int = 2) -> pd.DataFrame:
-    """Fetch historical stock data from Yahoo Finance."""
+    """Fetch historical stock data from the configured market data provider."""
     end = datetime.today()
     start = end - timedelta(days=365 * years)
-    df = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=True)
+    data = get_market_data_provider().history([ticker], start=start, end=end)
+    df = data["Close"][[ticker]].dropna()
     if df.empty:
         return pd.DataFrame()
-    df = df[["Close"]].dropna()
     df.columns = ["close"]
     return df
 
 
-def compute_gbm_params(prices: pd.Series) -> tuple:
-    """Estimate µ (drift) and σ (volatility) from log returns."""
-    log_ret = np.log(prices / prices.shift(1)).dropna()
-    mu = log_ret.mean()
-    sigma = log_ret.std()
-    return float(mu), float(sigma)
-
-
-def run_simulation(
-    last_price: float,
-    mu: float,
-    sigma: float,
-    n_days: int,
-    n_sims: int,
-    seed: int = 42,
-) -> np.ndarray:
-    """Generate Monte Carlo simulation paths using Geometric Brownian Motion.
-
-    Returns array of shape (n_sims, n_days+1).
-    """
-    rng = np.random.default_rng(seed)
-    dt = 1
-    paths = np.empty((n_sims, n_days + 1))
-    paths[:, 0] = last_price
-    shocks = rng.standard_normal((n_sims, n_days))
-    drift = (mu - 0.5 * sigma**2) * dt
-    diffusion = sigma * np.sqrt(dt)
-    for t in range(1, n_days + 1):
-        paths[:, t] = paths[:, t - 1] * np.exp(drift + diffusion * shocks[:, t - 1])
-    return paths
+@st.cache_data(show_spinner=False, ttl="1h")
+def get_model_params(ticker: str, years: int, model: str) -> dict:
+    """Fit ``model`` to a ticker's history; cached per (ticker, years, model)."""
+    return fit_model(model, fetch_data(ticker, years)["close"])
 
 
 def build_simulation_chart(
     hist: pd.DataFrame,
-    paths: np.ndarray,
+    result: dict,
     ticker: str,
     n_days: int,
     percentiles: list,
     show_paths: int,
+    raw: bool = False,
 ) -> alt.Chart:
-    """Build Altair chart with historical price, simulated paths, and percentile bands."""
+    """Build Altair chart with historical price, simulated paths, and percentile bands.
+
+    ``result`` is a ``summarize_run`` digest. The historical trace is downsampled to the chart width unless ``raw``.
+    """
 
     future_dates = pd.bdate_range(start=hist.index[-1], periods=n_days + 1)
 
@@ -84,6 +93,8 @@ def build_simulation_chart(
     hist_df = hist.reset_index()
     hist_df.columns = ["Date", "Price"]
     hist_df["Type"] = "Historical"
+    if not raw:
+        hist_df = downsample_frame(hist_df, "Date", "Price")
 
     hist_chart = (
         alt.Chart(hist_df)
@@ -95,17 +106,18 @@ def build_simulation_chart(
             tooltip=["Date:T", alt.Tooltip("Price:Q", format="$.2f")],
         )
         .properties(
-            title=f"{ticker.upper()} · {paths.shape[0]:,} simulations · {n_days}d horizon"
+            title=f"{ticker.upper()} · {result['n_sims']:,} simulations · {n_days}d horizon"
         )
     )
 
     # ── Sample simulation paths ───────────────────────────────────────────
-    n_show = min(show_paths, paths.shape[0])
-    idx_show = np.linspace(0, paths.shape[0] - 1, n_show, dtype=int)
+    sample_paths = result["sample_paths"]
+    n_show = min(show_paths, len(sample_paths))
+    idx_show = np.linspace(0, len(sample_paths) - 1, n_show, dtype=int)
 
     paths_list = []
     for sim_idx in idx_show:
-        for day, price in enumerate(paths[sim_idx]):
+        for day, price in enumerate(sample_paths[sim_idx]):
             paths_list.append(
                 {
                     "Date": future_dates[day],
@@ -139,8 +151,7 @@ def build_simulation_chart(
 
     pct_list = []
     for p in sorted(percentiles):
-        band = np.percentile(paths, p, axis=0)
-        for day, price in enumerate(band):
+        for day, price in enumerate(result["bands"][p]):
             pct_list.append(
                 {
                     "Date": future_dates[day],
@@ -189,23 +200,19 @@ def build_simulation_chart(
     return combined
 
 
-def build_distribution_chart(paths: np.ndarray, percentiles: list) -> alt.Chart:
+def build_distribution_chart(result: dict, percentiles: list) -> alt.Chart:
     """Build Altair histogram of final price distribution with percentile markers."""
 
-    finals = paths[:, -1]
-
     # Create histogram data
     hist_data = []
-    bin_edges = np.histogram_bin_edges(finals, bins=50)
-    for i in range(len(bin_edges) - 1):
-        mask = (finals >= bin_edges[i]) & (finals < bin_edges[i + 1])
-        count = mask.sum()
+    bin_edges = result["hist_edges"]
+    for i, count in enumerate(result["hist_counts"]):
         if count > 0:
             hist_data.append(
                 {
                     "PriceRange": f"${bin_edges[i]:.0f}-${bin_edges[i + 1]:.0f}",
                     "Price": (bin_edges[i] + bin_edges[i + 1]) / 2,
-                    "Count": count,
+                    "Count": int(count),
                 }
             )
 
@@ -226,7 +233,7 @@ def build_distribution_chart(paths: np.ndarray, percentiles: list) -> alt.Chart:
     rule_data = []
     for p in [10, 50, 90]:
         if p in percentiles:
-            val = np.percentile(finals, p)
+            val = float(result["bands"][p][-1])
             rule_data.append({"Percentile": f"P{p}", "Value": val})
 
     rule_df = pd.DataFrame(rule_data)
@@ -256,26 +263,123 @@ def build_distribution_chart(paths: np.ndarray, percentiles: list) -> alt.Chart:
     return combined
 
 
+def get_positions(username: str) -> dict:
+    """Aggregate the user's lots into {ticker: total quantity}."""
+    positions = {}
+    for stock in get_user_portfolio(username):
+        ticker = stock["stock_ticker"]
+        positions[ticker] = positions.get(ticker, 0) + stock["stock_quantity"]
+    return positions
+
+
+def run_portfolio_mode(
+    history_years: int,
+    n_simulations: int,
+    n_days: int,
+    show_paths: int,
+    percentiles: list,
+    raw_data: bool,
+):
+    """Simulate the logged-in user's whole portfolio with correlated assets."""
+    positions = get_positions(st.session_state.get("username"))
+    if not positions:
+        st.info("Your portfolio is empty. Buy some stocks on the dashboard first.")
+        st.stop()
+
+    tickers = sorted(positions)
+    # Providers only know some year periods ("3y" isn't one): load the
+    # smallest that covers the requested history and trim it
+    period = next(f"{years}y" for years in (1, 2, 5, 10) if years >= history_years)
+    with st.spinner(f"Fetching {', '.join(tickers)}…"):
+        closes = load_stock_data(tickers, period)[tickers]
+    closes = closes[
+        closes.index > closes.index.max() - pd.DateOffset(years=history_years)
+    ].dropna(how="all")
+
+    missing = closes.columns[closes.isna().all()].tolist()
+    if missing:
+        st.error(f"Could not retrieve data for: {', '.join(missing)}.")
+        st.stop()
+
+    closes = closes.ffill().dropna()
+    quantities = np.array([positions[t] for t in tickers], dtype=float)
+    last_prices = closes.iloc[-1].to_numpy()
+    mu, cov = estimate_return_moments(closes)
+
+    with st.spinner("Running correlated simulations…"):
+        paths = simulate_portfolio_paths(
+            last_prices, quantities, mu, cov, n_days, n_simulations
+        )
+
+    initial = float(paths[0, 0])
+    finals = paths[:, -1]
+    var95, cvar95 = value_at_risk(finals, initial, 0.95)
+    var99, cvar99 = value_at_risk(finals, initial, 0.99)
+    p50 = float(np.median(finals))
+    result = summarize_run(paths, initial)
+
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("Holdings value", f"${initial:,.2f}")
+    m2.metric(f"Median ({n_days}d)", f"${p50:,.2f}", f"{(p50 / initial - 1) * 100:+.1f}%")
+    m3.metric("VaR 95%", f"${var95:,.2f}")
+    m4.metric("CVaR 95%", f"${cvar95:,.2f}")
+    m5.metric("VaR / CVaR 99%", f"${var99:,.0f} / ${cvar99:,.0f}")
+    m6.metric("P(Loss)", f"{(finals < initial).mean() * 100:.1f}%")
+
+    with st.expander("Return correlations"):
+        std = np.sqrt(np.diag(cov))
+        st.dataframe(
+            pd.DataFrame(cov / np.outer(std, std), index=tickers, columns=tickers)
+            .style.format("{:.2f}"),
+            width="stretch",
+        )
+
+    st.divider()
+
+    hist = (closes @ quantities).to_frame("close")
+    st.altair_chart(
+        build_simulation_chart(
+            hist, result, "Portfolio", n_days, percentiles or [50], show_paths, raw=raw_data
+        ),
+        width="stretch",
+    )
+    st.altair_chart(
+        build_distribution_chart(result, percentiles or [50]), width="stretch"
+    )
+    st.warning(DISCLAIMER)
+
+
 # ============================================================================
 # Main Content
 # ============================================================================
 
 st.title("Monte Carlo Simulation")
-st.caption("GBM Stock Price Simulator")
+st.caption("Stochastic Stock Price Simulator")
 
 st.divider()
 
 # Parameters
 st.markdown("## Parameters")
 
+mode = st.segmented_control(
+    "Mode",
+    [SINGLE_MODE, PORTFOLIO_MODE],
+    default=SINGLE_MODE,
+    help="Simulate one ticker, or all your holdings with correlated returns",
+)
+
 c1, c2, c3, c4 = st.columns(4)
 
 with c1:
-    ticker = (
-        st.text_input("Ticker", value="AAPL", help="Any valid Yahoo Finance ticker")
-        .upper()
-        .strip()
-    )
+    if mode == PORTFOLIO_MODE:
+        ticker = "PORTFOLIO"
+        st.text_input("Ticker", value="Your holdings", disabled=True)
+    else:
+        ticker = (
+            st.text_input("Ticker", value="AAPL", help="Any valid Yahoo Finance ticker")
+            .upper()
+            .strip()
+        )
 
 with c2:
     history_years = st.slider(
@@ -289,7 +393,7 @@ with c2:
 with c3:
     n_simulations = st.select_slider(
         "Simulations",
-        options=[100, 250, 500, 1000, 2000, 5000],
+        options=[100, 250, 500, 1000, 2000, 5000, 10000],
         value=500,
     )
 
@@ -298,10 +402,13 @@ with c4:
         "Forecast horizon (days)", 30, 252, 126, help="Trading days into the future"
     )
 
-c5, c6, c7 = st.columns(3)
+c5, c6, c7, c8 = st.columns(4)
 
 with c5:
     show_paths = st.slider("Visible sample paths", 10, 300, 80)
+    raw_data = st.toggle(
+        "Show raw history", help="Plot every daily bar instead of a downsampled line"
+    )
 
 with c6:
     pct_options = [5, 10, 25, 50, 75, 90, 95]
@@ -312,43 +419,133 @@ with c6:
     )
 
 with c7:
+    model = st.selectbox(
+        "Model",
+        options=list(MODELS),
+        format_func=lambda name: MODELS[name].label,
+        disabled=mode == PORTFOLIO_MODE,
+        help="Stochastic process for the single-ticker simulation",
+    )
+    sampling = st.selectbox(
+        "Variance reduction",
+        options=list(SAMPLING_METHODS),
+        format_func=SAMPLING_METHODS.get,
+        disabled=mode == PORTFOLIO_MODE,
+        help="Sampling scheme for the single-ticker estimates; "
+        "better schemes reach the same precision with fewer paths",
+    )
+
+with c8:
     st.write("")
     st.write("")
     run_btn = st.button("RUN SIMULATION")
 
 st.divider()
 
-if not run_btn:
-    st.info(
-        "Configure parameters above and press **RUN SIMULATION**. "
-        "Paths are generated using Geometric Brownian Motion calibrated to historical log-returns."
-    )
+shared_run = st.query_params.get("run")
+
+if mode == PORTFOLIO_MODE:
+    if run_btn:
+        st.query_params.pop("run", None)
+        run_portfolio_mode(
+            history_years, n_simulations, n_days, show_paths, percentiles, raw_data
+        )
+    else:
+        st.info("Press **RUN SIMULATION** to simulate your current holdings.")
     st.stop()
 
-# ── Fetch & validate ──────────────────────────────────────────────────────────
-with st.spinner(f"Fetching {ticker}…"):
-    hist = fetch_data(ticker, years=history_years)
+if run_btn:
+    # ── Fetch & validate ──────────────────────────────────────────────────────
+    with st.spinner(f"Fetching {ticker}…"):
+        hist = fetch_data(ticker, years=history_years)
+
+    if hist.empty:
+        suggestions = load_ticker_universe().fuzzy_search(ticker, limit=5)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        st.error(
+            f"Could not retrieve data for **{ticker}**. "
+            f"Check the ticker and try again.{hint}"
+        )
+        st.stop()
+
+    # ── Compute parameters & run (or reuse) the simulation ────────────────────
+    params = get_model_params(ticker, history_years, model)
+    last_price = float(hist["close"].iloc[-1])
+    inputs = {
+        "ticker": ticker,
+        "history_years": history_years,
+        "history_end": str(hist.index[-1]),
+        "model": model,
+        "sampling": sampling,
+        "n_sims": n_simulations,
+        "n_days": n_days,
+        "seed": SEED,
+    }
 
-if hist.empty:
-    st.error(
-        f"Could not retrieve data for **{ticker}**. Check the ticker and try again."
-    )
-    st.stop()
+    def compute_result() -> dict:
+        paths = simulate_paths(
+            model, params, last_price, n_days, n_simulations, SEED, sampling
+        )
+        expected_final = last_price * MODELS[model].expected_growth(params, n_days)
+        result = summarize_run(paths, last_price, sampling, expected_final)
+        # The history the run was fitted to, so a shared link charts the
+        # same series even after the provider has moved on
+        result.update(
+            inputs=inputs,
+            last_price=last_price,
+            mu=params["mu"],
+            sigma=params["sigma"],
+            history=hist,
+        )
+        return result
+
+    with st.spinner("Running simulations…"):
+        run_id, result = get_result_cache().get_or_compute(
+            (inputs, params), compute_result
+        )
+    st.query_params["run"] = run_id
 
-# ── Compute parameters ────────────────────────────────────────────────────────
-mu, sigma = compute_gbm_params(hist["close"])
-last_price = float(hist["close"].iloc[-1])
-ann_ret = mu * 252
-ann_vol = sigma * np.sqrt(252)
+elif shared_run:
+    result = get_result_cache().get(shared_run)
+    if result is None:
+        st.warning(
+            "That simulation has expired. Press **RUN SIMULATION** to run it again."
+        )
+        st.stop()
+    inputs = result["inputs"]
+    hist = result.get("history")
+    if hist is None:
+        # Stored before results carried their history
+        hist = fetch_data(inputs["ticker"], years=inputs["history_years"])
+        hist = hist.loc[: inputs["history_end"]]
+    st.caption(
+        f"Shared run · {inputs['ticker']} · {inputs['history_years']}y history · "
+        f"{inputs['n_sims']:,} paths · {inputs['n_days']}d"
+    )
 
-# ── Run simulation ────────────────────────────────────────────────────────────
-with st.spinner("Running simulations…"):
-    paths = run_simulation(last_price, mu, sigma, n_days, n_simulations)
+else:
+    st.info(
+        "Configure parameters above and press **RUN SIMULATION**. "
+        "Paths are generated by the selected model calibrated to historical log-returns."
+    )
+    st.stop()
 
-finals = paths[:, -1]
-p10, p50, p90 = np.percentile(finals, [10, 50, 90])
+ticker, model, sampling, n_days = (
+    inputs["ticker"],
+    inputs["model"],
+    inputs["sampling"],
+    inputs["n_days"],
+)
+last_price = result["last_price"]
+ann_ret = result["mu"] * 252
+ann_vol = result["sigma"] * np.sqrt(252)
+
+summary = result["terminal"]
+p10, p10_se = summary["p10"]
+p50, p50_se = summary["p50"]
+p90, p90_se = summary["p90"]
+prob_profit, prob_profit_se = summary["prob_profit"]
 expected_ret = (p50 - last_price) / last_price * 100
-prob_profit = (finals > last_price).mean() * 100
 
 # ── Metrics ───────────────────────────────────────────────────────────────────
 m1, m2, m3, m4, m5, m6 = st.columns(6)
@@ -356,9 +553,26 @@ m1, m2, m3, m4, m5, m6 = st.columns(6)
 m1.metric("Last Close", f"${last_price:.2f}")
 m2.metric("Ann. Return (µ)", f"{ann_ret * 100:.1f}%")
 m3.metric("Ann. Volatility (σ)", f"{ann_vol * 100:.1f}%")
-m4.metric(f"Median ({n_days}d)", f"${p50:.2f} ({expected_ret:+.1f}%)")
-m5.metric("P10 / P90", f"${p10:.2f} / ${p90:.2f}")
-m6.metric("P(Profit)", f"{prob_profit:.1f}%")
+m4.metric(
+    f"Median ({n_days}d)",
+    f"${p50:.2f} ({expected_ret:+.1f}%)",
+    help=f"Standard error ± ${p50_se:.2f}",
+)
+m5.metric(
+    "P10 / P90",
+    f"${p10:.2f} / ${p90:.2f}",
+    help=f"Standard errors ± ${p10_se:.2f} / ± ${p90_se:.2f}",
+)
+m6.metric(
+    "P(Profit)",
+    f"{prob_profit * 100:.1f}%",
+    help=f"Standard error ± {prob_profit_se * 100:.2f} pts",
+)
+st.caption(
+    f"{MODELS[model].label}: {MODELS[model].description} · "
+    f"{SAMPLING_METHODS[sampling]} · standard errors (batch replicates): "
+    f"median ± ${p50_se:.2f}, P(Profit) ± {prob_profit_se * 100:.2f} pts"
+)
 
 st.divider()
 
@@ -368,20 +582,16 @@ if not percentiles:
 
 with st.spinner("Building chart…"):
     sim_chart = build_simulation_chart(
-        hist, paths, ticker, n_days, percentiles, show_paths
+        hist, result, ticker, n_days, percentiles, show_paths, raw=raw_data
     )
 
 st.altair_chart(sim_chart, width="stretch")
 
 # ── Distribution chart ────────────────────────────────────────────────────────
 with st.spinner("Building distribution chart…"):
-    dist_chart = build_distribution_chart(paths, percentiles)
+    dist_chart = build_distribution_chart(result, percentiles)
 
 st.altair_chart(dist_chart, width="stretch")
 
 # ── Footer note ───────────────────────────────────────────────────────────────
-st.warning(
-    "⚠ This tool is for educational and research purposes only. "
-    "GBM assumes constant drift and volatility and does not account for jumps, "
-    "fat tails, or regime changes. Not financial advice."
-)
+st.warning(DISCLAIMER)
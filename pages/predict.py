@@ -8,7 +8,10 @@ import plotly.graph_objects as go
 import holidays
 import streamlit as st
 from prophet import Prophet
-import yfinance as yf
+
+from downsample import downsample_frame
+from market_data import get_market_data_provider
+from metrics import histogram
 
 # ─────────────────────────────────────────────
 # PAGE CONFIG
@@ -40,6 +43,10 @@ with c5:
     st.write("")
     run_btn = st.button("Run Forecast", width="stretch", type="primary")
 
+raw_data = st.toggle(
+    "Show raw history", help="Plot every daily bar instead of a downsampled line"
+)
+
 st.divider()
 
 # ─────────────────────────────────────────────
@@ -82,16 +89,21 @@ def base_layout(title="", yaxis_title="", height=280):
     )
 
 
+# Forecaster timings (the registry returns the same metric on every rerun)
+FORECAST_SECONDS = histogram(
+    "mockmarket_forecast_seconds", "Prophet fit and predict time by stage"
+)
+
+
 # ─────────────────────────────────────────────
 # HELPERS
 # ─────────────────────────────────────────────
 @st.cache_data(show_spinner=False)
 def load_data(ticker, start, end):
-    raw = yf.download(ticker, start=start, end=end, auto_adjust=True, progress=False)
+    data = get_market_data_provider().history([ticker], start=start, end=end)
+    raw = data.xs(ticker, axis=1, level=1).dropna(how="all")
     if raw.empty:
         return pd.DataFrame()
-    if isinstance(raw.columns, pd.MultiIndex):
-        raw.columns = raw.columns.get_level_values(0)
     df = raw[["Close", "Volume"]].copy().reset_index()
     df.columns = ["ds", "y", "Volume"]
     df["ds"] = pd.to_datetime(df["ds"]).dt.tz_localize(None)
@@ -130,7 +142,8 @@ def fit_model(df, holiday_df):
         interval_width=0.95,
     )
     model.add_regressor("volume", mode="additive")
-    model.fit(df)
+    with FORECAST_SECONDS.time(stage="fit"):
+        model.fit(df)
     return model
 
 
@@ -148,7 +161,8 @@ def build_future(df, periods):
 
 
 def make_forecast(model, future):
-    fc = model.predict(future)
+    with FORECAST_SECONDS.time(stage="predict"):
+        fc = model.predict(future)
     for col in ["yhat", "yhat_lower", "yhat_upper"]:
         fc[col] = np.exp(fc[col]).clip(lower=0)
     return fc
@@ -157,8 +171,9 @@ def make_forecast(model, future):
 # ─────────────────────────────────────────────
 # CHART BUILDERS
 # ─────────────────────────────────────────────
-def plot_forecast(df, forecast):
+def plot_forecast(df, forecast, raw=False):
     fut = forecast[forecast["ds"] > df["ds"].max()]
+    actual = df if raw else downsample_frame(df, "ds", "y")
     fig = go.Figure()
 
     # CI ribbon
@@ -175,8 +190,8 @@ def plot_forecast(df, forecast):
     )
     fig.add_trace(
         go.Scatter(
-            x=df["ds"],
-            y=np.exp(df["y"]),
+            x=actual["ds"],
+            y=np.exp(actual["y"]),
             name="Actual",
             line=dict(color=BLUE, width=1.4),
             hovertemplate="%{x|%b %d %Y}  $%{y:.2f}<extra>Actual</extra>",
@@ -198,8 +213,10 @@ def plot_forecast(df, forecast):
     return fig
 
 
-def plot_trend(forecast, df):
+def plot_trend(forecast, df, raw=False):
     hist = forecast[forecast["ds"] <= df["ds"].max()]
+    if not raw:
+        hist = downsample_frame(hist, "ds", "trend")
     fut = forecast[forecast["ds"] > df["ds"].max()]
     fig = go.Figure()
     fig.add_trace(
@@ -373,14 +390,14 @@ if run_btn:
 
     # ── Forecast ───────────────────────────────
     st.subheader("Forecast")
-    st.plotly_chart(plot_forecast(df, forecast), width="stretch")
+    st.plotly_chart(plot_forecast(df, forecast, raw=raw_data), width="stretch")
 
     # ── Components ─────────────────────────────
     st.subheader("Model components")
 
     col_a, col_b = st.columns(2)
     with col_a:
-        st.plotly_chart(plot_trend(forecast, df), width="stretch")
+        st.plotly_chart(plot_trend(forecast, df, raw=raw_data), width="stretch")
     with col_b:
         st.plotly_chart(plot_weekly(forecast), width="stretch")
 
@@ -0,0 +1,184 @@
+"""Opt-in per-rerun timing instrumentation.
+
+Enable with ``ENABLED = true`` under ``[profiling]`` in secrets.toml (or
+``MOCKMARKET_PROFILING_ENABLED=1``). Each Streamlit rerun then records the wall
+time of every ``@timed`` function and ``section()`` block, plus the number of
+Mongo round-trips and upstream market-data fetches it caused. Results show up
+in ``render_debug_panel()`` and are appended to a JSONL log for offline
+analysis. When disabled, ``@timed`` costs one boolean check per call.
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import streamlit as st
+from pymongo import monitoring
+
+import metrics
+from config import get_bool_setting, get_setting
+
+ENABLED = get_bool_setting("profiling", "ENABLED")
+LOG_PATH = get_setting("profiling", "LOG_PATH", "profile_log.jsonl")
+
+# Streamlit runs each session's script in its own thread, so one collector per
+# context is one collector per rerun in progress. Unlike a thread-local, the
+# context (and so the collector) follows work the rerun hands to
+# asyncio.to_thread or asyncio tasks.
+_collector_var: ContextVar[dict | None] = ContextVar("profiler_collector", default=None)
+
+
+def _collector() -> dict | None:
+    return _collector_var.get()
+
+
+def begin_rerun(page: str):
+    """Start collecting for the current rerun of ``page``."""
+    metrics.begin_page(page)
+    if not ENABLED:
+        return
+    _collector_var.set(
+        {
+            "page": page,
+            "started": time.perf_counter(),
+            "calls": [],
+            "counters": {"mongo_round_trips": 0, "upstream_fetches": 0},
+            "depth": 0,
+        }
+    )
+
+
+def end_rerun() -> dict | None:
+    """Finish the current rerun, append it to the JSONL log and return it."""
+    metrics.end_page()
+    collector = _collector()
+    if collector is None:
+        return None
+    _collector_var.set(None)
+
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "page": collector["page"],
+        "total_ms": (time.perf_counter() - collector["started"]) * 1000,
+        **collector["counters"],
+        "calls": collector["calls"],
+    }
+    with open(LOG_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+@contextmanager
+def profiled_run(page: str):
+    """Profile a whole script run or fragment rerun of ``page``.
+
+    Fragments rerun on their own, without the page's top-level code, so each
+    fragment wraps itself in this too: during a full rerun it is recorded as a
+    section of the page, and on a fragment-only rerun it becomes its own run
+    with its own debug panel.
+    """
+    if not ENABLED:
+        with metrics.page_run(page):
+            yield
+        return
+    if _collector() is not None:
+        with section(page):
+            yield
+        return
+
+    begin_rerun(page)
+    try:
+        yield
+    finally:
+        render_debug_panel(end_rerun())
+
+
+def count(counter: str, amount: int = 1):
+    """Increment a per-rerun counter such as "mongo_round_trips" (mirrored
+    into the process-wide metrics when those are enabled)."""
+    metrics.count(counter, amount)
+    collector = _collector()
+    if collector is not None:
+        counters = collector["counters"]
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+@contextmanager
+def section(name: str):
+    """Time the enclosed block as one entry in the current rerun."""
+    collector = _collector()
+    if collector is None:
+        yield
+        return
+
+    entry = {"name": name, "depth": collector["depth"], "ms": 0.0}
+    collector["calls"].append(entry)
+    collector["depth"] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["ms"] = (time.perf_counter() - start) * 1000
+        collector["depth"] -= 1
+
+
+def timed(name: str | None = None, counter: str | None = None):
+    """Decorator recording each call's wall time in the current rerun.
+
+    Args:
+        name: Label in the report, defaults to ``module.function``
+        counter: Optional per-rerun counter to bump on every call
+    """
+
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if counter:
+                count(counter)
+            if not ENABLED or _collector() is None:
+                return func(*args, **kwargs)
+            with section(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """Count every command a pymongo client sends as one round-trip."""
+
+    def started(self, event):
+        count("mongo_round_trips")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def render_debug_panel(record: dict | None):
+    """Show a finished rerun's timings in a collapsed expander."""
+    if record is None:
+        return
+    with st.expander(
+        f":material/speed: Render profile · {record['total_ms']:.0f} ms", expanded=False
+    ):
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Rerun wall time", f"{record['total_ms']:.0f} ms")
+        c2.metric("Mongo round-trips", record["mongo_round_trips"])
+        c3.metric("Upstream fetches", record["upstream_fetches"])
+        st.dataframe(
+            [
+                {"Call": "    " * call["depth"] + call["name"], "ms": round(call["ms"], 2)}
+                for call in record["calls"]
+            ],
+            hide_index=True,
+            width="stretch",
+        )
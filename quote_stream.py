@@ -0,0 +1,203 @@
+"""Background quote streaming into a shared in-memory price table.
+
+One asyncio task per process refreshes quotes for every ticker that an active
+session holds or watches, so pages read current prices from memory instead
+of waiting on an upstream call. Enable it with::
+
+    [quotes]
+    STREAMING = true
+    FEED = "provider"        # or "simulated" for an offline random walk
+    INTERVAL_SECONDS = 5
+
+Sessions that stop calling ``watch()`` for ``session_ttl`` seconds (or that
+call ``unwatch()``) drop out, so the streamer only ever fetches what someone
+is looking at.
+"""
+
+import asyncio
+import threading
+import time
+import zlib
+
+import numpy as np
+import streamlit as st
+from loguru import logger
+
+from config import get_bool_setting, get_setting
+from market_data import MarketDataProvider, get_market_data_provider
+
+
+class QuoteTable:
+    """Thread-safe ticker -> (price, updated_at) map."""
+
+    def __init__(self):
+        self._quotes: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, quotes: dict[str, float], at: float | None = None):
+        at = time.time() if at is None else at
+        with self._lock:
+            for ticker, price in quotes.items():
+                self._quotes[ticker] = (price, at)
+
+    def get(self, ticker: str, max_age: float | None = None) -> float | None:
+        """Latest price, or None if unknown or older than ``max_age`` seconds."""
+        entry = self._quotes.get(ticker)
+        if entry is None:
+            return None
+        price, at = entry
+        if max_age is not None and time.time() - at > max_age:
+            return None
+        return price
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {ticker: price for ticker, (price, _) in self._quotes.items()}
+
+
+class ProviderQuoteFeed:
+    """Fetch quotes from the market-data provider with bounded concurrency."""
+
+    def __init__(self, provider: MarketDataProvider, max_concurrency: int = 8):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+
+    async def fetch(self, tickers: list) -> dict[str, float]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_one(ticker):
+            async with semaphore:
+                return await asyncio.to_thread(self.provider.current_price, ticker)
+
+        results = await asyncio.gather(
+            *(fetch_one(t) for t in tickers), return_exceptions=True
+        )
+        quotes = {}
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Quote fetch failed for {ticker}: {result}")
+            else:
+                quotes[ticker] = float(result)
+        return quotes
+
+
+class SimulatedQuoteFeed:
+    """Seeded random-walk quotes for offline runs and load tests."""
+
+    def __init__(
+        self,
+        start_prices: dict[str, float] | None = None,
+        volatility: float = 0.001,
+        seed: int = 0,
+    ):
+        self.prices = dict(start_prices or {})
+        self.volatility = volatility
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+    async def fetch(self, tickers: list) -> dict[str, float]:
+        for ticker in tickers:
+            if ticker not in self.prices:
+                # Stable, ticker-dependent starting price
+                self.prices[ticker] = 20 + zlib.crc32(ticker.encode()) % 480
+        shocks = self._rng.standard_normal(len(tickers)) * self.volatility
+        for ticker, shock in zip(tickers, shocks):
+            self.prices[ticker] *= float(np.exp(shock))
+        return {ticker: self.prices[ticker] for ticker in tickers}
+
+
+class QuoteStreamer:
+    """Runs the refresh loop on a daemon thread with its own event loop."""
+
+    def __init__(self, feed, interval_seconds: float = 5.0, session_ttl: float = 600):
+        self.feed = feed
+        self.interval_seconds = interval_seconds
+        self.session_ttl = session_ttl
+        self.table = QuoteTable()
+        self._watchers: dict[str, tuple[float, frozenset]] = {}
+        self._subscribers: list = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, session_id: str, tickers):
+        """Register (or refresh) the tickers a session wants streamed."""
+        with self._lock:
+            self._watchers[session_id] = (time.time(), frozenset(tickers))
+
+    def unwatch(self, session_id: str):
+        """Stop streaming a session's tickers (e.g. on logout)."""
+        with self._lock:
+            self._watchers.pop(session_id, None)
+
+    def watched_tickers(self) -> list:
+        """Union of tickers watched by sessions seen within ``session_ttl``."""
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            for session_id in [
+                s for s, (seen, _) in self._watchers.items() if seen < cutoff
+            ]:
+                del self._watchers[session_id]
+            tickers = set().union(*(t for _, t in self._watchers.values()))
+        return sorted(tickers)
+
+    def subscribe(self, callback):
+        """Call ``callback(quotes)`` on the streamer thread after every refresh."""
+        self._subscribers.append(callback)
+
+    def get_price(self, ticker: str) -> float | None:
+        """Non-blocking read; None if the quote is missing or stale."""
+        return self.table.get(ticker, max_age=3 * self.interval_seconds)
+
+    async def refresh(self):
+        """Fetch one round of quotes for every watched ticker."""
+        tickers = self.watched_tickers()
+        if tickers:
+            quotes = await self.feed.fetch(tickers)
+            self.table.update(quotes)
+            for callback in self._subscribers:
+                try:
+                    callback(quotes)
+                except Exception as e:
+                    logger.exception(f"Quote subscriber failed: {e}")
+
+    async def _run(self):
+        while not self._stopped.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception(f"Quote refresh failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=lambda: asyncio.run(self._run()),
+                name="quote-stream",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+
+def create_quote_feed(name: str):
+    """Build a feed by name ("provider" or "simulated")."""
+    if name == "provider":
+        return ProviderQuoteFeed(get_market_data_provider())
+    if name == "simulated":
+        return SimulatedQuoteFeed()
+    raise ValueError(f"Unknown quote feed: {name}")
+
+
+@st.cache_resource
+def get_quote_streamer() -> QuoteStreamer | None:
+    """Return the process-wide streamer, or None when streaming is disabled."""
+    if not get_bool_setting("quotes", "STREAMING"):
+        return None
+    return QuoteStreamer(
+        create_quote_feed(get_setting("quotes", "FEED", "provider")),
+        interval_seconds=float(get_setting("quotes", "INTERVAL_SECONDS", 5)),
+    ).start()
@@ -0,0 +1,188 @@
+"""In-memory cache of per-user wallet and portfolio reads.
+
+Entries are keyed by (collection, username) and evicted whenever that user's
+documents change, from any process:
+
+- writes made through ``database.py`` evict immediately in this process
+- a MongoDB change stream on ``user_wallets`` and ``user_portfolio`` evicts
+  entries written by other processes as soon as the event arrives
+- deployments without change streams (standalone mongod, mongomock) fall
+  back to polling: every ``poll_seconds`` the cached users' documents are
+  re-read in one query per collection and any entry that differs is evicted
+
+Each key carries a generation number, so a load that races with an
+invalidation is never stored. Callers get their own copies of the cached
+documents, so mutating a result can't change what later reads see.
+"""
+
+import threading
+import time
+
+from loguru import logger
+from pymongo.errors import OperationFailure, PyMongoError
+
+from profiler import count
+
+WATCHED_COLLECTIONS = ("user_wallets", "user_portfolio")
+
+
+class UserReadCache:
+    """Per-user read-through cache invalidated by change streams or polling."""
+
+    def __init__(self, db, poll_seconds: float = 2.0):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.mode = "starting"
+        self._entries: dict[tuple[str, str], object] = {}
+        self._generations: dict[tuple[str, str], int] = {}
+        # Document _id -> username, so deletes (which carry no document) can
+        # still be attributed to a user
+        self._owners: dict = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get(self, collection: str, username: str, loader):
+        """Cached value for (collection, username), loading it on a miss."""
+        key = (collection, username)
+        with self._lock:
+            if key in self._entries:
+                count("read_cache_hits")
+                return _copy(self._entries[key])
+            generation = self._generations.get(key, 0)
+        count("read_cache_misses")
+        value = loader()
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = _copy(value)
+                for doc in value if isinstance(value, list) else [value]:
+                    if doc:
+                        self._owners[doc["_id"]] = username
+        return value
+
+    def invalidate(self, collection: str, username: str):
+        key = (collection, username)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def invalidate_all(self, collection: str | None = None):
+        with self._lock:
+            for key in list(self._generations) + list(self._entries):
+                if collection is None or key[0] == collection:
+                    self._entries.pop(key, None)
+                    self._generations[key] = self._generations.get(key, 0) + 1
+
+    def cached_entries(self, collection: str) -> dict:
+        """Snapshot of username -> cached value for one collection."""
+        with self._lock:
+            return {
+                user: value
+                for (coll, user), value in self._entries.items()
+                if coll == collection
+            }
+
+    # ------------------------------------------------------------------
+    # Change streams
+    # ------------------------------------------------------------------
+
+    def apply_change(self, change: dict):
+        """Evict whatever a single change-stream event may have affected."""
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument") or {}
+        username = document.get("username")
+        if username is None:
+            username = self._owners.get(change.get("documentKey", {}).get("_id"))
+        if username is None:
+            self.invalidate_all(collection)
+        else:
+            self.invalidate(collection, username)
+
+    def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+        with self.db.watch(pipeline, full_document="updateLookup") as stream:
+            self.mode = "change_stream"
+            # Anything written before the stream opened may have been missed
+            self.invalidate_all()
+            while not self._stopped.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self.apply_change(change)
+
+    # ------------------------------------------------------------------
+    # Polling fallback
+    # ------------------------------------------------------------------
+
+    def poll_once(self):
+        """Re-read every cached user's documents and evict those that changed."""
+        cached = self.cached_entries("user_wallets")
+        if cached:
+            current = {
+                doc["username"]: doc
+                for doc in self.db["user_wallets"].find({"username": {"$in": list(cached)}})
+            }
+            for username, wallet in cached.items():
+                if wallet != current.get(username):
+                    self.invalidate("user_wallets", username)
+
+        cached = self.cached_entries("user_portfolio")
+        if cached:
+            current: dict[str, list] = {username: [] for username in cached}
+            for doc in self.db["user_portfolio"].find({"username": {"$in": list(cached)}}):
+                current[doc["username"]].append(doc)
+            for username, docs in current.items():
+                if _fingerprint(cached[username]) != _fingerprint(docs):
+                    self.invalidate("user_portfolio", username)
+
+    def _poll(self):
+        self.mode = "polling"
+        while not self._stopped.wait(self.poll_seconds):
+            try:
+                self.poll_once()
+            except PyMongoError as e:
+                logger.warning(f"Read-cache poll failed, clearing cache: {e}")
+                self.invalidate_all()
+
+    def _run(self):
+        if getattr(type(self.db), "watch", None) is None:
+            # mongomock has no change streams at all
+            self._poll()
+            return
+        while not self._stopped.is_set():
+            try:
+                self._watch()
+            except OperationFailure as e:
+                if self.mode == "change_stream":
+                    logger.warning(f"Change stream closed, reopening: {e}")
+                    self.invalidate_all()
+                    time.sleep(1)
+                    continue
+                logger.info(f"Change streams unavailable, polling instead: {e}")
+                self._poll()
+                return
+            except PyMongoError as e:
+                logger.warning(f"Change stream error, reopening: {e}")
+                self.invalidate_all()
+                time.sleep(1)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="read-cache-invalidator", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _copy(value):
+    """Copy a cached document or list of documents (they are flat)."""
+    if isinstance(value, list):
+        return [dict(doc) for doc in value]
+    return dict(value) if value is not None else None
+
+
+def _fingerprint(docs: list[dict]) -> list:
+    return sorted((str(d["_id"]), d["stock_quantity"], d["stock_price"]) for d in docs)
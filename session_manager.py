@@ -1,44 +1,52 @@
-"""Session management for persistent login across page refreshes."""
+"""Session management for persistent login across page refreshes.
+
+Sessions live in the shared store (see shared_state.py), so a token created
+on one Streamlit replica is valid on every other one.
+"""
 
-import json
 import uuid
 from datetime import datetime, timedelta
-from pathlib import Path
 
-SESSION_FILE = Path(".sessions.json")
+from metrics import counter, histogram
+from shared_state import get_shared_store
+
 SESSION_TIMEOUT_HOURS = 24
 
+SESSION_EVENTS = counter(
+    "mockmarket_session_events_total",
+    "Session creations, validations (valid or rejected) and logouts",
+)
+SESSION_STORE_SECONDS = histogram(
+    "mockmarket_session_store_seconds", "Shared-store round-trip per session load or save"
+)
 
-def _load_sessions() -> dict:
-    """Load all sessions from file."""
-    if SESSION_FILE.exists():
-        with open(SESSION_FILE, "r") as f:
-            return json.load(f)
-    return {}
 
+def _session_key(token: str) -> str:
+    return f"session:{token}"
 
-def _save_sessions(sessions: dict):
-    """Save sessions to file."""
-    with open(SESSION_FILE, "w") as f:
-        json.dump(sessions, f, indent=2)
 
+def _remaining_seconds(data: dict) -> float:
+    """Seconds until a session expires, measured from its creation time."""
+    created_at = datetime.fromisoformat(data["created_at"])
+    expires_at = created_at + timedelta(hours=SESSION_TIMEOUT_HOURS)
+    return (expires_at - datetime.now()).total_seconds()
 
-def _cleanup_expired_sessions():
-    """Remove expired sessions from storage."""
-    sessions = _load_sessions()
-    current_time = datetime.now()
-    
-    expired_keys = []
-    for token, data in sessions.items():
-        created_at = datetime.fromisoformat(data["created_at"])
-        if current_time - created_at > timedelta(hours=SESSION_TIMEOUT_HOURS):
-            expired_keys.append(token)
-    
-    for token in expired_keys:
-        del sessions[token]
-    
-    if expired_keys:
-        _save_sessions(sessions)
+
+def _load_session(token: str) -> dict | None:
+    """Load one session, or None if it is missing or expired."""
+    with SESSION_STORE_SECONDS.time(operation="load"):
+        data = get_shared_store().get_json(_session_key(token))
+    if data is None or _remaining_seconds(data) <= 0:
+        return None
+    return data
+
+
+def _save_session(token: str, data: dict):
+    """Save one session; the store expires it with the session itself."""
+    with SESSION_STORE_SECONDS.time(operation="save"):
+        get_shared_store().set_json(
+            _session_key(token), data, ttl=_remaining_seconds(data)
+        )
 
 
 def create_session(username: str) -> str:
@@ -50,17 +58,16 @@ def create_session(username: str) -> str:
     Returns:
         Session token (UUID)
     """
-    _cleanup_expired_sessions()
-    sessions = _load_sessions()
-    
     token = str(uuid.uuid4())
-    sessions[token] = {
-        "username": username,
-        "created_at": datetime.now().isoformat(),
-        "wallet_balance": 10000,
-    }
-    
-    _save_sessions(sessions)
+    _save_session(
+        token,
+        {
+            "username": username,
+            "created_at": datetime.now().isoformat(),
+            "wallet_balance": 10000,
+        },
+    )
+    SESSION_EVENTS.inc(event="created")
     return token
 
 
@@ -73,15 +80,11 @@ def validate_session(token: str) -> tuple[bool, str | None]:
     Returns:
         Tuple of (is_valid, username)
     """
-    _cleanup_expired_sessions()
-    sessions = _load_sessions()
-    
-    if token in sessions:
-        data = sessions[token]
-        created_at = datetime.fromisoformat(data["created_at"])
-        if datetime.now() - created_at <= timedelta(hours=SESSION_TIMEOUT_HOURS):
-            return True, data["username"]
-    
+    data = _load_session(token)
+    if data is not None:
+        SESSION_EVENTS.inc(event="validated")
+        return True, data["username"]
+    SESSION_EVENTS.inc(event="rejected")
     return False, None
 
 
@@ -94,11 +97,7 @@ def get_session_data(token: str) -> dict | None:
     Returns:
         Session data dict or None if invalid
     """
-    is_valid, username = validate_session(token)
-    if is_valid:
-        sessions = _load_sessions()
-        return sessions.get(token)
-    return None
+    return _load_session(token)
 
 
 def update_session_data(token: str, **kwargs):
@@ -108,10 +107,10 @@ def update_session_data(token: str, **kwargs):
         token: The session token
         **kwargs: Fields to update (e.g., wallet_balance=5000)
     """
-    sessions = _load_sessions()
-    if token in sessions:
-        sessions[token].update(kwargs)
-        _save_sessions(sessions)
+    data = _load_session(token)
+    if data is not None:
+        data.update(kwargs)
+        _save_session(token, data)
 
 
 def logout_session(token: str):
@@ -120,7 +119,5 @@ def logout_session(token: str):
     Args:
         token: The session token to clear
     """
-    sessions = _load_sessions()
-    if token in sessions:
-        del sessions[token]
-        _save_sessions(sessions)
+    get_shared_store().delete(_session_key(token))
+    SESSION_EVENTS.inc(event="logout")
@@ -0,0 +1,152 @@
+"""Key-value state shared by every Streamlit process serving the app.
+
+Sessions, quotes and price histories go through a ``SharedStore`` so that
+several replicas behind a load balancer see the same logins and fetch each
+upstream quote or history once between them. Pick a backend with::
+
+    [shared_state]
+    BACKEND = "sqlite"                       # or "redis"
+    SQLITE_PATH = ".mockmarket_state.db"     # replicas on one host
+    URL = "redis://localhost:6379/0"         # replicas on many hosts
+
+``python -m kv_server`` runs a small Redis-compatible stand-in server for
+local multi-node testing without installing Redis.
+
+Values are pickled, so the store must only be reachable by the app itself.
+"""
+
+import json
+import pickle
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+from config import get_setting
+
+
+class SharedStore:
+    """Interface every shared-state backend implements."""
+
+    name = "base"
+
+    def get(self, key: str) -> bytes | None:
+        """Return the stored bytes, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float | None = None):
+        """Store ``value``; it expires after ``ttl`` seconds if given."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key: str, value, ttl: float | None = None):
+        self.set(key, json.dumps(value).encode(), ttl)
+
+    def get_object(self, key: str):
+        value = self.get(key)
+        return None if value is None else pickle.loads(value)
+
+    def set_object(self, key: str, value, ttl: float | None = None):
+        self.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+
+    def cached(self, key: str, compute, ttl: float | None = None):
+        """Return the object at ``key``, computing and storing it on a miss."""
+        value = self.get_object(key)
+        if value is None:
+            value = compute()
+            self.set_object(key, value, ttl)
+        return value
+
+
+class SQLiteStore(SharedStore):
+    """Store backed by one SQLite file; SQLite's file locks make it safe
+    across processes on the same host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = ".mockmarket_state.db"):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = None if ttl is None else time.time() + ttl
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+        # Expired rows are otherwise only ever skipped; prune them occasionally
+        if hash(key) % 100 == 0:
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+
+class RedisStore(SharedStore):
+    """Store on a Redis (or ``kv_server``) instance shared by every node."""
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        px = None if ttl is None else max(1, int(ttl * 1000))
+        self.client.set(key, value, px=px)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def create_store(name: str, **options) -> SharedStore:
+    """Build a store by backend name ("sqlite" or "redis")."""
+    if name == "sqlite":
+        return SQLiteStore(**options)
+    if name == "redis":
+        return RedisStore(**options)
+    raise ValueError(f"Unknown shared-state backend: {name}")
+
+
+@st.cache_resource
+def get_shared_store() -> SharedStore:
+    """Return the store configured in settings (SQLite by default)."""
+    backend = get_setting("shared_state", "BACKEND", "sqlite")
+    if backend == "redis":
+        options = {"url": get_setting("shared_state", "URL", "redis://localhost:6379/0")}
+    else:
+        options = {"path": get_setting("shared_state", "SQLITE_PATH", ".mockmarket_state.db")}
+    return create_store(backend, **options)
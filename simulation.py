@@ -0,0 +1,389 @@
+"""Monte Carlo path generation and estimators with standard errors.
+
+Every stochastic model implements the same vectorised kernel: it turns an
+(n_sims, n_days) block of standard normal shocks into daily log returns, so
+models and sampling methods combine freely:
+
+- "gbm": Geometric Brownian Motion, constant drift and volatility
+- "merton": GBM plus Poisson-arriving normal jumps (Merton jump-diffusion)
+- "garch": GARCH(1,1) volatility clustering with normal innovations
+- "bootstrap": daily returns resampled from history (no distribution assumed)
+
+Sampling methods trade a little bookkeeping for much faster convergence:
+
+- "plain": independent pseudo-random normals
+- "antithetic": every draw Z is paired with -Z
+- "sobol": scrambled Sobol quasi-random points (randomised QMC)
+- "control_variate": plain draws, with P(profit) corrected using the
+  terminal price, whose expectation is known in closed form
+
+Standard errors come from batch replicates: paths are split into
+``N_BATCHES`` blocks (each an independent scramble for Sobol, and whole
+antithetic pairs), the estimator is computed per block, and the spread
+of the block estimates gives the error. This works the same way for every
+method, including QMC where the per-path variance is meaningless.
+"""
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+from scipy.special import ndtr
+
+from metrics import counter, histogram
+
+SAMPLING_METHODS = {
+    "plain": "Plain Monte Carlo",
+    "antithetic": "Antithetic variates",
+    "sobol": "Sobol quasi-random",
+    "control_variate": "Control variate",
+}
+
+N_BATCHES = 20
+
+SIMULATION_SECONDS = histogram(
+    "mockmarket_simulation_seconds", "Monte Carlo path generation time by model and method"
+)
+SIMULATED_PATHS = counter("mockmarket_simulated_paths_total", "Monte Carlo paths generated")
+
+
+def _batch_slices(n_sims: int, method: str, n_batches: int = N_BATCHES) -> list:
+    """Contiguous row ranges for batch replicates (pairs kept together)."""
+    unit = 2 if method == "antithetic" else 1
+    n_units = n_sims // unit
+    n_batches = max(1, min(n_batches, n_units))
+    edges = np.linspace(0, n_units, n_batches + 1).astype(int) * unit
+    edges[-1] = n_sims
+    return [slice(lo, hi) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+def _sobol_normals(n: int, dims: int, seed: int) -> np.ndarray:
+    """n scrambled-Sobol points mapped to standard normals."""
+    from scipy.stats import norm, qmc
+
+    m = int(np.ceil(np.log2(max(n, 2))))
+    points = qmc.Sobol(d=dims, scramble=True, seed=seed).random_base2(m)[:n]
+    return norm.ppf(np.clip(points, 1e-12, 1 - 1e-12))
+
+
+def standard_normals(
+    n_sims: int, n_days: int, method: str = "plain", seed: int = 42
+) -> np.ndarray:
+    """Draw an (n_sims, n_days) block of N(0, 1) shocks using ``method``."""
+    if method in ("plain", "control_variate"):
+        return np.random.default_rng(seed).standard_normal((n_sims, n_days))
+
+    if method == "antithetic":
+        half = np.random.default_rng(seed).standard_normal(((n_sims + 1) // 2, n_days))
+        shocks = np.empty((2 * len(half), n_days))
+        shocks[0::2] = half
+        shocks[1::2] = -half
+        return shocks[:n_sims]
+
+    if method == "sobol":
+        # One independent scramble per batch, so batches are true replicates
+        shocks = np.empty((n_sims, n_days))
+        for i, rows in enumerate(_batch_slices(n_sims, method)):
+            shocks[rows] = _sobol_normals(rows.stop - rows.start, n_days, seed + i)
+        return shocks
+
+    raise ValueError(f"Unknown sampling method: {method}")
+
+
+def paths_from_log_returns(last_price: float, log_returns: np.ndarray) -> np.ndarray:
+    """Price paths of shape (n_sims, n_days+1) from daily log returns."""
+    n_sims, n_days = log_returns.shape
+    paths = np.empty((n_sims, n_days + 1))
+    paths[:, 0] = last_price
+    paths[:, 1:] = last_price * np.exp(np.cumsum(log_returns, axis=1))
+    return paths
+
+
+def simulate_gbm_paths(
+    last_price: float,
+    mu: float,
+    sigma: float,
+    n_days: int,
+    n_sims: int,
+    seed: int = 42,
+    method: str = "plain",
+) -> np.ndarray:
+    """Geometric Brownian Motion paths of shape (n_sims, n_days+1)."""
+    params = {"mu": mu, "sigma": sigma}
+    return simulate_paths("gbm", params, last_price, n_days, n_sims, seed, method)
+
+
+def _control_variate_adjust(
+    values: np.ndarray, control: np.ndarray, control_mean: float
+) -> np.ndarray:
+    """Return values - b (control - E[control]) with the variance-optimal b."""
+    var = control.var()
+    if var == 0:
+        return values
+    b = np.cov(values, control, bias=True)[0, 1] / var
+    return values - b * (control - control_mean)
+
+
+def summarize_terminal(
+    paths: np.ndarray,
+    last_price: float,
+    method: str = "plain",
+    expected_final: float | None = None,
+    percentiles: tuple = (10, 50, 90),
+) -> dict:
+    """Percentiles, mean and P(profit) of terminal prices, each with a SE.
+
+    ``expected_final`` (the model's exact E[S_T], see
+    ``StochasticModel.expected_growth``) is needed for the control-variate
+    method.
+
+    Returns:
+        {"p10": (estimate, se), ..., "mean": (..), "prob_profit": (..)}
+    """
+    finals = paths[:, -1]
+    profit = (finals > last_price).astype(float)
+
+    if method == "control_variate":
+        if expected_final is None:
+            raise ValueError("The control-variate method needs expected_final.")
+        profit = _control_variate_adjust(profit, finals, expected_final)
+
+    def estimate(fn):
+        batches = [fn(rows) for rows in _batch_slices(len(finals), method)]
+        if len(batches) < 2:
+            return float(fn(slice(None))), float("nan")
+        se = np.std(batches, ddof=1) / np.sqrt(len(batches))
+        return float(fn(slice(None))), float(se)
+
+    summary = {
+        f"p{p}": estimate(lambda rows, p=p: np.percentile(finals[rows], p))
+        for p in percentiles
+    }
+    summary["mean"] = estimate(lambda rows: finals[rows].mean())
+    summary["prob_profit"] = estimate(lambda rows: profit[rows].mean())
+    return summary
+
+
+def summarize_run(
+    paths: np.ndarray,
+    last_price: float,
+    method: str = "plain",
+    expected_final: float | None = None,
+    bands: tuple = (5, 10, 25, 50, 75, 90, 95),
+    n_sample_paths: int = 300,
+    bins: int = 50,
+) -> dict:
+    """Compact, chart-ready digest of a run (a few KB instead of the paths).
+
+    Returns:
+        {"n_sims", "bands": {p: per-day percentile}, "sample_paths",
+         "hist_edges", "hist_counts", "terminal": summarize_terminal(...)}
+    """
+    n_sims = len(paths)
+    sample_idx = np.linspace(0, n_sims - 1, min(n_sample_paths, n_sims), dtype=int)
+    counts, edges = np.histogram(paths[:, -1], bins=bins)
+    band_values = np.percentile(paths, bands, axis=0).astype(np.float32)
+    return {
+        "n_sims": n_sims,
+        "bands": dict(zip(bands, band_values)),
+        "sample_paths": paths[sample_idx].astype(np.float32),
+        "hist_edges": edges,
+        "hist_counts": counts,
+        "terminal": summarize_terminal(paths, last_price, method, expected_final),
+    }
+
+
+# ============================================================================
+# Stochastic Models
+# ============================================================================
+
+
+class StochasticModel:
+    """Interface every simulation model implements.
+
+    ``mu`` in every model is the mean daily log return, and each model's drift
+    is compensated so that E[S_T] = S_0 * exp(mu * n_days), the same
+    convention GBM has always used on the Monte Carlo page.
+    """
+
+    name = "base"
+    label = "Base"
+    description = ""
+
+    def fit(self, log_returns: np.ndarray) -> dict:
+        """Estimate parameters from daily log returns (always incl. mu, sigma)."""
+        raise NotImplementedError
+
+    def log_returns(
+        self, params: dict, shocks: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Map N(0, 1) ``shocks`` of shape (n_sims, n_days) to log returns.
+
+        ``rng`` supplies any randomness beyond the shocks (e.g. jump counts).
+        """
+        raise NotImplementedError
+
+    def expected_growth(self, params: dict, n_days: int) -> float:
+        """Exact E[S_T / S_0] under the model, used as a control variate."""
+        return float(np.exp(params["mu"] * n_days))
+
+
+class GBMModel(StochasticModel):
+    name = "gbm"
+    label = "Geometric Brownian Motion"
+    description = "Constant drift and volatility; log returns are normal."
+
+    def fit(self, log_returns):
+        return {"mu": float(log_returns.mean()), "sigma": float(log_returns.std(ddof=1))}
+
+    def log_returns(self, params, shocks, rng):
+        sigma = params["sigma"]
+        return (params["mu"] - 0.5 * sigma**2) + sigma * shocks
+
+
+class MertonJumpModel(StochasticModel):
+    name = "merton"
+    label = "Merton jump-diffusion"
+    description = "GBM plus occasional normally-distributed jumps (fat tails)."
+
+    # Returns further than this many robust SDs from the median count as jumps
+    JUMP_THRESHOLD = 3.0
+
+    def fit(self, log_returns):
+        median = np.median(log_returns)
+        robust_sd = 1.4826 * np.median(np.abs(log_returns - median))
+        is_jump = np.abs(log_returns - median) > self.JUMP_THRESHOLD * robust_sd
+        diffusive = log_returns[~is_jump]
+        jumps = log_returns[is_jump] - diffusive.mean()
+        return {
+            "mu": float(log_returns.mean()),
+            "sigma": float(log_returns.std(ddof=1)),
+            "diffusion_sigma": float(diffusive.std(ddof=1)),
+            "jump_intensity": float(is_jump.mean()),
+            "jump_mean": float(jumps.mean()) if len(jumps) else 0.0,
+            "jump_sd": float(jumps.std(ddof=1)) if len(jumps) > 1 else 0.0,
+        }
+
+    def log_returns(self, params, shocks, rng):
+        sigma = params["diffusion_sigma"]
+        lam, m, s = params["jump_intensity"], params["jump_mean"], params["jump_sd"]
+        # Compensator keeps E[exp(daily return)] = exp(mu)
+        kappa = np.exp(m + 0.5 * s**2) - 1
+        drift = params["mu"] - 0.5 * sigma**2 - lam * kappa
+        out = drift + sigma * shocks
+        n_jumps = rng.poisson(lam, shocks.shape)
+        # Sum of n iid N(m, s^2) jumps is N(n m, n s^2); only draw where n > 0
+        jumped = n_jumps > 0
+        n = n_jumps[jumped]
+        out[jumped] += n * m + np.sqrt(n) * s * rng.standard_normal(len(n))
+        return out
+
+
+class GARCHModel(StochasticModel):
+    name = "garch"
+    label = "GARCH(1,1)"
+    description = "Volatility clusters: big moves raise tomorrow's variance."
+
+    def _variances(self, residuals, alpha, beta, long_run_var):
+        """Conditional variances sigma^2_t for t = 0..T (T+1 = next day)."""
+        omega = long_run_var * (1 - alpha - beta)
+        # sigma^2_t = omega + alpha e^2_{t-1} + beta sigma^2_{t-1}, as a linear filter
+        eps2 = np.concatenate(([long_run_var], residuals**2))
+        offset = omega / (1 - beta)
+        variances, _ = lfilter(
+            [alpha], [1, -beta], eps2, zi=[beta * (long_run_var - offset)]
+        )
+        return variances + offset
+
+    def fit(self, log_returns):
+        mu = float(log_returns.mean())
+        residuals = log_returns - mu
+        long_run_var = float(residuals.var())
+
+        def neg_log_likelihood(x):
+            alpha, beta = x
+            if alpha + beta >= 0.999:
+                return 1e10
+            var = self._variances(residuals, alpha, beta, long_run_var)[:-1]
+            return 0.5 * np.sum(np.log(var) + residuals**2 / var)
+
+        result = minimize(
+            neg_log_likelihood,
+            x0=[0.05, 0.90],
+            bounds=[(1e-6, 0.5), (1e-6, 0.998)],
+            method="L-BFGS-B",
+        )
+        alpha, beta = (float(v) for v in result.x)
+        next_var = self._variances(residuals, alpha, beta, long_run_var)[-1]
+        return {
+            "mu": mu,
+            "sigma": float(np.sqrt(long_run_var)),
+            "alpha": alpha,
+            "beta": beta,
+            "long_run_var": long_run_var,
+            "next_var": float(next_var),
+        }
+
+    def log_returns(self, params, shocks, rng):
+        alpha, beta = params["alpha"], params["beta"]
+        omega = params["long_run_var"] * (1 - alpha - beta)
+        out = np.empty_like(shocks)
+        var = np.full(len(shocks), params["next_var"])
+        for t in range(shocks.shape[1]):
+            eps = np.sqrt(var) * shocks[:, t]
+            out[:, t] = params["mu"] - 0.5 * var + eps
+            var = omega + alpha * eps**2 + beta * var
+        return out
+
+
+class BootstrapModel(StochasticModel):
+    name = "bootstrap"
+    label = "Historical bootstrap"
+    description = "Resamples actual past daily returns; no distribution assumed."
+
+    def fit(self, log_returns):
+        return {
+            "mu": float(log_returns.mean()),
+            "sigma": float(log_returns.std(ddof=1)),
+            # Sorted, so antithetic / QMC shocks map to ordered quantiles
+            "returns": np.sort(log_returns).tolist(),
+        }
+
+    def log_returns(self, params, shocks, rng):
+        returns = np.asarray(params["returns"])
+        idx = np.minimum((ndtr(shocks) * len(returns)).astype(int), len(returns) - 1)
+        return returns[idx]
+
+    def expected_growth(self, params, n_days):
+        return float(np.mean(np.exp(params["returns"])) ** n_days)
+
+
+MODELS = {
+    model.name: model
+    for model in (GBMModel(), MertonJumpModel(), GARCHModel(), BootstrapModel())
+}
+
+
+def fit_model(model: str, prices) -> dict:
+    """Fit ``model`` to a price series (anything np.asarray accepts)."""
+    prices = np.asarray(prices, dtype=float)
+    return MODELS[model].fit(np.diff(np.log(prices)))
+
+
+def simulate_paths(
+    model: str,
+    params: dict,
+    last_price: float,
+    n_days: int,
+    n_sims: int,
+    seed: int = 42,
+    method: str = "plain",
+) -> np.ndarray:
+    """Simulate ``model`` price paths of shape (n_sims, n_days+1)."""
+    with SIMULATION_SECONDS.time(model=model, method=method):
+        shocks = standard_normals(n_sims, n_days, method, seed)
+        rng = np.random.default_rng(seed + 1)
+        paths = paths_from_log_returns(
+            last_price, MODELS[model].log_returns(params, shocks, rng)
+        )
+    SIMULATED_PATHS.inc(n_sims, model=model)
+    return paths
@@ -0,0 +1,98 @@
+"""Process-wide LRU cache of Monte Carlo results with shareable IDs.
+
+A run is fully determined by (ticker, history window end, model, fitted
+params, sampling method, n_sims, n_days, seed), so identical requests from
+any session reuse one ``summarize_run`` digest. Each key hashes to a short
+result ID that the Monte Carlo page puts in the URL (``?run=<id>``).
+
+Digests are also written to the shared store (see ``shared_state``) under
+``simulation:<id>`` for ``[simulation] RESULT_TTL_SECONDS`` (default a
+week), so a link opened on another replica, or after this process's LRU
+dropped the run, renders without resimulating.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from config import get_setting
+from shared_state import SharedStore, get_shared_store
+
+
+def result_id(key: tuple) -> str:
+    """Stable short ID for a run key (params dicts are hashed by value)."""
+    payload = json.dumps(key, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+class ResultCache:
+    """Thread-safe LRU map of result ID -> run digest, optionally backed by
+    a shared store."""
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        store: SharedStore | None = None,
+        ttl: float | None = None,
+    ):
+        self.max_entries = max_entries
+        self.store = store
+        self.ttl = ttl
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, run_id: str) -> dict | None:
+        with self._lock:
+            result = self._entries.get(run_id)
+            if result is not None:
+                self._entries.move_to_end(run_id)
+                self.hits += 1
+                return result
+        if self.store is not None:
+            result = self.store.get_object(f"simulation:{run_id}")
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._put_local(run_id, result)
+        return result
+
+    def put(self, run_id: str, result: dict):
+        self._put_local(run_id, result)
+        if self.store is not None:
+            self.store.set_object(f"simulation:{run_id}", result, self.ttl)
+
+    def _put_local(self, run_id: str, result: dict):
+        with self._lock:
+            self._entries[run_id] = result
+            self._entries.move_to_end(run_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: tuple, compute) -> tuple[str, dict]:
+        """Return (run_id, result), calling ``compute()`` only on a miss."""
+        run_id = result_id(key)
+        result = self.get(run_id)
+        if result is None:
+            result = compute()
+            self.put(run_id, result)
+        return run_id, result
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Return the process-wide simulation result cache."""
+    return ResultCache(
+        int(get_setting("simulation", "RESULT_CACHE_SIZE", 128)),
+        store=get_shared_store(),
+        ttl=float(get_setting("simulation", "RESULT_TTL_SECONDS", 7 * 24 * 3600)),
+    )
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import time by some modules, so set them first: an
+# in-process mongomock database, a throwaway shared store and no background
+# workers or caches
+os.environ["MOCKMARKET_MONGODB_URI"] = "mongomock://"
+os.environ["MOCKMARKET_READ_CACHE_ENABLED"] = "0"
+os.environ["MOCKMARKET_ALERTS_WORKER"] = "0"
+os.environ["MOCKMARKET_QUOTES_STREAMING"] = "0"
+os.environ["MOCKMARKET_METRICS_ENABLED"] = "0"
+os.environ["MOCKMARKET_PROFILING_ENABLED"] = "0"
+os.environ["MOCKMARKET_SHARED_STATE_BACKEND"] = "sqlite"
+os.environ["MOCKMARKET_SHARED_STATE_SQLITE_PATH"] = os.path.join(
+    tempfile.mkdtemp(), "state.db"
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    """The app database, emptied before each test."""
+    from mongo_connection import get_mongo
+
+    database = get_mongo().db
+    for name in database.list_collection_names():
+        database[name].delete_many({})
+    return database
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from alerts import AlertRuleSet, alert_band
+
+
+def alert(alert_id, kind, threshold, ticker="AAPL", reference_price=None):
+    return {
+        "_id": alert_id,
+        "ticker": ticker,
+        "kind": kind,
+        "threshold": threshold,
+        "reference_price": reference_price,
+    }
+
+
+def test_alert_bands():
+    assert alert_band(alert("a", "above", 100.0)) == (-np.inf, 100.0)
+    assert alert_band(alert("b", "below", 50.0)) == (50.0, np.inf)
+    assert alert_band(alert("c", "pct_move", 10.0, reference_price=200.0)) == pytest.approx(
+        (180.0, 220.0)
+    )
+
+
+def test_band_edges_are_inclusive():
+    move = alert("move", "pct_move", 10.0, ticker="MSFT", reference_price=200.0)
+    rules = AlertRuleSet(
+        [
+            alert("above", "above", 100.0, ticker="AAPL"),
+            alert("below", "below", 50.0, ticker="TSLA"),
+            move,
+        ]
+    )
+    lower, upper = alert_band(move)
+
+    def fires(ticker, price):
+        return bool(rules.triggered({ticker: price}))
+
+    assert not fires("AAPL", 99.99)
+    assert fires("AAPL", 100.0)
+    assert fires("TSLA", 50.0)
+    assert not fires("TSLA", 50.01)
+    assert fires("MSFT", lower)
+    assert not fires("MSFT", lower + 0.01)
+    assert not fires("MSFT", upper - 0.01)
+    assert fires("MSFT", upper)
+
+
+def test_rules_are_grouped_by_ticker():
+    rules = AlertRuleSet(
+        [
+            alert("msft", "above", 300.0, ticker="MSFT"),
+            alert("aapl_low", "above", 100.0),
+            alert("aapl_high", "above", 150.0),
+        ]
+    )
+    assert len(rules) == 3
+    fired = rules.triggered({"AAPL": 120.0, "MSFT": 120.0, "TSLA": 1e6})
+    assert fired == {"AAPL": ["aapl_low"]}
+
+
+def test_empty_rule_set():
+    rules = AlertRuleSet([])
+    assert len(rules) == 0
+    assert rules.triggered({"AAPL": 100.0}) == {}
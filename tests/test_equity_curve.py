@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import database
+from equity_curve import compute_equity_curves, load_equity_inputs
+
+DATES = pd.bdate_range("2024-01-01", periods=30)
+
+
+def curve(username, price=6.0):
+    trades, funds = load_equity_inputs()
+    closes = pd.DataFrame({"AAPL": price}, index=DATES)
+    _, usernames, values = compute_equity_curves(trades, closes, funds)
+    return values[usernames.index(username)]
+
+
+def pre_ledger_lot(db, username, quantity, price):
+    db["user_portfolio"].insert_one(
+        {
+            "username": username,
+            "stock_ticker": "AAPL",
+            "stock_quantity": quantity,
+            "stock_price": price,
+            "bought_at": datetime(2020, 1, 1),
+        }
+    )
+
+
+def test_ledger_only_user(db):
+    database.create_wallet("alice", initial_funds=1000)
+    database.adjust_wallet_balance("alice", -60)
+    database.add_stock_to_portfolio("alice", "AAPL", 6.0, 10)
+    np.testing.assert_allclose(curve("alice"), 1000)
+
+
+def test_pre_ledger_lot_partly_sold(db):
+    # Bought 10 @ 6 from 1000 before the ledger, sold 4 @ 6 through it
+    pre_ledger_lot(db, "alice", 10, 6.0)
+    database.create_wallet("alice", initial_funds=940)
+    database.remove_from_portfolio("alice", "AAPL", 4, sale_price=6.0)
+    database.adjust_wallet_balance("alice", 24)
+    np.testing.assert_allclose(curve("alice"), 1000)
+
+
+def test_pre_ledger_lot_fully_sold_through_the_ledger(db):
+    pre_ledger_lot(db, "alice", 10, 6.0)
+    database.create_wallet("alice", initial_funds=940)
+    database.remove_from_portfolio("alice", "AAPL", 10, sale_price=6.0)
+    database.adjust_wallet_balance("alice", 60)
+    np.testing.assert_allclose(curve("alice"), 1000)
+
+
+def test_fully_sold_without_a_seed_snapshot(db):
+    # Ledgers started before seed snapshots existed: holdings are clamped
+    # so the replay never goes short
+    pre_ledger_lot(db, "alice", 10, 6.0)
+    database.create_wallet("alice", initial_funds=940)
+    database.remove_from_portfolio("alice", "AAPL", 10, sale_price=6.0)
+    database.adjust_wallet_balance("alice", 60)
+    db["ledger_snapshots"].delete_many({})
+    np.testing.assert_allclose(curve("alice"), 1000)
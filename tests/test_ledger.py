@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import database
+from database import SNAPSHOT_EVERY, apply_trade, empty_ledger_state, replay_ledger
+
+
+def trade(seq, side, quantity, price, ticker="AAPL", **extra):
+    return {"seq": seq, "side": side, "ticker": ticker, "quantity": quantity, "price": price, **extra}
+
+
+def test_apply_trade_sells_fifo():
+    state = empty_ledger_state()
+    apply_trade(state, trade(1, "buy", 10, 5.0))
+    apply_trade(state, trade(2, "buy", 5, 7.0))
+    apply_trade(state, trade(3, "sell", 12, 8.0))
+
+    assert state["lots"] == {"AAPL": [[3, 7.0]]}
+    assert state["realized_pnl"] == 12 * 8.0 - (10 * 5.0 + 2 * 7.0)
+    assert state["seq"] == 3
+    assert state["trade_count"] == 3
+
+
+def test_apply_trade_uses_stored_cost_basis():
+    state = empty_ledger_state()
+    apply_trade(state, trade(1, "sell", 4, 8.0, cost_basis=20.0))
+    assert state["realized_pnl"] == 4 * 8.0 - 20.0
+    assert state["lots"] == {}
+
+
+def test_closing_a_position_drops_the_ticker():
+    state = empty_ledger_state()
+    apply_trade(state, trade(1, "buy", 3, 5.0))
+    apply_trade(state, trade(2, "sell", 3, 6.0))
+    assert state["lots"] == {}
+    assert state["realized_pnl"] == 3.0
+
+
+def lots_by_ticker(username):
+    lots = {}
+    for lot in sorted(database.get_user_portfolio(username), key=lambda lot: lot["bought_at"]):
+        lots.setdefault(lot["stock_ticker"], []).append(
+            [lot["stock_quantity"], lot["stock_price"]]
+        )
+    return lots
+
+
+def test_replay_matches_portfolio_across_snapshots(db):
+    realized = 0.0
+    for i in range(SNAPSHOT_EVERY + 3):
+        database.add_stock_to_portfolio("alice", "AAPL", 10.0 + i, 2)
+        if i % 3 == 2:
+            database.remove_from_portfolio("alice", "AAPL", 3, sale_price=20.0)
+            realized += 3 * 20.0 - db["trades"].find_one(sort=[("seq", -1)])["cost_basis"]
+
+    state = replay_ledger("alice")
+    assert db["ledger_snapshots"].count_documents({"username": "alice"}) >= 2
+    assert state["trade_count"] == db["trades"].count_documents({"username": "alice"})
+    assert state["lots"] == lots_by_ticker("alice")
+    assert abs(state["realized_pnl"] - realized) < 1e-9
+
+
+def test_replay_includes_lots_bought_before_the_ledger(db):
+    db["user_portfolio"].insert_one(
+        {
+            "username": "alice",
+            "stock_ticker": "MSFT",
+            "stock_quantity": 10,
+            "stock_price": 5.0,
+            "bought_at": datetime(2020, 1, 1),
+        }
+    )
+    database.remove_from_portfolio("alice", "MSFT", 4, sale_price=8.0)
+    database.add_stock_to_portfolio("alice", "AAPL", 2.0, 3)
+
+    state = replay_ledger("alice")
+    assert state["lots"] == {"MSFT": [[6, 5.0]], "AAPL": [[3, 2.0]]}
+    assert state["realized_pnl"] == 4 * 8.0 - 4 * 5.0
@@ -0,0 +1,152 @@
+import uuid
+from unittest import mock
+
+import pytest
+
+import database
+import order_engine
+from order_engine import OrderBook, OrderEngine
+
+
+def make_order(side, order_type, price, quantity=1, username="alice", ticker="AAPL"):
+    return {
+        "_id": uuid.uuid4().hex,
+        "username": username,
+        "ticker": ticker,
+        "side": side,
+        "type": order_type,
+        "quantity": quantity,
+        "price": price,
+        "status": "open",
+    }
+
+
+def test_order_book_triggers_at_or_through_the_level():
+    book = OrderBook()
+    buy_limit = make_order("buy", "limit", 100.0)
+    sell_stop = make_order("sell", "stop", 95.0)
+    sell_limit = make_order("sell", "limit", 110.0)
+    buy_stop = make_order("buy", "stop", 105.0)
+    for order in (buy_limit, sell_stop, sell_limit, buy_stop):
+        book.add(order)
+
+    assert book.triggered(100.01) == []
+    assert book.triggered(100.0) == [buy_limit["_id"]]
+    assert book.triggered(90.0) == [sell_stop["_id"]]
+    assert sorted(book.triggered(110.0)) == sorted([sell_limit["_id"], buy_stop["_id"]])
+    # Triggered orders are removed from the book
+    assert book.triggered(90.0) == []
+    assert book.triggered(200.0) == []
+
+
+def test_order_book_pops_every_crossed_level():
+    book = OrderBook()
+    orders = [make_order("buy", "limit", level) for level in (99.0, 100.0, 101.0, 102.0)]
+    for order in orders:
+        book.add(order)
+    assert sorted(book.triggered(100.5)) == sorted(o["_id"] for o in orders[2:])
+    assert len(book.below) == 2
+
+
+@pytest.fixture
+def engine(db):
+    database.create_wallet("alice", initial_funds=1000)
+    return OrderEngine(db)
+
+
+def place(engine, order):
+    engine.db["orders"].insert_one(dict(order))
+    engine.add(order)
+    return order
+
+
+def status(engine, order):
+    return engine.db["orders"].find_one({"_id": order["_id"]})["status"]
+
+
+def test_buy_fill_debits_wallet_and_adds_lot(engine):
+    order = place(engine, make_order("buy", "limit", 50.0, quantity=4))
+
+    results = engine.process_ticks({"AAPL": 45.0})
+
+    assert [r["status"] for r in results] == ["filled"]
+    assert status(engine, order) == "filled"
+    assert database.get_wallet_balance("alice") == 1000 - 4 * 45.0
+    lots = database.get_user_portfolio("alice")
+    assert [(lot["stock_ticker"], lot["stock_quantity"]) for lot in lots] == [("AAPL", 4)]
+
+
+def test_buy_without_funds_is_rejected(engine):
+    order = place(engine, make_order("buy", "limit", 500.0, quantity=3))
+
+    results = engine.process_ticks({"AAPL": 400.0})
+
+    assert [r["status"] for r in results] == ["rejected"]
+    assert status(engine, order) == "rejected"
+    assert database.get_wallet_balance("alice") == 1000
+    assert database.get_user_portfolio("alice") == []
+
+
+def test_sell_fill_credits_only_removed_shares(engine):
+    database.add_stock_to_portfolio("alice", "AAPL", 10.0, 2)
+    held = place(engine, make_order("sell", "limit", 20.0, quantity=2))
+    not_held = place(engine, make_order("sell", "limit", 20.0, quantity=1))
+
+    engine.process_ticks({"AAPL": 25.0})
+
+    assert status(engine, held) == "filled"
+    assert status(engine, not_held) == "rejected"
+    assert database.get_wallet_balance("alice") == 1000 + 2 * 25.0
+    assert database.get_user_portfolio("alice") == []
+
+
+def test_sell_is_rejected_when_lots_vanish_before_removal(engine):
+    database.add_stock_to_portfolio("alice", "AAPL", 10.0, 2)
+    order = place(engine, make_order("sell", "limit", 20.0, quantity=2))
+
+    with mock.patch.object(order_engine, "remove_from_portfolio", return_value=False):
+        engine.process_ticks({"AAPL": 25.0})
+
+    assert status(engine, order) == "rejected"
+    assert database.get_wallet_balance("alice") == 1000
+
+
+def test_orders_claimed_elsewhere_are_skipped(engine):
+    order = place(engine, make_order("buy", "limit", 50.0))
+    engine.db["orders"].update_one({"_id": order["_id"]}, {"$set": {"status": "cancelled"}})
+
+    assert engine.process_ticks({"AAPL": 45.0}) == []
+    assert database.get_wallet_balance("alice") == 1000
+
+
+def test_failed_batch_reopens_its_claims(engine):
+    order = place(engine, make_order("buy", "limit", 50.0))
+
+    with mock.patch.object(
+        order_engine, "add_stock_to_portfolio", side_effect=RuntimeError("down")
+    ):
+        with pytest.raises(RuntimeError):
+            engine.process_ticks({"AAPL": 45.0})
+
+    assert status(engine, order) == "open"
+    # Refunded, and back in the index for the next tick
+    assert database.get_wallet_balance("alice") == 1000
+    assert [r["status"] for r in engine.process_ticks({"AAPL": 45.0})] == ["filled"]
+
+
+def test_load_reopens_stale_claims(engine):
+    from datetime import datetime, timedelta
+
+    stale = make_order("buy", "limit", 50.0)
+    fresh = make_order("buy", "limit", 50.0)
+    now = datetime.now()
+    engine.db["orders"].insert_many(
+        [
+            {**stale, "status": "filling", "claimed_at": now - timedelta(hours=1)},
+            {**fresh, "status": "filling", "claimed_at": now},
+        ]
+    )
+
+    assert engine.load() == 1
+    assert status(engine, stale) == "open"
+    assert status(engine, fresh) == "filling"
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from quote_stream import QuoteStreamer, QuoteTable, SimulatedQuoteFeed
+
+
+def test_quote_table_expires_stale_prices():
+    table = QuoteTable()
+    table.update({"AAPL": 100.0}, at=time.time() - 10)
+    assert table.get("AAPL") == 100.0
+    assert table.get("AAPL", max_age=5) is None
+    assert table.get("MSFT") is None
+
+
+def test_simulated_feed_is_seeded():
+    first = asyncio.run(SimulatedQuoteFeed(seed=1).fetch(["AAPL", "MSFT"]))
+    second = asyncio.run(SimulatedQuoteFeed(seed=1).fetch(["AAPL", "MSFT"]))
+    assert first == second
+    assert all(price > 0 for price in first.values())
+
+
+def test_refresh_fetches_only_watched_tickers():
+    streamer = QuoteStreamer(SimulatedQuoteFeed(seed=1))
+    streamer.watch("alice", ["AAPL"])
+    streamer.watch("bob", ["AAPL", "MSFT"])
+    asyncio.run(streamer.refresh())
+
+    assert streamer.watched_tickers() == ["AAPL", "MSFT"]
+    assert streamer.get_price("AAPL") is not None
+    assert streamer.get_price("TSLA") is None
+
+
+def test_unwatch_drops_a_sessions_tickers():
+    streamer = QuoteStreamer(SimulatedQuoteFeed(seed=1))
+    streamer.watch("alice", ["AAPL"])
+    streamer.watch("bob", ["MSFT"])
+    streamer.unwatch("bob")
+    assert streamer.watched_tickers() == ["AAPL"]
+
+
+def test_idle_sessions_expire():
+    streamer = QuoteStreamer(SimulatedQuoteFeed(seed=1), session_ttl=0)
+    streamer.watch("alice", ["AAPL"])
+    time.sleep(0.01)
+    assert streamer.watched_tickers() == []
+
+
+def test_subscribers_get_every_refresh():
+    streamer = QuoteStreamer(SimulatedQuoteFeed(seed=1))
+    received = []
+    streamer.subscribe(received.append)
+    # A failing subscriber is logged and doesn't stop the others
+    streamer.subscribe(lambda quotes: 1 / 0)
+    streamer.subscribe(received.append)
+    streamer.watch("alice", ["AAPL"])
+
+    asyncio.run(streamer.refresh())
+
+    assert len(received) == 2
+    assert received[0] == received[1] == {"AAPL": streamer.get_price("AAPL")}
+
+
+def test_background_thread_streams_quotes():
+    streamer = QuoteStreamer(SimulatedQuoteFeed(seed=1), interval_seconds=0.01)
+    streamer.watch("alice", ["AAPL"])
+    streamer.start()
+    try:
+        deadline = time.time() + 5
+        while streamer.get_price("AAPL") is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert streamer.get_price("AAPL") is not None
+    finally:
+        streamer.stop()
@@ -0,0 +1,43 @@
+from read_cache import UserReadCache
+
+
+def test_results_are_copies(db):
+    db["user_wallets"].insert_one({"username": "alice", "current_funds": 100.0})
+    cache = UserReadCache(db)
+
+    def load():
+        return db["user_wallets"].find_one({"username": "alice"})
+
+    first = cache.get("user_wallets", "alice", load)
+    first["current_funds"] = 0.0
+    assert cache.get("user_wallets", "alice", load)["current_funds"] == 100.0
+
+
+def test_poll_evicts_changed_users(db):
+    db["user_wallets"].insert_many(
+        [
+            {"username": "alice", "current_funds": 100.0},
+            {"username": "bob", "current_funds": 100.0},
+        ]
+    )
+    db["user_portfolio"].insert_one(
+        {"username": "alice", "stock_ticker": "AAPL", "stock_quantity": 1, "stock_price": 10.0}
+    )
+    cache = UserReadCache(db)
+    for username in ("alice", "bob"):
+        cache.get(
+            "user_wallets",
+            username,
+            lambda username=username: db["user_wallets"].find_one({"username": username}),
+        )
+    cache.get(
+        "user_portfolio", "alice", lambda: list(db["user_portfolio"].find({"username": "alice"}))
+    )
+
+    # Written by "another process", bypassing invalidation
+    db["user_wallets"].update_one({"username": "bob"}, {"$inc": {"current_funds": 5}})
+    db["user_portfolio"].update_one({"username": "alice"}, {"$set": {"stock_quantity": 2}})
+    cache.poll_once()
+
+    assert list(cache.cached_entries("user_wallets")) == ["alice"]
+    assert cache.cached_entries("user_portfolio") == {}
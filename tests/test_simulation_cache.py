@@ -0,0 +1,42 @@
+import numpy as np
+
+from shared_state import SQLiteStore
+from simulation_cache import ResultCache, result_id
+
+
+def test_result_id_is_stable():
+    key = ({"ticker": "AAPL", "n_sims": 1000}, {"mu": 0.001, "sigma": 0.02})
+    same = ({"n_sims": 1000, "ticker": "AAPL"}, {"sigma": 0.02, "mu": 0.001})
+    assert result_id(key) == result_id(same)
+    assert len(result_id(key)) == 12
+
+
+def test_computes_once_and_evicts_least_recent():
+    cache = ResultCache(max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return {"value": value}
+
+    first, _ = cache.get_or_compute(("a",), lambda: compute("a"))
+    cache.get_or_compute(("a",), lambda: compute("a"))
+    cache.get_or_compute(("b",), lambda: compute("b"))
+    cache.get_or_compute(("c",), lambda: compute("c"))
+
+    assert calls == ["a", "b", "c"]
+    assert len(cache) == 2
+    assert cache.get(first) is None
+
+
+def test_shared_store_serves_other_processes(tmp_path):
+    store = SQLiteStore(str(tmp_path / "state.db"))
+    digest = {"sample_paths": np.ones((3, 5), dtype=np.float32)}
+    run_id, _ = ResultCache(store=store).get_or_compute(("a",), lambda: digest)
+
+    # Another replica (or this one after LRU eviction) finds it in the store
+    other = ResultCache(store=store)
+    result = other.get(run_id)
+    assert result is not None
+    np.testing.assert_array_equal(result["sample_paths"], digest["sample_paths"])
+    assert other.get("missing") is None
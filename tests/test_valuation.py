@@ -0,0 +1,45 @@
+import asyncio
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import database
+from admin_stats import compute_admin_stats
+from shared_state import get_shared_store
+
+
+def flaky_price(ticker):
+    if ticker.startswith("BAD"):
+        raise ValueError("no history")
+    return 10.0
+
+
+@pytest.fixture(autouse=True)
+def prices():
+    with mock.patch.object(database, "get_live_stock_price", flaky_price):
+        yield
+
+
+def test_failed_fetch_uses_last_known_price():
+    get_shared_store().set_json("last_quote:BAD1", 7.0)
+    prices = asyncio.run(database.fetch_prices_async(["OK", "BAD1", "BAD_NEVER"]))
+    assert prices == {"OK": 10.0, "BAD1": 7.0}
+
+
+def test_unpriced_lots_count_at_cost(db):
+    database.create_wallet("alice", initial_funds=100)
+    database.add_stock_to_portfolio("alice", "BAD_NEVER", 5.0, 2)
+    database.add_stock_to_portfolio("alice", "OK", 5.0, 2)
+    assert database.calculate_net_worth("alice") == 100 + 2 * 5.0 + 2 * 10.0
+
+
+def test_admin_stats_value_unpriced_positions_at_cost():
+    lots = pd.DataFrame(
+        [{"username": "alice", "ticker": "BAD_NEVER", "quantity": 2, "cost": 10.0}]
+    )
+    trades = pd.DataFrame(columns=["username", "side", "ticker", "quantity", "price", "pnl"])
+    users, _ = compute_admin_stats(["alice"], lots, trades, {"alice": 100.0}, {})
+    assert users[0]["holdings_value"] == 10.0
+    assert users[0]["unrealized_pnl"] == 0.0
+    assert users[0]["net_worth"] == 110.0
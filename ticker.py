@@ -1,21 +1,66 @@
 import pandas as pd
 import streamlit as st
-import yfinance as yf
 
+from market_data import get_market_data_provider
+from metrics import CACHE_MISSES, CACHE_REQUESTS, instrument_cache
+from profiler import timed
+from quote_stream import get_quote_streamer
+from shared_state import get_shared_store
 
-@st.cache_resource(show_spinner=False, ttl="1h")
+# How long histories and quotes stay in the shared store, in seconds
+HISTORY_TTL = 3600
+QUOTE_TTL = 300
+# The last good quote is kept much longer, as a fallback for failed fetches
+LAST_QUOTE_TTL = 7 * 24 * 3600
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, ttl="1h"))
+@timed()
 def load_stock_data(tickers: list, period: str) -> pd.DataFrame:
-    """Load historical stock data from yfinance"""
-    tickers_obj = yf.Tickers(tickers)
-    data = tickers_obj.history(period=period)
-    if data is None:
-        raise RuntimeError("YFinance returned no data.")
-    return data["Close"]
+    """Load historical stock data, shared between replicas via the shared store"""
+
+    def fetch():
+        CACHE_MISSES.inc(cache="shared_store.history")
+        data = get_market_data_provider().history(tickers, period=period)
+        if data is None:
+            raise RuntimeError("Market data provider returned no data.")
+        return data["Close"]
+
+    key = f"history:{period}:{','.join(tickers)}"
+    CACHE_REQUESTS.inc(cache="shared_store.history")
+    return get_shared_store().cached(key, fetch, ttl=HISTORY_TTL)
 
 
-@st.cache_data(ttl=300)
+@instrument_cache(st.cache_data(ttl=QUOTE_TTL))
+@timed()
 def get_current_stock_price(ticker: str) -> float:
     """Get the current stock price for a given ticker"""
-    stock_data = yf.Ticker(ticker)
-    current_price = stock_data.history(period="1d")["Close"].iloc[-1]
-    return current_price
+    store = get_shared_store()
+    price = store.get_json(f"quote:{ticker}")
+    CACHE_REQUESTS.inc(cache="shared_store.quote")
+    if price is None:
+        CACHE_MISSES.inc(cache="shared_store.quote")
+        price = float(get_market_data_provider().current_price(ticker))
+        store.set_json(f"quote:{ticker}", price, ttl=QUOTE_TTL)
+        store.set_json(f"last_quote:{ticker}", price, ttl=LAST_QUOTE_TTL)
+    return price
+
+
+def get_live_stock_price(ticker: str) -> float:
+    """Get the streamed price for a ticker, falling back to a (cached) fetch"""
+    streamer = get_quote_streamer()
+    if streamer is not None:
+        price = streamer.get_price(ticker)
+        if price is not None:
+            return price
+    return get_current_stock_price(ticker)
+
+
+def get_last_known_price(ticker: str) -> float | None:
+    """Most recent price seen for a ticker, however old; None if never fetched"""
+    streamer = get_quote_streamer()
+    if streamer is not None:
+        price = streamer.table.get(ticker)
+        if price is not None:
+            return price
+    return get_shared_store().get_json(f"last_quote:{ticker}")
@@ -0,0 +1,112 @@
+"""The listing of tradable symbols from stocks.json, loaded once per process."""
+
+import difflib
+import json
+import os
+import threading
+
+import numpy as np
+
+STOCKS_PATH = "stocks.json"
+
+_cache: dict[str, tuple[float, "TickerUniverse"]] = {}
+_cache_lock = threading.Lock()
+
+
+class TickerUniverse:
+    """Sorted, immutable symbol table with name/sector metadata.
+
+    Symbols are kept in a sorted NumPy array so prefix lookups are two binary
+    searches, and ``symbol_list`` is built once so widgets get the same list
+    object on every rerun.
+    """
+
+    def __init__(self, rows: list[dict]):
+        rows = sorted(rows, key=lambda row: row["symbol"])
+        self.symbols = np.array([row["symbol"] for row in rows])
+        self.names = np.array([row.get("name", "") for row in rows])
+        self.sectors = np.array([row.get("sector", "") for row in rows])
+        self._names_lower = np.char.lower(self.names)
+        self.symbol_list = self.symbols.tolist()
+        self._index = {symbol: i for i, symbol in enumerate(self.symbol_list)}
+
+    def __len__(self) -> int:
+        return len(self.symbol_list)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def info(self, symbol: str) -> dict | None:
+        """Return {"symbol", "name", "sector"} for a symbol, or None."""
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        return {
+            "symbol": symbol,
+            "name": str(self.names[i]),
+            "sector": str(self.sectors[i]),
+        }
+
+    def options_with(self, extra: list) -> list:
+        """Return selector options, adding any custom symbols not listed."""
+        missing = [symbol for symbol in extra if symbol not in self._index]
+        if not missing:
+            return self.symbol_list
+        return self.symbol_list + missing
+
+    def prefix_search(self, prefix: str, limit: int = 20) -> list:
+        """Symbols starting with ``prefix`` (case-insensitive), in order."""
+        prefix = prefix.upper()
+        lo = np.searchsorted(self.symbols, prefix, side="left")
+        hi = np.searchsorted(self.symbols, prefix + "\uffff", side="left")
+        return self.symbol_list[lo : min(hi, lo + limit)]
+
+    def fuzzy_search(self, query: str, limit: int = 20) -> list:
+        """Rank symbols for a free-text query.
+
+        Symbol prefix matches come first, then companies whose name contains
+        the query, then symbols that are close to it (typos).
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        results = self.prefix_search(query, limit)
+        seen = set(results)
+
+        name_hits = np.flatnonzero(np.char.find(self._names_lower, query.lower()) >= 0)
+        for i in name_hits:
+            if len(results) >= limit:
+                return results
+            symbol = self.symbol_list[i]
+            if symbol not in seen:
+                results.append(symbol)
+                seen.add(symbol)
+
+        for symbol in difflib.get_close_matches(
+            query.upper(), self.symbol_list, n=limit, cutoff=0.6
+        ):
+            if len(results) >= limit:
+                break
+            if symbol not in seen:
+                results.append(symbol)
+                seen.add(symbol)
+        return results
+
+
+def load_ticker_universe(path: str = STOCKS_PATH) -> TickerUniverse:
+    """Return the universe for ``path``, re-reading only when its mtime changes."""
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, "r") as f:
+            data = json.load(f)
+        universe = TickerUniverse(data["data"]["rows"])
+        _cache[path] = (mtime, universe)
+        return universe